@@ -5,20 +5,37 @@ A trauma-aware, kid-safe app for one very special star.
 
 import streamlit as st
 import streamlit.components.v1 as components
-import json
+import pandas as pd
 import os
 import time as time_module
 from datetime import datetime, time, date
-from openai import OpenAI
 from pathlib import Path
+from dataclasses import replace
 
 # Import our new utilities
 from gpt_utils import (
     generate_story, generate_star_facts, generate_feelings_response,
-    generate_little_lesson, generate_daily_affirmation, answer_wonder_question,
-    generate_wonder_question_prompt, generate_routine_content, StoryOptions
+    generate_little_lesson, answer_wonder_question,
+    generate_wonder_question_prompt, generate_routine_content, StoryOptions,
+    daily_affirmation_job, star_facts_job, wonder_prompt_job,
+    complete_chat, stream_chat, get_response_cache, set_custom_word_filters,
+    set_offline_only, get_openai_client as get_shared_openai_client
 )
-from tts_utils import render_read_aloud, render_read_aloud_simple, text_to_speech
+from offline_content import offline_facts, offline_story
+from word_filter import BannedContentError
+from story_pool import get_story_pool, settings_fingerprint
+from tts_utils import get_audio_cache, render_read_aloud, render_read_aloud_simple, text_to_speech
+from calm_timer import calm_timer, new_timer_event
+from config_store import get_config_store, thaw
+from profile_store import get_profile_store
+from generation_service import get_generation_service
+from resilience import get_resilience
+from rate_limits import (
+    DEFAULT_RATE_LIMITS, UsageLimitExceeded, UsageLimits, UsageScope, get_usage_governor,
+    get_usage_scope, set_usage_scope
+)
+from tracing import METRICS_EXPORT_FILE, get_tracer, span
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import database as db
 
 # Page config
@@ -29,6 +46,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Everything from here to the end of main() is one traced rerun
+rerun_trace = get_tracer().begin_trace("rerun")
+
 # Custom CSS styling
 def inject_css():
     import streamlit as st
@@ -310,6 +330,9 @@ AFFIRMATIONS_FILE = DATA_DIR / "affirmations.json"
 LESSONS_FILE = DATA_DIR / "lessons.json"
 USAGE_FILE = DATA_DIR / "usage.json"
 
+# Session state that belongs to the browser session rather than the child
+SESSION_KEYS_KEPT_ON_SWITCH = ("mode", "admin_page", "admin_authenticated", "db_connected")
+
 # Initialize session state
 def init_session_state():
     """Initialize all session state variables"""
@@ -345,19 +368,6 @@ def init_session_state():
         if key not in st.session_state:
             st.session_state[key] = value
 
-# Load/Save functions
-def load_json(filepath, default):
-    """Load JSON file or return default if not exists"""
-    if filepath.exists():
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    return default
-
-def save_json(filepath, data):
-    """Save data to JSON file"""
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
-
 # Default data structures
 DEFAULT_PROFILE = {
     "child_name": "Little Star",
@@ -369,6 +379,7 @@ DEFAULT_PROFILE = {
 DEFAULT_SETTINGS = {
     "admin_pin": "1234",  # Default PIN - should be changed!
     "use_ai": True,
+    "metrics_export": False,
     "max_story_length": "medium",
     "banned_topics": {
         "death_illness": True,
@@ -383,9 +394,25 @@ DEFAULT_SETTINGS = {
     "quiet_hours_end": "07:00",
     "model": "gpt-4o-mini",
     "temperature": 0.7,
-    "max_tokens": 500
+    "max_tokens": 500,
+    "story_pool_size": 2,
+    "story_pool_daily_budget": 30,
+    "rate_limits": dict(DEFAULT_RATE_LIMITS)
 }
 
+# Settings each child has their own copy of (stored per profile in the
+# database); the rest - PIN, model, limits, pool - are shared by every profile
+PROFILE_SETTING_KEYS = (
+    "max_story_length",
+    "banned_topics",
+    "reading_level",
+    "custom_word_filters",
+    "daily_limit_minutes",
+    "session_length_minutes",
+    "quiet_hours_start",
+    "quiet_hours_end",
+)
+
 DEFAULT_AFFIRMATIONS = {
     "happy": [
         "I am allowed to feel joy! 🌟",
@@ -454,62 +481,33 @@ DEFAULT_LESSONS = [
     }
 ]
 
-# Load data on startup
-profile = load_json(PROFILE_FILE, DEFAULT_PROFILE)
-settings = load_json(SETTINGS_FILE, DEFAULT_SETTINGS)
-affirmations = load_json(AFFIRMATIONS_FILE, DEFAULT_AFFIRMATIONS)
-lessons = load_json(LESSONS_FILE, DEFAULT_LESSONS)
+# Load data (parsed once per process; each rerun gets read-only snapshots
+# with any Streamlit secrets already applied)
+config = get_config_store()
+default_profile = config.load("profile", PROFILE_FILE, DEFAULT_PROFILE)
+shared_settings = config.load("settings", SETTINGS_FILE, DEFAULT_SETTINGS)
+affirmations = config.load("affirmations", AFFIRMATIONS_FILE, DEFAULT_AFFIRMATIONS)
+lessons = config.load("lessons", LESSONS_FILE, DEFAULT_LESSONS)
+profiles = get_profile_store()
 
-# Override with Streamlit secrets if available (for Streamlit Cloud deployment)
-try:
-    if hasattr(st, 'secrets'):
-        # Override API key if set in secrets
-        if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
-            settings['api_key'] = st.secrets['openai']['api_key']
-
-        # Override admin PIN if set in secrets
-        if 'admin' in st.secrets and 'pin' in st.secrets['admin']:
-            settings['admin_pin'] = st.secrets['admin']['pin']
-
-        # Override profile if set in secrets
-        if 'profile' in st.secrets:
-            if 'child_name' in st.secrets['profile']:
-                profile['child_name'] = st.secrets['profile']['child_name']
-            if 'age' in st.secrets['profile']:
-                profile['age'] = st.secrets['profile']['age']
-            if 'pronouns' in st.secrets['profile']:
-                profile['pronouns'] = st.secrets['profile']['pronouns']
-            if 'interests' in st.secrets['profile']:
-                # Convert comma-separated string to list
-                interests_str = st.secrets['profile']['interests']
-                profile['interests'] = [i.strip() for i in interests_str.split(',')]
-except Exception:
-    # Secrets not available (local development) - use JSON files only
-    pass
-
-# Initialize database
+# Initialize database (Neon if configured in secrets, otherwise data/little_star.db)
 try:
-    if 'database' in st.secrets and 'url' in st.secrets['database']:
-        # Initialize database tables
-        if db.init_database():
-            # Get or create profile_id for current user
-            if 'profile_id' not in st.session_state:
-                st.session_state['profile_id'] = db.create_or_get_profile(
-                    child_name=profile['child_name'],
-                    age=profile['age'],
-                    pronouns=profile['pronouns'],
-                    interests=profile['interests']
-                )
-            # Mark database as connected
-            if 'profile_id' not in st.session_state or st.session_state.get('profile_id') is None:
-                st.session_state['db_connected'] = False
-            else:
-                st.session_state['db_connected'] = True
-        else:
-            st.session_state['profile_id'] = None
+    # Apply pending schema migrations (a no-op after the first run in this process)
+    if db.init_database():
+        # New sessions start with the child from profile.json (created on first run)
+        if 'profile_id' not in st.session_state:
+            st.session_state['profile_id'] = profiles.find_or_create(
+                default_profile['child_name'],
+                age=default_profile['age'],
+                pronouns=default_profile['pronouns'],
+                interests=default_profile['interests']
+            )
+        # Mark database as connected
+        if 'profile_id' not in st.session_state or st.session_state.get('profile_id') is None:
             st.session_state['db_connected'] = False
+        else:
+            st.session_state['db_connected'] = True
     else:
-        # Database not configured - app will work with session state only
         st.session_state['profile_id'] = None
         st.session_state['db_connected'] = False
 except Exception as e:
@@ -519,31 +517,83 @@ except Exception as e:
     # Uncomment for debugging:
     # st.error(f"Database initialization error: {str(e)}")
 
-def save_profile():
-    save_json(PROFILE_FILE, profile)
-
-def save_settings():
-    save_json(SETTINGS_FILE, settings)
+# The child this session is for: their profile and settings from the profile
+# store (memory, not the database, on most reruns), or the JSON files as they
+# are when there's no database
+profile, settings = default_profile, shared_settings
+if st.session_state.get('profile_id'):
+    profile = profiles.profile(st.session_state['profile_id']) or default_profile
+    settings = profiles.settings(st.session_state['profile_id'], shared_settings)
+
+# Every generator (here and in gpt_utils) checks output against the custom word filters
+set_custom_word_filters(settings.get("custom_word_filters", []))
+# Offline-only mode: no OpenAI calls at all, everything comes from the offline pack
+set_offline_only(not settings.get("use_ai", True))
+
+# OpenAI calls made for this session count against this profile's limits
+def usage_profile():
+    return st.session_state.get('profile_id') or profile.get("child_name")
+
+set_usage_scope(UsageScope.for_profile(usage_profile(), settings))
+
+# Snapshots are read-only: edit a thaw()ed copy and pass it to save_*
+def save_profile(updated):
+    """Save the session's child (profile.json too when it's the default child)"""
+    profile_id = st.session_state.get('profile_id')
+    if profile_id:
+        if not profiles.update_profile(profile_id, child_name=updated["child_name"], age=updated["age"],
+                                       pronouns=updated["pronouns"], interests=updated["interests"]):
+            return False
+        if profile.get("child_name") != default_profile.get("child_name"):
+            return True
+    config.save("profile", {key: value for key, value in updated.items() if key != "id"})
+    return True
+
+def save_settings(updated):
+    """Per-child settings go to the session's profile, the rest to settings.json"""
+    profile_id = st.session_state.get('profile_id')
+    if not profile_id:
+        config.save("settings", updated)
+        return True
+
+    changed = {key: updated[key] for key in PROFILE_SETTING_KEYS
+               if key in updated and updated[key] != thaw(settings.get(key))}
+    shared = thaw(shared_settings)
+    shared.update({key: value for key, value in updated.items() if key not in PROFILE_SETTING_KEYS})
+    if shared != thaw(shared_settings):
+        config.save("settings", shared)
+    return profiles.save_settings(profile_id, changed) if changed else True
+
+def select_profile(profile_id):
+    """Switch this session to another child; the previous child's progress isn't carried over"""
+    if profile_id == st.session_state.get('profile_id'):
+        return
+    for key in list(st.session_state.keys()):
+        if key not in SESSION_KEYS_KEPT_ON_SWITCH:
+            del st.session_state[key]
+    st.session_state['profile_id'] = profile_id
 
-def save_affirmations():
-    save_json(AFFIRMATIONS_FILE, affirmations)
+def save_affirmations(updated):
+    config.save("affirmations", updated)
 
-def save_lessons():
-    save_json(LESSONS_FILE, lessons)
+def save_lessons(updated):
+    config.save("lessons", updated)
 
 # Usage tracking
 def get_today_usage():
     """Get minutes used today"""
-    usage = load_json(USAGE_FILE, {})
+    usage = config.load("usage", USAGE_FILE, {})
     today = datetime.now().strftime("%Y-%m-%d")
     return usage.get(today, 0)
 
 def add_usage_minutes(minutes):
-    """Add minutes to today's usage"""
-    usage = load_json(USAGE_FILE, {})
+    """Add minutes to today's usage (locked, so concurrent sessions can't lose minutes)"""
     today = datetime.now().strftime("%Y-%m-%d")
-    usage[today] = usage.get(today, 0) + minutes
-    save_json(USAGE_FILE, usage)
+
+    def add(usage):
+        usage[today] = usage.get(today, 0) + minutes
+
+    config.update("usage", USAGE_FILE, {}, add)
 
 def check_quiet_hours():
     """Check if current time is in quiet hours"""
@@ -564,43 +614,20 @@ def check_usage_limit():
 
 # OpenAI helper
 def get_openai_client():
-    """Get OpenAI client using Streamlit secrets or environment variable"""
-    try:
-        # Check if API key is in settings (from Streamlit secrets or local JSON)
-        api_key = settings.get('api_key')
-        if api_key:
-            return OpenAI(api_key=api_key)
-        else:
-            # Fall back to OPENAI_API_KEY environment variable (for local dev)
-            return OpenAI()
-    except Exception:
-        return None
+    """Shared OpenAI client (key from Streamlit secrets, local JSON, or environment)"""
+    return get_shared_openai_client(settings.get('api_key'))
 
 def synthesize_story_audio(text):
     """Convert story text to speech using OpenAI TTS"""
     if not text:
         return None
-    try:
-        client = get_openai_client()
-        if not client:
-            return None
-
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="nova",  # Warm, friendly female voice
-            input=text
-        )
-        return response.content
-    except Exception as e:
-        st.error(f"Could not generate audio: {str(e)}")
-        return None
+    return text_to_speech(text, speed=1.0)
 
-def generate_story(length, theme, tone):
-    """Generate a kid-safe story"""
-    client = get_openai_client()
-    if not client:
-        return "⚠️ API key not set. Please ask a grown-up to set it up in the Grown-ups' Corner."
+BANNED_STORY_MESSAGE = "⚠️ The story contained something that's not allowed. Let's try a different story!"
+RESTING_STORY_MESSAGE = "⚠️ Little Star Rabbit has told lots of stories and needs a little rest. Let's try again soon! 🐇"
 
+def story_messages(length, theme, tone):
+    """Chat messages for a kid-safe story"""
     # Build system prompt with safety constraints
     banned = []
     if settings["banned_topics"]["death_illness"]:
@@ -634,33 +661,80 @@ CRITICAL SAFETY RULES:
 
 The story should feel like a warm hug."""
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Tell me a {length} {tone} story about {theme}!"}
+    ]
+
+def stream_story(length, theme, tone, fallback=True):
+    """
+    Generate a kid-safe story, yielding the text so far as it streams in
+
+    Every chunk goes through the shared banned-word scanner in stream_chat.
+    If it trips, the last value yielded is a warning that replaces the
+    partial story. Without an API key, or if the API fails, the story comes
+    from the offline pack (fallback=False yields a warning instead).
+    """
+    offline = offline_story(theme, tone, profile.get("child_name", "Little Star")) if fallback else None
+
+    client = get_openai_client()
+    if not client:
+        yield offline or "⚠️ API key not set. Please ask a grown-up to set it up in the Grown-ups' Corner."
+        return
+
+    story = ""
+
     try:
-        response = client.chat.completions.create(
+        for chunk in stream_chat(
+            "story", client,
+            messages=story_messages(length, theme, tone),
             model=settings["model"],
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Tell me a {length} {tone} story about {theme}!"}
-            ],
             temperature=settings["temperature"],
-            max_tokens=settings["max_tokens"]
-        )
-
-        story = response.choices[0].message.content
-
+            max_tokens=settings["max_tokens"],
+            safety={
+                "banned_topics": settings["banned_topics"],
+                "reading_level": settings["reading_level"]
+            }
+        ):
+            story += chunk
+            yield story
+    except BannedContentError:
         # Filter custom banned words
-        for word in settings["custom_word_filters"]:
-            if word.lower() in story.lower():
-                return f"⚠️ The story contained something that's not allowed. Let's try a different story!"
+        yield BANNED_STORY_MESSAGE
+    except UsageLimitExceeded:
+        # Rate limit or daily budget: pooled and cached stories still work
+        get_resilience().note_fallback("story")
+        yield offline or RESTING_STORY_MESSAGE
+    except Exception as e:
+        get_resilience().note_fallback("story")
+        yield offline or f"⚠️ Oops! Something went wrong: {str(e)}"
 
+def generate_story(length, theme, tone, fallback=True):
+    """Generate a kid-safe story"""
+    story = None
+    for story in stream_story(length, theme, tone, fallback):
+        pass
+    return story
+
+def pregenerate_story(length, theme, tone, word_filters, usage_scope):
+    """Generate a story for the ready pool (runs on a background thread)"""
+    set_custom_word_filters(word_filters)
+    # Charged to the child, but never shares a request with their foreground stories
+    set_usage_scope(replace(usage_scope, pooled=True) if usage_scope else None)
+    # Offline stories are instant anyway; only keep generated ones
+    story = generate_story(length, theme, tone, fallback=False)
+    if story and not story.startswith("⚠️"):
         return story
-    except Exception as e:
-        return f"⚠️ Oops! Something went wrong: {str(e)}"
+    return None
 
 def generate_facts(category):
     """Generate kid-safe facts"""
+    facts = offline_facts(category)
+    offline = "\n".join(f"- {fact}" for fact in facts) if facts else None
+
     client = get_openai_client()
     if not client:
-        return "⚠️ API key not set. Please ask a grown-up to set it up in the Grown-ups' Corner."
+        return offline or "⚠️ API key not set. Please ask a grown-up to set it up in the Grown-ups' Corner."
 
     system_prompt = f"""You are sharing interesting facts with a curious {profile['age']}-year-old named {profile['child_name']}.
 
@@ -676,24 +750,44 @@ RULES:
 Think of facts that would make a child say "WOW!" or "COOL!" """
 
     try:
-        response = client.chat.completions.create(
-            model=settings["model"],
+        return complete_chat(
+            "facts", client,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Tell me some amazing facts about {category}!"}
             ],
+            model=settings["model"],
             temperature=settings["temperature"],
             max_tokens=300
         )
-
-        return response.choices[0].message.content
     except Exception as e:
-        return f"⚠️ Oops! Something went wrong: {str(e)}"
+        get_resilience().note_fallback("facts")
+        return offline or f"⚠️ Oops! Something went wrong: {str(e)}"
 
 # ============================================================================
 # NEW FEATURE HELPERS
 # ============================================================================
 
+FACT_TOPICS = [
+    "ocean animals", "space", "butterflies", "weather",
+    "trees", "birds", "dinosaurs", "rainbows", "stars"
+]
+
+def current_session_id() -> str:
+    """Id of this browser session (for the generation service)"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+def prefetch_child_content():
+    """Start generating what the home page's next stops will need, in the background"""
+    service = get_generation_service()
+    session_id = current_session_id()
+    if not st.session_state.get("wonder_suggestion"):
+        service.submit(session_id, "wonder_idea", wonder_prompt_job(), scope={"home", "wonder"})
+    if not st.session_state.get("current_facts"):
+        topic = st.session_state.get("chosen_facts_topic", FACT_TOPICS[0])
+        service.submit(session_id, ("facts", topic), star_facts_job(topic), scope={"home", "facts"})
+
 def get_daily_affirmation():
     """Get or generate daily affirmation"""
     today = date.today()
@@ -702,7 +796,12 @@ def get_daily_affirmation():
     # Check if we need a new affirmation
     if (st.session_state.get("affirmation_date") != today or
         not st.session_state.get("daily_affirmation")):
-        affirmation = generate_daily_affirmation(child_name)
+        # Runs alongside the prefetches, so the page waits for the slowest one only
+        results = get_generation_service().gather(
+            current_session_id(), {"affirmation": daily_affirmation_job(child_name)},
+            scope={"home"}
+        )
+        affirmation = results["affirmation"]
         st.session_state["daily_affirmation"] = affirmation
         st.session_state["affirmation_date"] = today
 
@@ -719,7 +818,7 @@ def unlock_strength(strength_id: str, strength_name: str = None):
 
         # Save to database if configured
         if st.session_state.get('profile_id') and strength_name:
-            db.unlock_strength(st.session_state['profile_id'], strength_id, strength_name)
+            db.queue_strength(st.session_state['profile_id'], strength_id, strength_name)
 
 def check_strength_unlocks():
     """Check if any new strengths should be unlocked"""
@@ -761,6 +860,8 @@ def show_landing():
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    show_profile_picker()
+
     col1, col2 = st.columns(2, gap="large")
 
     with col1:
@@ -779,12 +880,35 @@ def show_landing():
             st.session_state["mode"] = "admin"
             st.rerun()
 
+def show_profile_picker():
+    """Who's playing? (only when more than one child shares the app)"""
+    if not st.session_state.get('db_connected'):
+        return
+    children = profiles.list_profiles()
+    if len(children) < 2:
+        return
+
+    st.markdown("<h3 style='text-align: center;'>Who's playing today?</h3>", unsafe_allow_html=True)
+    columns = st.columns(min(len(children), 4))
+    for index, child in enumerate(children):
+        selected = child["id"] == st.session_state.get('profile_id')
+        with columns[index % len(columns)]:
+            if st.button(f"{'⭐ ' if selected else ''}{child['child_name']}", key=f"profile_{child['id']}",
+                         use_container_width=True, type="primary" if selected else "secondary"):
+                select_profile(child["id"])
+                st.rerun()
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
 # ============================================================================
 # CHILD MODE
 # ============================================================================
 
 def show_child_mode():
     """Main child mode controller"""
+    # Drop background generations the new page has no use for
+    get_generation_service().navigate(current_session_id(), st.session_state["child_page"])
+
     # Always show a back to home button at the top if not on home page
     if st.session_state["child_page"] != "home":
         if st.button("⬅️ Back to Home", key="back_to_home"):
@@ -833,6 +957,7 @@ def show_child_home():
 
     # FEATURE 1: Daily Affirmation
     st.markdown("### 🌟 Little Star Message")
+    prefetch_child_content()
     affirmation = get_daily_affirmation()
 
     st.markdown(f"""
@@ -917,6 +1042,19 @@ def show_child_home():
             st.session_state["mode"] = "landing"
             st.rerun()
 
+# Same card as render_read_aloud, so the streamed story doesn't jump when it finishes
+STORY_BOX_HTML = """
+    <div style='
+        background: rgba(255, 255, 255, 0.6);
+        padding: 1.5rem;
+        border-radius: 15px;
+        border: 2px solid #ffb6d9;
+        margin: 1rem 0;
+    '>
+        {text}
+    </div>
+"""
+
 def show_storytime():
     """Updated storytime with GPT integration and TTS"""
     child_name = profile.get("child_name", "Little Star")
@@ -938,20 +1076,44 @@ def show_storytime():
             "calm", "gentle", "cozy", "happy", "curious"
         ])
 
+    # Keep a couple of stories ready for the current choice so the button is instant
+    story_pool = get_story_pool()
+    pool_profile = usage_profile()
+    story_pool.sync(pool_profile, settings_fingerprint(settings, profile))
+    pool_key = (pool_profile, length, topic, mood)
+    word_filters = tuple(settings.get("custom_word_filters", []))
+    usage_scope = get_usage_scope()
+    if settings.get("use_ai", True):
+        story_pool.warm(
+            pool_key,
+            lambda: pregenerate_story(length, topic, mood, word_filters, usage_scope),
+            target_size=settings.get("story_pool_size", 2),
+            daily_budget=settings.get("story_pool_daily_budget", 30)
+        )
+
     if st.button("🌟 Tell me a story!", type="primary", use_container_width=True):
-        with st.spinner("Creating your story..."):
-            story = generate_story(length, topic, mood)
-            st.session_state["current_story"] = story
-            st.session_state["completed_storytime_today"] = True
-            st.session_state["storytime_count"] = st.session_state.get("storytime_count", 0) + 1
+        story = story_pool.take(pool_key)
 
-            # Save story to database if configured
-            if st.session_state.get('profile_id'):
-                db.save_story(st.session_state['profile_id'], story, length, topic, mood)
-                db.track_activity(st.session_state['profile_id'], 'story_generated')
+        if not story:
+            # Show the story word by word as it arrives instead of behind a spinner
+            story_placeholder = st.empty()
+            story_placeholder.markdown(STORY_BOX_HTML.format(text="✨ Creating your story..."), unsafe_allow_html=True)
 
-            check_strength_unlocks()
-            st.rerun()
+            story = ""
+            for story in stream_story(length, topic, mood):
+                story_placeholder.markdown(STORY_BOX_HTML.format(text=story), unsafe_allow_html=True)
+
+        st.session_state["current_story"] = story
+        st.session_state["completed_storytime_today"] = True
+        st.session_state["storytime_count"] = st.session_state.get("storytime_count", 0) + 1
+
+        # Save story to database if configured
+        if st.session_state.get('profile_id') and not story.startswith("⚠️"):
+            db.queue_story(st.session_state['profile_id'], story, length, topic, mood)
+            db.queue_activity(st.session_state['profile_id'], 'story_generated')
+
+        check_strength_unlocks()
+        st.rerun()
 
     # Display story with TTS
     if st.session_state.get("current_story"):
@@ -979,14 +1141,19 @@ def show_star_facts():
     """Updated star facts with GPT and TTS"""
     st.markdown("### 🌟 Star Facts")
 
-    topic = st.selectbox("What do you want to learn about?", [
-        "ocean animals", "space", "butterflies", "weather",
-        "trees", "birds", "dinosaurs", "rainbows", "stars"
-    ])
+    chosen = st.session_state.get("chosen_facts_topic", FACT_TOPICS[0])
+    topic = st.selectbox("What do you want to learn about?", FACT_TOPICS,
+                         index=FACT_TOPICS.index(chosen) if chosen in FACT_TOPICS else 0)
+    # Remembered outside the widget (whose state Streamlit drops while this page
+    # isn't shown) so the home page prefetches the topic the child last picked
+    st.session_state["chosen_facts_topic"] = topic
 
     if st.button("✨ Show me facts!", type="primary", use_container_width=True):
         with st.spinner("Finding amazing facts..."):
-            facts = generate_star_facts(topic)
+            # Usually already generated in the background from the home page
+            facts = get_generation_service().take(current_session_id(), ("facts", topic))
+            if facts is None:
+                facts = generate_star_facts(topic)
             st.session_state["current_facts"] = {"topic": topic, "facts": facts}
             st.rerun()
 
@@ -1076,7 +1243,7 @@ def show_feelings():
 
             # Track in database if configured
             if st.session_state.get('profile_id'):
-                db.track_activity(st.session_state['profile_id'], f'feeling_{selected_feeling}')
+                db.queue_activity(st.session_state['profile_id'], f'feeling_{selected_feeling}')
 
             check_strength_unlocks()
 
@@ -1232,6 +1399,20 @@ def show_calm_burrow():
             st.session_state["timer_start_time"] = None
         if "timer_paused_at" not in st.session_state:
             st.session_state["timer_paused_at"] = None
+        if "timer_epoch" not in st.session_state:
+            st.session_state["timer_epoch"] = 0
+
+        # The countdown runs in the browser; apply whatever it last reported
+        event = new_timer_event()
+        if event and event.get("epoch") == st.session_state["timer_epoch"] \
+                and st.session_state["timer_start_time"] is not None:
+            if event["event"] == "pause":
+                st.session_state["timer_paused_at"] = event["elapsed"]
+            elif event["event"] in ("start", "resume"):
+                st.session_state["timer_start_time"] = time_module.time() - event["elapsed"]
+                st.session_state["timer_paused_at"] = None
+            elif event["event"] == "finish":
+                st.session_state["timer_finished"] = True
 
         # Check if timer is running
         if st.session_state["timer_start_time"] is None:
@@ -1264,7 +1445,9 @@ def show_calm_burrow():
             with col1:
                 if st.button("🌟 Start Timer", key="start_timer", use_container_width=True, type="primary"):
                     st.session_state["timer_start_time"] = time_module.time()
-                    st.session_state["timer_running"] = True
+                    st.session_state["timer_paused_at"] = None
+                    st.session_state["timer_finished"] = False
+                    st.session_state["timer_epoch"] += 1
                     st.rerun()
             with col2:
                 if st.button("← Back", key="back_from_timer_start", use_container_width=True):
@@ -1274,102 +1457,36 @@ def show_calm_burrow():
                     st.rerun()
         else:
             # Calculate elapsed and remaining time
-            if st.session_state.get("timer_paused_at"):
+            if st.session_state["timer_paused_at"] is not None:
                 elapsed = st.session_state["timer_paused_at"]
             else:
                 elapsed = int(time_module.time() - st.session_state["timer_start_time"])
 
             remaining = max(0, total_seconds - elapsed)
 
-            if remaining > 0 and not st.session_state.get("timer_paused_at"):
-                # Timer is active - show countdown
+            if remaining > 0 and not st.session_state.get("timer_finished"):
+                # Timer is active - the countdown and stop/resume live in the component
                 st.markdown("""
                     <div style='text-align: center; margin-bottom: 2rem;'>
                         <h2 style='color: #d5006d;'>🐇 Calm Burrow Time 🐇</h2>
-                        <p style='font-size: 1.4rem; color: #c2185b;'>Little Star Rabbit is resting with you...</p>
-                    </div>
-                """, unsafe_allow_html=True)
-
-                mins, secs = divmod(remaining, 60)
-                st.markdown(f"""
-                    <div style='
-                        background: linear-gradient(135deg, #ff85c0 0%, #ffb6d9 100%);
-                        color: white;
-                        padding: 4rem 2rem;
-                        border-radius: 2rem;
-                        text-align: center;
-                        font-size: 4rem;
-                        font-weight: 700;
-                        margin: 2rem 0;
-                        border: 3px solid #ff69b4;
-                        box-shadow: 0 10px 30px rgba(255, 105, 180, 0.4);
-                    '>
-                        {mins:02d}:{secs:02d}
-                    </div>
-                """, unsafe_allow_html=True)
-
-                st.markdown("<br>", unsafe_allow_html=True)
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("⏸ Stop Timer", key="stop_timer", use_container_width=True):
-                        st.session_state["timer_paused_at"] = elapsed
-                        st.rerun()
-                with col2:
-                    if st.button("🏠 Go Home", key="cancel_timer", use_container_width=True):
-                        del st.session_state["calm_activity"]
-                        st.session_state["timer_start_time"] = None
-                        st.session_state["timer_paused_at"] = None
-                        st.session_state["child_page"] = "home"
-                        st.rerun()
-
-                # Auto-refresh every second
-                time_module.sleep(1)
-                st.rerun()
-
-            elif st.session_state.get("timer_paused_at"):
-                # Timer is paused
-                st.markdown("""
-                    <div style='text-align: center; margin-bottom: 2rem;'>
-                        <h2 style='color: #d5006d;'>⏸ Timer Stopped</h2>
-                        <p style='font-size: 1.4rem; color: #c2185b;'>Take your time!</p>
                     </div>
                 """, unsafe_allow_html=True)
 
-                mins, secs = divmod(remaining, 60)
-                st.markdown(f"""
-                    <div style='
-                        background: linear-gradient(135deg, #ffd4e5 0%, #ffe5f0 100%);
-                        color: #d5006d;
-                        padding: 4rem 2rem;
-                        border-radius: 2rem;
-                        text-align: center;
-                        font-size: 4rem;
-                        font-weight: 700;
-                        margin: 2rem 0;
-                        border: 3px solid #ffb6d9;
-                        box-shadow: 0 10px 30px rgba(255, 182, 193, 0.3);
-                    '>
-                        {mins:02d}:{secs:02d}
-                    </div>
-                """, unsafe_allow_html=True)
+                calm_timer(
+                    total_seconds,
+                    elapsed=elapsed,
+                    paused=st.session_state["timer_paused_at"] is not None,
+                    epoch=st.session_state["timer_epoch"],
+                )
 
                 st.markdown("<br>", unsafe_allow_html=True)
 
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("▶️ Resume Timer", key="resume_timer", use_container_width=True, type="primary"):
-                        # Resume by adjusting start time
-                        st.session_state["timer_start_time"] = time_module.time() - st.session_state["timer_paused_at"]
-                        st.session_state["timer_paused_at"] = None
-                        st.rerun()
-                with col2:
-                    if st.button("🏠 Go Home", key="cancel_paused_timer", use_container_width=True):
-                        del st.session_state["calm_activity"]
-                        st.session_state["timer_start_time"] = None
-                        st.session_state["timer_paused_at"] = None
-                        st.session_state["child_page"] = "home"
-                        st.rerun()
+                if st.button("🏠 Go Home", key="cancel_timer", use_container_width=True):
+                    del st.session_state["calm_activity"]
+                    st.session_state["timer_start_time"] = None
+                    st.session_state["timer_paused_at"] = None
+                    st.session_state["child_page"] = "home"
+                    st.rerun()
 
             else:
                 # Timer finished!
@@ -1435,7 +1552,9 @@ def show_ask_a_little_star():
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("✨ I need an idea"):
-            suggestion = generate_wonder_question_prompt()
+            suggestion = get_generation_service().take(current_session_id(), "wonder_idea")
+            if suggestion is None:
+                suggestion = generate_wonder_question_prompt()
             st.session_state["wonder_suggestion"] = suggestion
             st.rerun()
 
@@ -1591,6 +1710,8 @@ def show_secret_strengths():
                 </div>
             """, unsafe_allow_html=True)
 
+JOURNAL_PAGE_SIZE = 20
+
 def show_bunny_journal():
     """FEATURE 5: Bunny Journal"""
     child_name = profile.get("child_name", "Little Star")
@@ -1610,13 +1731,18 @@ def show_bunny_journal():
         if st.button("📖 Read Past Entries", use_container_width=True):
             st.session_state['journal_viewing_mode'] = True
             st.session_state['viewing_entry'] = None
+            st.session_state['journal_list'] = None
             st.rerun()
 
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Check if viewing a specific entry
     if st.session_state.get('viewing_entry'):
-        entry = st.session_state['viewing_entry']
+        # The list only holds titles; fetch the full text for this one entry
+        entry = db.get_journal_entry(st.session_state['viewing_entry'])
+        if not entry:
+            st.session_state['viewing_entry'] = None
+            st.rerun()
         entry_date = entry['created_at'].strftime('%B %d, %Y at %I:%M %p') if entry.get('created_at') else 'Unknown date'
 
         st.markdown(f"""
@@ -1643,6 +1769,7 @@ def show_bunny_journal():
                 if db.delete_journal_entry(entry['id']):
                     st.success("✅ Entry deleted!")
                     st.session_state['viewing_entry'] = None
+                    st.session_state['journal_list'] = None
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -1654,7 +1781,12 @@ def show_bunny_journal():
     # Check if in viewing mode (showing list of entries)
     if st.session_state.get('journal_viewing_mode'):
         if st.session_state.get('profile_id'):
-            past_entries = db.get_journal_entries(st.session_state['profile_id'], limit=50)
+            # Titles only, JOURNAL_PAGE_SIZE at a time; "Load more" continues from the last one
+            if st.session_state.get('journal_list') is None:
+                first_page = db.list_journal_entries(st.session_state['profile_id'], limit=JOURNAL_PAGE_SIZE)
+                st.session_state['journal_list'] = first_page
+                st.session_state['journal_has_more'] = len(first_page) == JOURNAL_PAGE_SIZE
+            past_entries = st.session_state['journal_list']
 
             if past_entries:
                 st.markdown("""
@@ -1686,15 +1818,27 @@ def show_bunny_journal():
                         """, unsafe_allow_html=True)
                     with col2:
                         if st.button("Read", key=f"read_entry_{entry['id']}", use_container_width=True):
-                            st.session_state['viewing_entry'] = entry
+                            st.session_state['viewing_entry'] = entry['id']
                             st.rerun()
                     with col3:
                         if st.button("🗑️", key=f"delete_entry_{entry['id']}", use_container_width=True, help="Delete this entry"):
                             if db.delete_journal_entry(entry['id']):
                                 st.success("Deleted!")
+                                st.session_state['journal_list'] = None
                                 import time
                                 time.sleep(0.8)
                                 st.rerun()
+
+                if st.session_state.get('journal_has_more'):
+                    if st.button("📚 Load more entries", use_container_width=True):
+                        next_page = db.list_journal_entries(
+                            st.session_state['profile_id'],
+                            limit=JOURNAL_PAGE_SIZE,
+                            before=db.page_cursor(past_entries)
+                        )
+                        st.session_state['journal_list'] = past_entries + next_page
+                        st.session_state['journal_has_more'] = len(next_page) == JOURNAL_PAGE_SIZE
+                        st.rerun()
             else:
                 st.info("📖 No journal entries yet. Start writing to see them here! ✨")
         else:
@@ -1760,8 +1904,9 @@ def show_bunny_journal():
 
             # Save to database if configured
             if st.session_state.get('profile_id'):
-                db.save_journal_entry(st.session_state['profile_id'], journal_text, title=journal_title)
-                db.track_activity(st.session_state['profile_id'], 'journal_entry')
+                db.queue_journal_entry(st.session_state['profile_id'], journal_text, title=journal_title)
+                db.queue_activity(st.session_state['profile_id'], 'journal_entry')
+                st.session_state['journal_list'] = None
                 st.success("✅ Journal entry saved!")
 
             # Clear the form by incrementing the key
@@ -1860,19 +2005,30 @@ def show_admin_mode():
 
     # Database connection status
     if st.session_state.get('db_connected'):
-        st.success("✅ Database connected - all data is being saved to Neon PostgreSQL")
+        st.success(f"✅ Database connected - all data is being saved to {db.get_backend().description}")
+        write_stats = db.get_write_queue().stats
+        st.caption(
+            f"Background saves: {write_stats['written']} written, {write_stats['retried']} retried, "
+            f"{write_stats['dropped']} dropped, {write_stats['failed']} failed"
+        )
+        if write_stats['held']:
+            st.warning(
+                f"⚠️ {write_stats['held']} saved stories, journal entries or strengths are waiting "
+                f"for the database and will be retried. Last error: {db.get_write_queue().last_error}"
+            )
     else:
         st.warning("⚠️ Database not connected - data will only persist in browser session")
 
     st.markdown("---")
 
     # Main navigation using tabs - all sections visible at once!
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "👤 Child Profile",
         "⚙️ Content Settings",
         "💝 Affirmations & Lessons",
         "⏰ Time & Limits",
-        "🔐 Safety & API"
+        "🔐 Safety & API",
+        "📈 Performance"
     ])
 
     with tab1:
@@ -1890,6 +2046,9 @@ def show_admin_mode():
     with tab5:
         show_admin_safety()
 
+    with tab6:
+        show_admin_performance()
+
 def show_admin_login():
     """Admin PIN authentication"""
     st.markdown("""
@@ -1926,6 +2085,9 @@ def show_admin_profile():
     st.markdown("### Customize the app for your child")
     st.markdown("")
 
+    if st.session_state.get('db_connected'):
+        show_admin_profile_picker()
+
     with st.form("profile_form"):
         name = st.text_input("Child's name / nickname", value=profile.get("child_name", "Little Star"))
         age = st.number_input("Age", min_value=3, max_value=12, value=profile.get("age", 7))
@@ -1936,25 +2098,79 @@ def show_admin_profile():
         interests = st.text_area("Interests", value=interests_str, help="These will be used to personalize stories and facts")
 
         if st.form_submit_button("💾 Save Profile", use_container_width=True):
-            profile["child_name"] = name
-            profile["age"] = age
-            profile["pronouns"] = pronouns
-            profile["interests"] = [i.strip() for i in interests.split(",") if i.strip()]
-            save_profile()
-            st.success("✅ Profile saved!")
+            updated = thaw(profile)
+            updated["child_name"] = name
+            updated["age"] = age
+            updated["pronouns"] = pronouns
+            updated["interests"] = [i.strip() for i in interests.split(",") if i.strip()]
+            if save_profile(updated):
+                st.success("✅ Profile saved!")
+                st.rerun()
+
+def show_admin_profile_picker():
+    """Admin: choose the child the settings tabs apply to, or add one"""
+    children = profiles.list_profiles()
+    if children:
+        ids = [child["id"] for child in children]
+        current = st.session_state.get('profile_id')
+        chosen = st.selectbox(
+            "Settings for",
+            ids,
+            index=ids.index(current) if current in ids else 0,
+            format_func=lambda profile_id: next(c["child_name"] for c in children if c["id"] == profile_id),
+            help="Each child has their own profile, story settings and time limits"
+        )
+        if chosen != current:
+            select_profile(chosen)
             st.rerun()
 
+    with st.expander("➕ Add a child"):
+        with st.form("new_profile_form", clear_on_submit=True):
+            name = st.text_input("Child's name / nickname")
+            age = st.number_input("Age", min_value=3, max_value=12, value=7)
+            pronouns = st.text_input("Pronouns", value="she/her")
+            interests = st.text_input("Special interests (comma-separated)", value="animals, stars")
+
+            if st.form_submit_button("Add child", use_container_width=True):
+                if not name.strip():
+                    st.error("Please enter a name")
+                else:
+                    profile_id = profiles.find_or_create(
+                        name.strip(),
+                        age=age,
+                        pronouns=pronouns,
+                        interests=[i.strip() for i in interests.split(",") if i.strip()]
+                    )
+                    if profile_id:
+                        select_profile(profile_id)
+                        st.rerun()
+
+    st.markdown("---")
+
+def show_profile_settings_note():
+    """Which child the per-child settings on this tab are saved for"""
+    if st.session_state.get('profile_id'):
+        st.caption(f"Story and time settings are saved for {profile.get('child_name', 'Little Star')}; "
+                   "the rest apply to every child. Choose another child in 👤 Child Profile.")
+
 def show_admin_content():
     """Admin: Content settings"""
     st.title("⚙️ Content Settings")
     st.markdown("Control what content is generated")
+    show_profile_settings_note()
 
     st.markdown("---")
 
     with st.form("content_form"):
         st.subheader("AI Story Settings")
 
-        use_ai = st.checkbox("Use AI to generate content", value=settings.get("use_ai", True))
+        content_source = st.radio(
+            "Where content comes from",
+            ["✨ AI (OpenAI)", "📦 Offline only (instant, free)"],
+            index=0 if settings.get("use_ai", True) else 1,
+            help="Offline only uses the built-in stories, facts and answers and never calls OpenAI"
+        )
+        use_ai = content_source.startswith("✨")
 
         max_length = st.select_slider(
             "Max story length",
@@ -1994,17 +2210,39 @@ def show_admin_content():
         filters_str = ", ".join(settings.get("custom_word_filters", []))
         custom_filters = st.text_area("Banned words", value=filters_str)
 
+        st.markdown("---")
+        st.subheader("Ready Stories")
+        st.caption("Stories made in the background so they appear instantly")
+
+        pool_size = st.number_input(
+            "Stories kept ready for each choice",
+            min_value=0,
+            max_value=5,
+            value=settings.get("story_pool_size", 2)
+        )
+
+        pool_budget = st.number_input(
+            "Background stories per day (uses API credit)",
+            min_value=0,
+            max_value=200,
+            value=settings.get("story_pool_daily_budget", 30),
+            step=10
+        )
+
         if st.form_submit_button("💾 Save Content Settings", use_container_width=True):
-            settings["use_ai"] = use_ai
-            settings["max_story_length"] = max_length
-            settings["reading_level"] = reading_level
-            settings["banned_topics"] = {
+            updated = thaw(settings)
+            updated["use_ai"] = use_ai
+            updated["max_story_length"] = max_length
+            updated["reading_level"] = reading_level
+            updated["banned_topics"] = {
                 "death_illness": ban_death,
                 "violence": ban_violence,
                 "scary_monsters": ban_scary
             }
-            settings["custom_word_filters"] = [f.strip() for f in custom_filters.split(",") if f.strip()]
-            save_settings()
+            updated["custom_word_filters"] = [f.strip() for f in custom_filters.split(",") if f.strip()]
+            updated["story_pool_size"] = pool_size
+            updated["story_pool_daily_budget"] = pool_budget
+            save_settings(updated)
             st.success("✅ Content settings saved!")
             st.rerun()
 
@@ -2035,18 +2273,18 @@ def show_admin_affirmations():
                         st.text(aff)
                     with col2:
                         if st.button("🗑", key=f"del_aff_{feeling_key}_{i}"):
-                            affirmations[feeling_key].remove(aff)
-                            save_affirmations()
+                            updated = thaw(affirmations)
+                            updated[feeling_key].remove(aff)
+                            save_affirmations(updated)
                             st.rerun()
 
                 # Add new
                 new_aff = st.text_input(f"Add new affirmation for {feeling_name}", key=f"new_{feeling_key}")
                 if st.button(f"➕ Add", key=f"add_{feeling_key}"):
                     if new_aff:
-                        if feeling_key not in affirmations:
-                            affirmations[feeling_key] = []
-                        affirmations[feeling_key].append(new_aff)
-                        save_affirmations()
+                        updated = thaw(affirmations)
+                        updated.setdefault(feeling_key, []).append(new_aff)
+                        save_affirmations(updated)
                         st.success(f"Added!")
                         st.rerun()
 
@@ -2062,8 +2300,7 @@ def show_admin_affirmations():
                 st.markdown(lesson['content'])
 
                 if st.button("🗑 Delete this lesson", key=f"del_lesson_{lesson['id']}"):
-                    lessons.remove(lesson)
-                    save_lessons()
+                    save_lessons([l for l in thaw(lessons) if l != thaw(lesson)])
                     st.rerun()
 
         st.markdown("---")
@@ -2087,24 +2324,55 @@ def show_admin_affirmations():
                         "content": new_content,
                         "tags": [t.strip() for t in new_tags.split(",") if t.strip()]
                     }
-                    lessons.append(new_lesson)
-                    save_lessons()
+                    save_lessons(thaw(lessons) + [new_lesson])
                     st.success("✅ Lesson added!")
                     st.rerun()
 
+TREND_DAYS = 14
+
 def show_admin_time():
     """Admin: Time and usage limits"""
     st.title("⏰ Time & Limits")
     st.markdown("Set healthy boundaries for app usage")
+    show_profile_settings_note()
 
     st.markdown("---")
 
     # Show today's usage
     today_usage = get_today_usage()
-    st.metric("Today's Usage", f"{today_usage} minutes")
+    api_usage = get_usage_governor().today(usage_profile())
+    limits = UsageLimits.from_settings(settings)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Today's Usage", f"{today_usage} minutes")
+    with col2:
+        st.metric("Today's AI Usage", f"${api_usage['cost']:.3f}",
+                  help="Estimated OpenAI spend today, from the token counts the API reports")
+        st.caption(
+            f"{api_usage['tokens']:,} of {limits.daily_tokens:,} tokens, "
+            f"{api_usage['requests']} requests"
+            + (f", {api_usage['refused']} held back by limits" if api_usage['refused'] else "")
+        )
 
     st.markdown("---")
 
+    # Activity trends from the per-day usage buckets
+    if st.session_state.get('profile_id'):
+        st.subheader("Activity Trends")
+        daily = db.get_daily_activity(st.session_state['profile_id'], days=TREND_DAYS)
+        if daily:
+            trends = pd.DataFrame(daily)
+            # feeling_happy, feeling_sad, ... all count as "feeling"
+            trends["activity"] = trends["activity_type"].str.split("_").str[0]
+            trends = trends.pivot_table(index="activity_date", columns="activity",
+                                        values="activity_count", aggfunc="sum", fill_value=0)
+            st.bar_chart(trends)
+            st.caption(f"Stories, feelings and journal entries over the last {TREND_DAYS} days")
+        else:
+            st.caption("No activity recorded yet")
+
+        st.markdown("---")
+
     with st.form("time_form"):
         st.subheader("Daily Limits")
 
@@ -2143,22 +2411,20 @@ def show_admin_time():
             )
 
         if st.form_submit_button("💾 Save Time Settings", use_container_width=True):
-            settings["daily_limit_minutes"] = daily_limit
-            settings["session_length_minutes"] = session_length
-            settings["quiet_hours_start"] = quiet_start.strftime("%H:%M")
-            settings["quiet_hours_end"] = quiet_end.strftime("%H:%M")
-            save_settings()
+            updated = thaw(settings)
+            updated["daily_limit_minutes"] = daily_limit
+            updated["session_length_minutes"] = session_length
+            updated["quiet_hours_start"] = quiet_start.strftime("%H:%M")
+            updated["quiet_hours_end"] = quiet_end.strftime("%H:%M")
+            save_settings(updated)
             st.success("✅ Time settings saved!")
             st.rerun()
 
     st.markdown("---")
 
     if st.button("🔄 Reset Today's Usage Counter", type="secondary"):
-        usage = load_json(USAGE_FILE, {})
         today = datetime.now().strftime("%Y-%m-%d")
-        if today in usage:
-            del usage[today]
-        save_json(USAGE_FILE, usage)
+        config.update("usage", USAGE_FILE, {}, lambda usage: usage.pop(today, None))
         st.success("✅ Usage counter reset!")
         st.rerun()
 
@@ -2213,49 +2479,235 @@ def show_admin_safety():
             step=100
         )
 
+        st.markdown("---")
+        st.subheader("AI Usage Limits")
+        st.caption("When a limit is reached, Little Star Rabbit uses saved or backup content instead of asking OpenAI")
+
+        limits = UsageLimits.from_settings(settings)
+        col1, col2 = st.columns(2)
+        with col1:
+            requests_per_minute = st.number_input(
+                "Requests per minute (each feature)",
+                min_value=1,
+                max_value=60,
+                value=int(limits.requests_per_minute),
+                step=1
+            )
+            daily_tokens = st.number_input(
+                "Daily token budget",
+                min_value=1000,
+                max_value=2_000_000,
+                value=limits.daily_tokens,
+                step=10_000
+            )
+        with col2:
+            burst = st.number_input(
+                "Quick presses allowed in a row",
+                min_value=1,
+                max_value=50,
+                value=limits.burst,
+                step=1
+            )
+            daily_cost = st.number_input(
+                "Daily spend budget (USD)",
+                min_value=0.01,
+                max_value=20.0,
+                value=limits.daily_cost_usd,
+                step=0.10,
+                format="%.2f"
+            )
+
         if st.form_submit_button("💾 Save Settings", use_container_width=True):
+            updated = thaw(settings)
+
             # Update PIN if provided
             if new_pin:
                 if new_pin == confirm_pin:
-                    settings["admin_pin"] = new_pin
+                    updated["admin_pin"] = new_pin
                     st.success("✅ PIN updated!")
                 else:
                     st.error("❌ PINs don't match!")
                     st.stop()
 
             # Update API settings (but not API key)
-            settings["model"] = model
-            settings["temperature"] = temperature
-            settings["max_tokens"] = max_tokens
+            updated["model"] = model
+            updated["temperature"] = temperature
+            updated["max_tokens"] = max_tokens
+            updated["rate_limits"] = {
+                "requests_per_minute": requests_per_minute,
+                "burst": burst,
+                "daily_tokens": daily_tokens,
+                "daily_cost_usd": daily_cost
+            }
 
-            save_settings()
+            save_settings(updated)
             st.success("✅ Settings saved!")
             st.rerun()
 
+    st.markdown("---")
+    st.subheader("Response Cache")
+    st.caption("Stories, facts and lessons are reused for a while instead of asking OpenAI again")
+
+    cache_stats = get_response_cache().stats()
+    if cache_stats:
+        for feature, counts in sorted(cache_stats.items()):
+            st.markdown(
+                f"**{feature.replace('_', ' ').title()}:** {counts['hits']} hits, "
+                f"{counts['misses']} misses ({counts['hit_rate']:.0%} hit rate)"
+            )
+    else:
+        st.caption("Nothing has been generated yet.")
+
+    if st.button("🧹 Clear response cache", type="secondary"):
+        get_response_cache().clear()
+        st.success("✅ Response cache cleared!")
+
+    st.markdown("---")
+    st.subheader("OpenAI Connection")
+    st.caption("Busy or failing requests are retried; if OpenAI keeps failing, Little Star Rabbit pauses asking for a short while")
+
+    resilience = get_resilience()
+    api_stats = resilience.stats
+    for endpoint, state in resilience.breaker_states().items():
+        if state == "closed":
+            st.markdown(f"**{endpoint.title()}:** ✅ working")
+        else:
+            st.markdown(f"**{endpoint.title()}:** ⏸️ paused after repeated failures (using backup content)")
+    st.caption(
+        f"{api_stats['calls']} requests, {api_stats['retries']} retried, "
+        f"{api_stats['failures']} failed, {api_stats['breaker_trips']} pauses, "
+        f"{api_stats['short_circuits']} skipped while paused, "
+        f"{api_stats['fallbacks']} backup answers shown"
+    )
+
     st.markdown("---")
     st.info("""
         **Security Note:** For security, API keys should be set as environment variables,
         not stored in config files. On Streamlit Cloud, use the Secrets management feature.
     """)
 
+def cache_hit_rates():
+    """Hit rate per cache, as (hits, lookups)"""
+    rates = {}
+    for feature, counts in get_response_cache().stats().items():
+        rates[f"Responses: {feature}"] = (counts["hits"], counts["hits"] + counts["misses"])
+    audio_stats = get_audio_cache().stats
+    rates["Read-aloud audio"] = (audio_stats["hits"], audio_stats["hits"] + audio_stats["misses"])
+    config_stats = config.stats
+    rates["Settings files"] = (config_stats["hits"], config_stats["hits"] + config_stats["loads"])
+    profile_stats = profiles.stats
+    rates["Child profiles"] = (profile_stats["hits"], profile_stats["hits"] + profile_stats["misses"])
+    pool_stats = get_story_pool().stats
+    rates["Ready stories"] = (pool_stats["served"], pool_stats["served"] + pool_stats["empty"])
+    return rates
+
+def metrics_gauges():
+    """Cache and API figures added to the Prometheus export"""
+    return {
+        "cache_hits": {name: hits for name, (hits, _) in cache_hit_rates().items()},
+        "cache_lookups": {name: lookups for name, (_, lookups) in cache_hit_rates().items()},
+        "openai_breaker_open": {name: int(state != "closed")
+                                for name, state in get_resilience().breaker_states().items()},
+    }
+
+def show_admin_performance():
+    """Admin: Where rerun time goes"""
+    st.title("📈 Performance")
+    st.markdown("How long each part of the app takes, measured as it runs")
+
+    st.markdown("---")
+    st.subheader("Timings")
+    tracer = get_tracer()
+    summary = tracer.summary()
+    if summary:
+        rows = [
+            {
+                "Step": name,
+                "Calls": stats["count"],
+                "p50 (ms)": round(stats["p50"] * 1000, 1),
+                "p95 (ms)": round(stats["p95"] * 1000, 1),
+                "Max (ms)": round(stats["max"] * 1000, 1),
+                "Errors": stats["errors"],
+            }
+            for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total"])
+        ]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        st.caption("p50/p95 over the most recent calls of each step; slowest in total first")
+    else:
+        st.caption("Nothing measured yet.")
+
+    st.subheader("Recent Reruns")
+    for trace in tracer.recent_traces(5):
+        started = datetime.fromtimestamp(trace.started_at).strftime("%H:%M:%S")
+        with st.expander(f"{started} · {trace.duration * 1000:.0f} ms · {len(trace.spans)} steps"):
+            for item in sorted(trace.spans, key=lambda item: item.start):
+                indent = "&nbsp;" * 4 * item.depth
+                st.markdown(f"{indent}`{item.name}` {item.duration * 1000:.1f} ms"
+                            + (" ⚠️" if item.error else ""), unsafe_allow_html=True)
+
+    st.markdown("---")
+    st.subheader("Cache Hit Rates")
+    for name, (hits, lookups) in cache_hit_rates().items():
+        if lookups:
+            st.markdown(f"**{name}:** {hits / lookups:.0%} ({hits} of {lookups})")
+        else:
+            st.markdown(f"**{name}:** not used yet")
+
+    st.markdown("---")
+    st.subheader("OpenAI Usage")
+    counters = tracer.counters
+    api_usage = get_usage_governor().today(usage_profile())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Prompt tokens", f"{counters.get('openai_prompt_tokens', 0):,}")
+    with col2:
+        st.metric("Reply tokens", f"{counters.get('openai_completion_tokens', 0):,}")
+    with col3:
+        st.metric("Read-aloud characters", f"{counters.get('tts_characters', 0):,}")
+    st.caption(f"Since the app started. Today for this profile: {api_usage['tokens']:,} tokens, "
+               f"{api_usage['requests']} requests")
+
+    st.markdown("---")
+    st.subheader("Prometheus Export")
+    metrics_export = st.checkbox(
+        f"Write metrics to {METRICS_EXPORT_FILE} (Prometheus text format)",
+        value=settings.get("metrics_export", False),
+        help="Rewritten every few seconds while the app is in use, for a node exporter textfile collector"
+    )
+    if metrics_export != settings.get("metrics_export", False):
+        updated = thaw(settings)
+        updated["metrics_export"] = metrics_export
+        save_settings(updated)
+        st.rerun()
+
 # ============================================================================
 # MAIN APP
 # ============================================================================
 
 def main():
     """Main app controller"""
-    init_session_state()
-
-    # Inject custom CSS for beautiful starry theme
-    inject_css()
-
-    # Route to appropriate mode
-    if st.session_state["mode"] == "landing":
-        show_landing()
-    elif st.session_state["mode"] == "child":
-        show_child_mode()
-    elif st.session_state["mode"] == "admin":
-        show_admin_mode()
+    try:
+        init_session_state()
+
+        # Inject custom CSS for beautiful starry theme
+        with span("inject_css"):
+            inject_css()
+
+        # Route to appropriate mode
+        page = st.session_state["mode"]
+        if page == "child":
+            page += "." + st.session_state.get("child_page", "home")
+        with span(f"page.{page}"):
+            if st.session_state["mode"] == "landing":
+                show_landing()
+            elif st.session_state["mode"] == "child":
+                show_child_mode()
+            elif st.session_state["mode"] == "admin":
+                show_admin_mode()
+    finally:
+        get_tracer().end_trace(rerun_trace)
+        if settings.get("metrics_export"):
+            get_tracer().export_prometheus(METRICS_EXPORT_FILE, metrics_gauges())
 
 if __name__ == "__main__":
     main()
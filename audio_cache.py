@@ -0,0 +1,125 @@
+"""
+Content-addressed cache for read-aloud audio
+Clips live under data/audio/ named by a hash of the text, voice, model and speed
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+AUDIO_CACHE_DIR = Path("data/audio")
+AUDIO_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+def audio_cache_key(text: str, voice: str, model: str, speed: float) -> str:
+    """Hash of everything that changes the synthesized audio"""
+    payload = json.dumps(
+        {"text": text, "voice": voice, "model": model, "speed": round(float(speed), 2)},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class AudioCache:
+    """
+    On-disk MP3 store with a size cap and least-recently-played eviction
+
+    Files are written to a temp file and renamed into place, so a crash or a
+    second process never leaves a half-written clip behind.
+    """
+
+    def __init__(self, root: Path = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._sizes = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.mp3"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached audio bytes, or None"""
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["hits"] += 1
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+            else:
+                self._sizes[key] = len(data)
+                self._total_bytes += len(data)
+        try:
+            os.utime(path)  # mtime doubles as last-played time across restarts
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store audio atomically and evict old clips beyond the size cap"""
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._forget(key)
+            self._sizes[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+        return path
+
+    def _forget(self, key: str):
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._sizes) > 1:
+            key, size = self._sizes.popitem(last=False)
+            self._total_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _scan(self):
+        """Rebuild the LRU order from what is already on disk"""
+        clips = []
+        for path in self.root.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            clips.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(clips):
+            self._sizes[key] = size
+            self._total_bytes += size
+        self._evict()
@@ -0,0 +1,290 @@
+"""
+Benchmark: rerun latency, time-to-first-token, TTS and database calls per child page
+
+Runs app.py headless with Streamlit's AppTest against the fake OpenAI server
+(benchmarks/fake_openai.py) and a throwaway data folder, so the default
+SQLite database is the stand-in; --dsn uses a Postgres database instead.
+Each iteration is a fresh session that opens a page and does what a child
+would there (tell a story and read it aloud, show facts, pick a feeling,
+write in the journal, start the calm timer). The app's own tracing spans
+(tracing.py) give the per-rerun breakdown.
+
+Results are written as JSON so two commits can be compared:
+
+    python benchmarks/bench_child_pages.py --iterations 5 --output before.json
+    git checkout <other commit>
+    python benchmarks/bench_child_pages.py --iterations 5 --compare before.json
+
+Response and audio caches start cold every iteration (the fake replies are
+all different); --warm-cache keeps them, to measure repeat visits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from fake_openai import FakeOpenAIServer, add_behaviour_arguments, behaviour_from_args
+
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+# No rate limits or budget in the way of the benchmark; nothing pre-generated
+BENCH_SETTINGS = {
+    "story_pool_size": 0,
+    "rate_limits": {"requests_per_minute": 100000, "burst": 100000,
+                    "daily_tokens": 10 ** 9, "daily_cost_usd": 10 ** 6},
+}
+
+def button(at, label=None, key=None):
+    if key is not None:
+        return at.button(key=key)
+    for candidate in at.button:
+        if label in candidate.label:
+            return candidate
+    raise LookupError(f"No button labelled {label!r}")
+
+# Page scenarios: (child_page, steps). A step is (name, action on the AppTest)
+def story_steps():
+    return [
+        ("tell_story", lambda at: button(at, "Tell me a story").click().run()),
+        ("read_aloud", lambda at: button(at, key="tts_current_story").click().run()),
+    ]
+
+def facts_steps():
+    return [
+        ("show_facts", lambda at: button(at, "Show me facts").click().run()),
+        ("read_aloud", lambda at: button(at, key="tts_star_facts").click().run()),
+    ]
+
+def feelings_steps():
+    return [
+        ("pick_feeling", lambda at: button(at, key="feeling_worried").click().run()),
+    ]
+
+def journal_steps():
+    def write(at):
+        at.text_area(key="journal_text_0").input("Today I saw a rainbow.")
+        return button(at, "Share with the bunny").click().run()
+    return [
+        ("share_entry", write),
+        ("read_past_entries", lambda at: button(at, "Read Past Entries").click().run()),
+    ]
+
+def calm_steps():
+    return [
+        ("open_timer", lambda at: button(at, "Calm Timer").click().run()),
+        ("start_timer", lambda at: button(at, key="start_timer").click().run()),
+    ]
+
+PAGES = {
+    "storytime": ("storytime", story_steps),
+    "star_facts": ("facts", facts_steps),
+    "feelings": ("feelings", feelings_steps),
+    "bunny_journal": ("journal", journal_steps),
+    "calm_timer": ("calm", calm_steps),
+}
+
+def summarize(values):
+    """p50/p95/p99/mean/max in milliseconds"""
+    if not values:
+        return None
+    values = sorted(v * 1000 for v in values)
+
+    def rank(percent):
+        return values[min(len(values) - 1, max(0, -(-len(values) * percent // 100) - 1))]
+
+    return {"p50": round(statistics.median(values), 2), "p95": round(rank(95), 2),
+            "p99": round(rank(99), 2), "mean": round(statistics.fmean(values), 2),
+            "max": round(values[-1], 2), "samples": len(values)}
+
+def prepare_data_folder(overrides):
+    """
+    Create the app's data folder in the working directory
+
+    Runs one untimed session (imports, migrations and pools aren't per-page
+    costs), then saves the default settings it loaded with overrides applied.
+    """
+    from streamlit.testing.v1 import AppTest
+    from config_store import get_config_store, thaw
+
+    AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=120).run()
+    store = get_config_store()
+    settings = thaw(store.load("settings", Path("data/settings.json"), {}))
+    store.save("settings", {**settings, **overrides})
+    store.flush()
+
+class Collector:
+    """Reruns traced by the app since the last call, and what happened in them"""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.seen = set()
+
+    def new_traces(self):
+        traces = [t for t in self.tracer.recent_traces(self.tracer.traces.maxlen)
+                  if id(t) not in self.seen]
+        self.seen.update(id(t) for t in traces)
+        return traces
+
+def db_calls(trace):
+    """Database functions that ran in a rerun (the schema check is free after the first)"""
+    return [s for s in trace.spans if s.name.startswith("db.")
+            and s.name not in ("db.checkout", "db.init_database")]
+
+def run_page(AppTest, collector, child_page, steps, iterations, warm_cache, clear_caches):
+    samples = {"open_ms": [], "rerun_ms": [], "ttft_ms": [], "tts_first_chunk_ms": [],
+               "db_calls_per_rerun": [], "db_ms_per_rerun": []}
+    step_samples = {}
+    errors = []
+
+    for _ in range(iterations):
+        if not warm_cache:
+            clear_caches()
+        at = AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=120)
+        at.session_state["mode"] = "child"
+        at.session_state["child_page"] = child_page
+        collector.new_traces()
+
+        started = time.perf_counter()
+        at.run()
+        samples["open_ms"].append(time.perf_counter() - started)
+
+        for name, action in steps():
+            started = time.perf_counter()
+            try:
+                at = action(at)
+            except LookupError as e:
+                errors.append(f"{name}: {e}")
+                break
+            step_samples.setdefault(name, []).append(time.perf_counter() - started)
+        errors.extend(f"{child_page}: {e.value}" for e in at.exception)
+
+        for trace in collector.new_traces():
+            samples["rerun_ms"].append(trace.duration)
+            calls = db_calls(trace)
+            samples["db_calls_per_rerun"].append(len(calls))
+            samples["db_ms_per_rerun"].append(sum(s.duration for s in calls))
+            for span in trace.spans:
+                if span.name == "openai.first_token":
+                    samples["ttft_ms"].append(span.duration)
+                elif span.name == "tts.first_chunk":
+                    samples["tts_first_chunk_ms"].append(span.duration)
+
+    result = {
+        "open_ms": summarize(samples["open_ms"]),
+        "rerun_ms": summarize(samples["rerun_ms"]),
+        "ttft_ms": summarize(samples["ttft_ms"]),
+        "tts_first_chunk_ms": summarize(samples["tts_first_chunk_ms"]),
+        "db_calls_per_rerun": round(statistics.fmean(samples["db_calls_per_rerun"]), 2)
+        if samples["db_calls_per_rerun"] else 0,
+        "db_ms_per_rerun": round(statistics.fmean(samples["db_ms_per_rerun"]) * 1000, 3)
+        if samples["db_ms_per_rerun"] else 0,
+        "steps_ms": {name: summarize(values) for name, values in step_samples.items()},
+    }
+    if errors:
+        result["errors"] = sorted(set(errors))
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(current, baseline_path):
+    """Print p50s side by side with a saved run"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\ncompared with {baseline_path} ({baseline['meta']['commit']}):")
+    for page, metrics in current["pages"].items():
+        before = baseline["pages"].get(page)
+        if not before:
+            continue
+        rows = [(f"{name} p50", metrics[name], before.get(name))
+                for name in ("open_ms", "rerun_ms", "ttft_ms", "tts_first_chunk_ms")]
+        rows += [(f"{step} p50", stats, before.get("steps_ms", {}).get(step))
+                 for step, stats in metrics["steps_ms"].items()]
+        for label, now, then in rows:
+            if not now or not then:
+                continue
+            change = (now["p50"] - then["p50"]) / then["p50"] * 100 if then["p50"] else 0.0
+            print(f"  {page:14} {label:22} {then['p50']:9.1f} -> {now['p50']:9.1f} ms  ({change:+.0f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=5, help="fresh sessions per page")
+    parser.add_argument("--pages", nargs="+", choices=sorted(PAGES), default=list(PAGES))
+    parser.add_argument("--dsn", help="Postgres URL to use instead of the SQLite stand-in")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="keep response and audio caches between iterations")
+    parser.add_argument("--output", help="results file (default benchmarks/results/child_pages-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    behaviour = behaviour_from_args(args)
+    output = Path(args.output or RESULTS_DIR / f"child_pages-{git_commit()}.json").resolve()
+    baseline = Path(args.compare).resolve() if args.compare else None
+
+    with tempfile.TemporaryDirectory() as workdir, FakeOpenAIServer(**behaviour) as server:
+        if args.dsn:
+            from bench_db_pool import write_secrets
+            write_secrets(workdir, args.dsn)
+        os.chdir(workdir)
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+
+        from streamlit.testing.v1 import AppTest
+        from gpt_utils import get_response_cache
+        from tracing import get_tracer
+
+        def clear_caches():
+            get_response_cache().clear()
+
+        collector = Collector(get_tracer())
+        prepare_data_folder(BENCH_SETTINGS)
+
+        pages = {}
+        for page in args.pages:
+            child_page, steps = PAGES[page]
+            pages[page] = run_page(AppTest, collector, child_page, steps, args.iterations,
+                                   args.warm_cache, clear_caches)
+            print(f"{page:14} rerun p50 {pages[page]['rerun_ms']['p50']:8.1f} ms"
+                  + "".join(f", {step} p50 {stats['p50']:.0f} ms"
+                            for step, stats in pages[page]["steps_ms"].items() if stats))
+        api_requests = server.stats
+
+    import streamlit
+    results = {
+        "meta": {
+            "benchmark": "child_pages",
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "database": "postgres" if args.dsn else "sqlite",
+            "iterations": args.iterations,
+            "warm_cache": args.warm_cache,
+            "fake_openai": behaviour,
+            "api_requests": api_requests,
+        },
+        "pages": pages,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nresults written to {output}")
+    if baseline:
+        compare(results, baseline)
+
+if __name__ == "__main__":
+    main()
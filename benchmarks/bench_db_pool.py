@@ -0,0 +1,101 @@
+"""
+Benchmark: database handshakes per rerun, connect-per-call vs pooled
+
+One "story click" rerun does save_story + track_activity. Before pooling each
+call opened (and TLS-negotiated) its own connection; with the pool the same
+rerun reuses a warm connection.
+
+Run against a local Postgres:
+
+    BENCH_DATABASE_URL=postgresql://postgres@localhost/postgres \\
+        python benchmarks/bench_db_pool.py --reruns 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+STORY_SQL = """
+    INSERT INTO story_history (profile_id, story_text, story_length, story_topic, story_mood)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+ACTIVITY_SQL = """
+    INSERT INTO usage_tracking (profile_id, activity_type, activity_count, last_activity)
+    VALUES (%s, %s, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (profile_id, activity_type)
+    DO UPDATE SET
+        activity_count = usage_tracking.activity_count + 1,
+        last_activity = CURRENT_TIMESTAMP
+"""
+
+def write_secrets(workdir, dsn):
+    """Point st.secrets at the benchmark database (read from ./.streamlit)"""
+    secrets_dir = Path(workdir) / ".streamlit"
+    secrets_dir.mkdir()
+    (secrets_dir / "secrets.toml").write_text(f'[database]\nurl = "{dsn}"\n')
+
+def run_connect_per_call(dsn, profile_id, reruns):
+    """The old behaviour: psycopg2.connect() for every database call"""
+    handshakes = 0
+    started = time.perf_counter()
+    for i in range(reruns):
+        for sql, params in (
+            (STORY_SQL, (profile_id, f"bench story {i}", "short", "space", "calm")),
+            (ACTIVITY_SQL, (profile_id, "story_generated")),
+        ):
+            conn = psycopg2.connect(dsn, cursor_factory=RealDictCursor)
+            handshakes += 1
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            conn.commit()
+            cur.close()
+            conn.close()
+    return handshakes, time.perf_counter() - started
+
+def run_pooled(db, profile_id, reruns):
+    """The real database.py functions, going through the shared pool"""
+    pool = db.get_backend()
+    opened_before = pool.connections_opened
+    started = time.perf_counter()
+    for i in range(reruns):
+        db.save_story(profile_id, f"bench story {i}", "short", "space", "calm")
+        db.track_activity(profile_id, "story_generated")
+    return pool.connections_opened - opened_before, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dsn", default=os.environ.get(
+        "BENCH_DATABASE_URL", "postgresql://postgres@localhost/postgres"))
+    parser.add_argument("--reruns", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_secrets(workdir, args.dsn)
+        os.chdir(workdir)
+
+        import database as db
+
+        if not db.init_database():
+            sys.exit("Could not initialise the benchmark database")
+        profile_id = db.create_or_get_profile("Benchmark Bunny", age=7)
+
+        before, before_secs = run_connect_per_call(args.dsn, profile_id, args.reruns)
+        after, after_secs = run_pooled(db, profile_id, args.reruns)
+
+    print(f"reruns:                       {args.reruns}")
+    print(f"connect-per-call handshakes:  {before} ({before / args.reruns:.2f}/rerun), "
+          f"{before_secs * 1000 / args.reruns:.2f} ms/rerun")
+    print(f"pooled handshakes:            {after} ({after / args.reruns:.2f}/rerun), "
+          f"{after_secs * 1000 / args.reruns:.2f} ms/rerun")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: usage tracking, one upsert per event vs batched track_activities
+
+Per-event is the old track_activity extended to the current schema: a
+pooled connection, an INSERT ... ON CONFLICT DO UPDATE into usage_tracking
+and another into usage_daily, and a commit for every event. Batched sends
+the same events through track_activities() in groups, which aggregates them
+and writes the same two tables with one multi-row upsert each. Both sides
+run against the same database and must leave the same counts behind.
+
+Run against a local Postgres:
+
+    BENCH_DATABASE_URL=postgresql://postgres@localhost/postgres \\
+        python benchmarks/bench_usage_tracking.py --events 2000 --batch 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench_db_pool import ACTIVITY_SQL, write_secrets
+
+DAILY_SQL = """
+    INSERT INTO usage_daily (profile_id, activity_date, activity_type, activity_count)
+    VALUES (%s, CURRENT_DATE, %s, 1)
+    ON CONFLICT (profile_id, activity_date, activity_type)
+    DO UPDATE SET activity_count = usage_daily.activity_count + 1
+"""
+
+ACTIVITY_TYPES = ["story_generated", "journal_entry", "feeling_happy", "feeling_worried",
+                  "feeling_sad", "wonder_question"]
+
+def make_events(count, seed=3):
+    rng = random.Random(seed)
+    return [rng.choice(ACTIVITY_TYPES) for _ in range(count)]
+
+def run_per_event(db, profile_id, events):
+    started = time.perf_counter()
+    for activity_type in events:
+        conn = db.get_db_connection()
+        cur = conn.cursor()
+        cur.execute(ACTIVITY_SQL, (profile_id, activity_type))
+        cur.execute(DAILY_SQL, (profile_id, activity_type))
+        conn.commit()
+        cur.close()
+        db.release_db_connection(conn)
+    return time.perf_counter() - started
+
+def run_batched(db, profile_id, events, batch):
+    started = time.perf_counter()
+    for i in range(0, len(events), batch):
+        if not db.track_activities(profile_id, events[i:i + batch]):
+            sys.exit("track_activities failed")
+    return time.perf_counter() - started
+
+def table_counts(db, profile_id):
+    """Total activity_count in each table the two paths write"""
+    conn = db.get_db_connection()
+    cur = conn.cursor()
+    counts = {}
+    for table in ("usage_tracking", "usage_daily"):
+        cur.execute(f"SELECT COALESCE(SUM(activity_count), 0) AS total FROM {table} "
+                    "WHERE profile_id = %s", (profile_id,))
+        counts[table] = int(cur.fetchone()["total"])
+    cur.close()
+    db.release_db_connection(conn)
+    return counts
+
+def added(before, after):
+    return {table: after[table] - before[table] for table in after}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dsn", default=os.environ.get(
+        "BENCH_DATABASE_URL", "postgresql://postgres@localhost/postgres"))
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=50, help="events per track_activities call")
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    with tempfile.TemporaryDirectory() as workdir:
+        write_secrets(workdir, args.dsn)
+        os.chdir(workdir)
+
+        import database as db
+
+        if not db.init_database():
+            sys.exit("Could not initialise the benchmark database")
+        profile_id = db.create_or_get_profile("Benchmark Bunny", age=7)
+
+        # Warm the pool so neither side pays for the first handshake
+        db.track_activity(profile_id, "warm_up")
+
+        start = table_counts(db, profile_id)
+        per_event = run_per_event(db, profile_id, events)
+        middle = table_counts(db, profile_id)
+        batched = run_batched(db, profile_id, events, args.batch)
+        end = table_counts(db, profile_id)
+
+    if added(start, middle) != added(middle, end):
+        sys.exit(f"The two paths wrote different rows: {added(start, middle)} vs {added(middle, end)}")
+
+    print(f"events:                 {args.events} (batches of {args.batch})")
+    print(f"per-event upserts:      {per_event * 1000:8.1f} ms  "
+          f"({args.events / per_event:,.0f} events/s)")
+    print(f"batched upserts:        {batched * 1000:8.1f} ms  "
+          f"({args.events / batched:,.0f} events/s)")
+    print(f"speed-up:               {per_event / batched:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: banned-word filtering with 1k+ filter terms
+
+Compares the old per-word substring scan with the compiled Aho-Corasick
+matcher, both on a finished story and on a story streamed token by token
+(where the old approach has to rescan the whole text for every chunk).
+
+    python benchmarks/bench_word_filter.py --terms 1000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from word_filter import BannedWordMatcher
+
+STORY_WORDS = (
+    "once upon a time a little bunny hopped across the meadow to find a shining "
+    "star that had fallen softly into the clover and the bunny smiled because "
+    "the star was warm and kind and wanted to go home to the sky"
+).split()
+
+def make_terms(count, seed=7):
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < count:
+        terms.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return sorted(terms)
+
+def make_story(words, seed=11):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(STORY_WORDS) for _ in range(words))
+
+def naive_find(terms, text):
+    """The old check: lower() the text and substring-search once per term"""
+    lowered = text.lower()
+    for term in terms:
+        if term.lower() in lowered:
+            return term
+    return None
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--terms", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=700, help="story length in words")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    terms = make_terms(args.terms)
+    story = make_story(args.words)
+    chunks = [word + " " for word in story.split()]  # roughly one chunk per token
+
+    started = time.perf_counter()
+    matcher = BannedWordMatcher(terms)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    def naive_stream():
+        text = ""
+        for chunk in chunks:
+            text += chunk
+            naive_find(terms, text)
+
+    def matcher_stream():
+        scanner = matcher.scanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+        scanner.finish()
+
+    assert naive_find(terms, story) is None and matcher.find(story) is None
+
+    print(f"{args.terms} terms, {args.words}-word story ({len(story)} chars, {len(chunks)} chunks)")
+    print(f"  build automaton:          {build_ms:8.2f} ms (once per filter change)")
+    print(f"  whole text, naive:        {timed(lambda: naive_find(terms, story), args.repeat):8.2f} ms")
+    print(f"  whole text, automaton:    {timed(lambda: matcher.find(story), args.repeat):8.2f} ms")
+    print(f"  streamed, naive rescan:   {timed(naive_stream, args.repeat):8.2f} ms")
+    print(f"  streamed, incremental:    {timed(matcher_stream, args.repeat):8.2f} ms")
+
+if __name__ == "__main__":
+    main()
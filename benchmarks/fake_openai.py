@@ -0,0 +1,277 @@
+"""
+Fake OpenAI server for benchmarks: chat (plain and streaming) and speech
+
+Answers /v1/chat/completions and /v1/audio/speech with replies shaped like
+the real ones, so the app's parsers are exercised. Latency, streaming token
+rate, speech latency and injected errors are configurable. Every reply
+carries a serial number, so response and audio caches miss the way they
+would with a real model.
+
+Run standalone and point the app at it:
+
+    python benchmarks/fake_openai.py --port 8765 --latency 0.3 --token-rate 40
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-fake streamlit run app.py
+
+or use FakeOpenAIServer from a benchmark script.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STORY = (
+    "Once upon a time, in a meadow full of clover, a little bunny found a star that had "
+    "fallen asleep in the grass. The bunny tucked it under a leaf to keep it warm, and "
+    "the two of them watched the clouds drift by until the evening came. When the sky "
+    "turned pink, the star woke up, gave a sparkly yawn and floated gently home. "
+    "The bunny waved goodbye and hopped back to the burrow, feeling cozy and proud."
+)
+FACTS = (
+    "1. Octopuses have three hearts.\n"
+    "2. Sea otters hold hands while they sleep.\n"
+    "3. Butterflies taste with their feet.\n"
+    "4. A day on Venus is longer than its year."
+)
+FEELINGS = (
+    "VALIDATION: Your feeling makes sense, and it's okay to feel it in your tummy and chest.\n"
+    "SUGGESTION: Would you like to try a slow bunny breath?\n"
+    "REMINDER: Feelings come and go, like clouds."
+)
+QUESTION = "What sound do you think a rainbow would make"
+
+def reply_for(prompt: str, max_tokens: int, serial: int) -> str:
+    """A reply shaped for the kind of request the prompt is"""
+    if "VALIDATION" in prompt:
+        text = FEELINGS
+    elif "numbered list" in prompt or "facts" in prompt.lower():
+        text = FACTS
+    elif "ONE fun, imaginative question" in prompt:
+        text = QUESTION
+    else:
+        # Stories: about as many words as the request allows
+        # (numbered at the start, so read-aloud's first chunk differs too)
+        words = STORY.split()
+        target = max(len(words), int(max_tokens * 0.7))
+        return f"Story {serial}. " + " ".join(itertools.islice(itertools.cycle(words), target))
+    return f"{text} ({serial})"
+
+class FakeOpenAI:
+    """Reply behaviour and counters, shared by every request handler thread"""
+
+    def __init__(self, latency=0.2, token_rate=50.0, error_rate=0.0, error_status=500,
+                 speech_latency=0.3, speech_seconds_per_1k_chars=0.5, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.speech_latency = speech_latency
+        self.speech_seconds_per_1k_chars = speech_seconds_per_1k_chars
+        self.stats = {"chat": 0, "stream": 0, "speech": 0, "errors": 0}
+        self._random = random.Random(seed)
+        self._serial = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_request(self, kind: str) -> tuple[int, bool]:
+        """Serial number for a request and whether to fail it"""
+        with self._lock:
+            self.stats[kind] += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.stats["errors"] += 1
+            return next(self._serial), fail
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake: FakeOpenAI = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._send_json(200, self.fake.stats)
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/audio/speech"):
+            self._speech(body)
+        elif self.path.endswith("/chat/completions"):
+            self._chat(body)
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def _speech(self, body):
+        serial, fail = self.fake.next_request("speech")
+        text = body.get("input", "")
+        time.sleep(self.fake.speech_latency
+                   + len(text) / 1000 * self.fake.speech_seconds_per_1k_chars)
+        if fail:
+            return self._send_error()
+        # Not real MP3, but the app only stores and serves the bytes
+        audio = b"ID3" + f"{serial}:{text}".encode()
+        self.send_response(200)
+        self.send_header("content-type", "audio/mpeg")
+        self.send_header("content-length", str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def _chat(self, body):
+        streaming = bool(body.get("stream"))
+        serial, fail = self.fake.next_request("stream" if streaming else "chat")
+        time.sleep(self.fake.latency)
+        if fail:
+            return self._send_error()
+
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        text = reply_for(prompt, body.get("max_tokens", 400), serial)
+        words = text.split(" ")
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(words),
+                 "total_tokens": len(prompt) // 4 + len(words)}
+
+        if not streaming:
+            # Plain completions arrive all at once, after the whole reply is "generated"
+            time.sleep(len(words) / self.fake.token_rate)
+            return self._send_json(200, {
+                "id": f"chatcmpl-{serial}", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        base = {"id": f"chatcmpl-{serial}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "gpt-4o-mini")}
+        try:
+            for index, word in enumerate(words):
+                delta = word if index == 0 else " " + word
+                self._send_event({**base, "choices": [
+                    {"index": 0, "delta": {"content": delta}, "finish_reason": None}]})
+                time.sleep(1 / self.fake.token_rate)
+            if body.get("stream_options", {}).get("include_usage"):
+                self._send_event({**base, "choices": [], "usage": usage})
+            self._send_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading (banned word, closed tab)
+
+    def _send_event(self, event: dict):
+        self._send_chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_error(self):
+        status = self.fake.error_status
+        self.send_response(status)
+        data = json.dumps({"error": {"message": "Injected failure", "type": "server_error"}}).encode()
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        if status == 429:
+            self.send_header("retry-after", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # Clients dropping keep-alive connections isn't worth a traceback
+
+class FakeOpenAIServer:
+    """
+    The fake API on a background thread
+
+        with FakeOpenAIServer(latency=0.3) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **behaviour):
+        self.fake = FakeOpenAI(**behaviour)
+        handler = type("Handler", (_Handler,), {"fake": self.fake})
+        self.httpd = _QuietServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> dict:
+        return dict(self.fake.stats)
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser):
+    """--latency, --token-rate, ... shared with the benchmarks that start a server"""
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="seconds before each chat reply starts")
+    parser.add_argument("--token-rate", type=float, default=50.0,
+                        help="streamed words per second")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500,
+                        help="HTTP status of injected failures (429 adds retry-after)")
+    parser.add_argument("--speech-latency", type=float, default=0.3,
+                        help="seconds before each speech reply, plus --speech-per-1k per 1000 characters")
+    parser.add_argument("--speech-per-1k", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=None, help="seed for error injection")
+
+def behaviour_from_args(args) -> dict:
+    return {
+        "latency": args.latency,
+        "token_rate": args.token_rate,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "speech_latency": args.speech_latency,
+        "speech_seconds_per_1k_chars": args.speech_per_1k,
+        "seed": args.seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, **behaviour_from_args(args))
+    print(f"Fake OpenAI listening on {server.base_url} (GET / for request counts)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
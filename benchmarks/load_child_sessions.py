@@ -0,0 +1,442 @@
+"""
+Load test: many families using the app at once, over real websocket sessions
+
+Starts `streamlit run app.py` against the fake OpenAI server
+(benchmarks/fake_openai.py) in a throwaway data folder, then connects N
+simulated browser sessions to it. Each session speaks Streamlit's own
+websocket protocol (BackMsg/ForwardMsg), so every click runs the real show_*
+functions on the server exactly as a browser would. A session opens the
+landing page, goes to child mode, and then repeats a family's evening:
+
+    Storytime -> tell a story -> read it aloud -> home
+    -> Bunny Journal -> share an entry -> home
+    -> Calm Burrow -> Calm Timer -> start it -> Go Home
+
+with a think time between clicks. Reported: per-step latency (p50/p95/p99),
+throughput, server memory (baseline, peak, per session, after disconnect)
+and the server's open database connections, sampled while the test runs.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_child_sessions.py --sessions 20 --flows 3 --ramp 10
+    python benchmarks/load_child_sessions.py --sessions 50 --dsn postgresql://postgres@localhost/bench
+
+The browser-side read-aloud player and calm timer are not simulated: the
+read-aloud click waits for the first audio chunk (as the page does), but
+the player's requests for the remaining chunks are not made.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench_child_pages import BENCH_SETTINGS, git_commit, prepare_data_folder, summarize
+from fake_openai import FakeOpenAIServer, add_behaviour_arguments, behaviour_from_args
+
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+# Always play time, and no daily limit, whatever the clock says
+LOAD_SETTINGS = {
+    **BENCH_SETTINGS,
+    "quiet_hours_start": "00:00",
+    "quiet_hours_end": "00:00",
+    "daily_limit_minutes": 1440,
+}
+
+JOURNAL_TEXT = "Today I built a blanket fort and read in it with a torch."
+
+# A family's evening: (step name, button label or widget key, text to type first)
+FLOW = [
+    ("storytime", "Storytime", None),
+    ("tell_story", "Tell me a story", None),
+    ("read_aloud", "key:tts_current_story", None),
+    ("back_home", "key:back_to_home", None),
+    ("journal", "Bunny Journal", None),
+    ("share_entry", "Share with the bunny", JOURNAL_TEXT),
+    ("back_home", "key:back_to_home", None),
+    ("calm_burrow", "Calm Burrow", None),
+    ("calm_timer", "Calm Timer", None),
+    ("start_timer", "key:start_timer", None),
+    ("stop_timer", "key:cancel_timer", None),
+]
+
+class StepFailed(Exception):
+    pass
+
+class Session:
+    """One simulated browser tab: reruns the script and remembers the widgets it drew"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.page_script_hash = ""
+        self.buttons = []  # (widget id, label)
+        self.text_areas = []
+        self.exceptions = []
+        self._ws = None
+
+    async def connect(self):
+        import websockets
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None,
+                                            open_timeout=self.timeout)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def rerun(self, widget_states=()):
+        """Send a rerun (a page load or a click) and wait for the script to finish"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = self.page_script_hash
+        message.rerun_script.widget_states.widgets.extend(widget_states)
+        await self._ws.send(message.SerializeToString())
+        await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        if self.exceptions:
+            raise StepFailed(self.exceptions[0])
+
+    async def click(self, target: str, text: str = None):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self._find(self.buttons, target)
+        states = [WidgetState(id=widget_id, trigger_value=True)]
+        if text is not None:
+            states.append(WidgetState(id=self._find(self.text_areas, "journal_text_", by_id=True),
+                                      string_value=text))
+        await self.rerun(states)
+
+    def _find(self, widgets, target, by_id=False):
+        if target.startswith("key:"):
+            target, by_id = target[4:], True
+        for widget_id, label in widgets:
+            if (target in widget_id) if by_id else (target in label):
+                return widget_id
+        raise StepFailed(f"no widget {target!r} on the page")
+
+    async def _read_until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await self._ws.recv())
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                # Every script run (including st.rerun()) redraws the page from scratch
+                self.page_script_hash = message.new_session.main_script_hash
+                self.buttons, self.text_areas, self.exceptions = [], [], []
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                field = element.WhichOneof("type")
+                if field == "button":
+                    self.buttons.append((element.button.id, element.button.label))
+                elif field == "text_area":
+                    self.text_areas.append((element.text_area.id, element.text_area.label))
+                elif field == "exception":
+                    self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+            elif kind == "script_finished":
+                status = message.script_finished
+                if status == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    return
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise StepFailed("app.py failed to compile")
+                # FINISHED_EARLY_FOR_RERUN: st.rerun(); the next run follows
+
+class Results:
+    """Step timings and failures from every session"""
+
+    def __init__(self):
+        self.steps = {}
+        self.errors = []
+        self.timeouts = 0
+        self.flows_completed = 0
+        self.flows_failed = 0
+
+    async def step(self, name, action):
+        started = time.perf_counter()
+        try:
+            await action
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise StepFailed(f"{name}: timed out")
+        except StepFailed as e:
+            raise StepFailed(f"{name}: {e}")
+        self.steps.setdefault(name, []).append(time.perf_counter() - started)
+
+async def think(seconds):
+    if seconds:
+        await asyncio.sleep(seconds * random.uniform(0.5, 1.5))
+
+async def run_session(url, results, flows, think_time, timeout, delay=0.0):
+    """Open the app, go to child mode and run the family flow `flows` times"""
+    await asyncio.sleep(delay)
+    session = Session(url, timeout)
+    try:
+        await results.step("connect", session.connect())
+        await results.step("open", session.rerun())
+        await think(think_time)
+        await results.step("play", session.click("Play with Little Star Rabbit"))
+        for _ in range(flows):
+            try:
+                for name, target, text in FLOW:
+                    await think(think_time)
+                    await results.step(name, session.click(target, text))
+                results.flows_completed += 1
+            except StepFailed as e:
+                results.flows_failed += 1
+                results.errors.append(str(e))
+                # Back to the child home page for the next flow, if the page still has the button
+                await session.click("key:back_to_home")
+    except (StepFailed, OSError) as e:
+        results.errors.append(str(e))
+    except Exception as e:  # websockets' ConnectionClosed and friends
+        results.errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        await session.close()
+
+class ServerProbe:
+    """Memory and database connections of the Streamlit server process"""
+
+    def __init__(self, pid, dsn=None):
+        self.pid = pid
+        self.dsn = dsn
+        self.db_path = (Path.cwd() / "data" / "little_star.db").resolve()
+        self._pg = None
+        self.connections_before = 0
+
+    def rss_mb(self) -> float:
+        try:
+            for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return 0.0
+
+    def db_connections(self) -> int:
+        if self.dsn:
+            return max(0, self._postgres_connections() - self.connections_before)
+        # Each open SQLite connection holds the database file open
+        count = 0
+        fd_dir = Path(f"/proc/{self.pid}/fd")
+        try:
+            for fd in fd_dir.iterdir():
+                try:
+                    if Path(os.readlink(fd)) == self.db_path:
+                        count += 1
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        return count
+
+    def _postgres_connections(self) -> int:
+        import psycopg2
+
+        if self._pg is None:
+            self._pg = psycopg2.connect(self.dsn)
+            self._pg.autocommit = True
+        with self._pg.cursor() as cur:
+            cur.execute("SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND pid <> pg_backend_pid()")
+            return cur.fetchone()[0]
+
+    def close(self):
+        if self._pg is not None:
+            self._pg.close()
+
+async def sample(probe, samples, stop, interval=0.5):
+    while not stop.is_set():
+        rss, connections = await asyncio.to_thread(lambda: (probe.rss_mb(), probe.db_connections()))
+        samples.append({"t": round(time.perf_counter(), 2), "rss_mb": round(rss, 1),
+                        "db_connections": connections})
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+def start_server(workdir, port, base_url):
+    env = {**os.environ, "OPENAI_BASE_URL": base_url, "OPENAI_API_KEY": "sk-benchmark"}
+    log = open(Path(workdir) / "server.log", "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(REPO_ROOT / "app.py"),
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited:\n{(Path(workdir) / 'server.log').read_text()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("streamlit did not become healthy within 60 s")
+
+def server_tracebacks(workdir) -> int:
+    try:
+        return (Path(workdir) / "server.log").read_text().count("Traceback")
+    except OSError:
+        return 0
+
+async def load_test(args, url, probe):
+    # One untimed family first, so imports, pools and caches aren't counted as load
+    warmup = Results()
+    await run_session(url, warmup, 1, 0.0, args.step_timeout)
+    if warmup.errors:
+        raise RuntimeError(f"warm-up session failed: {warmup.errors[0]}")
+    await asyncio.sleep(1)
+    rss_baseline = probe.rss_mb()
+
+    results = Results()
+    samples = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample(probe, samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(url, results, args.flows, args.think, args.step_timeout,
+                    delay=args.ramp * index / max(1, args.sessions - 1) if args.sessions > 1 else 0.0)
+        for index in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    # Give the server a moment to drop the closed sessions
+    await asyncio.sleep(2)
+    rss_after = probe.rss_mb()
+    rss_peak = max([s["rss_mb"] for s in samples] + [rss_baseline])
+    connections = [s["db_connections"] for s in samples]
+    steps_total = sum(len(values) for name, values in results.steps.items()
+                      if name not in ("connect", "open"))
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "throughput": {
+            "flows_per_min": round(results.flows_completed / elapsed * 60, 2),
+            "clicks_per_s": round(steps_total / elapsed, 2),
+            "flows_completed": results.flows_completed,
+            "flows_failed": results.flows_failed,
+        },
+        "steps_ms": {name: summarize(values) for name, values in results.steps.items()},
+        "memory_mb": {
+            "baseline": round(rss_baseline, 1),
+            "peak": round(rss_peak, 1),
+            "per_session": round((rss_peak - rss_baseline) / max(1, args.sessions), 2),
+            "after_disconnect": round(rss_after, 1),
+        },
+        "db_connections": {
+            "max": max(connections, default=0),
+            "mean": round(statistics.fmean(connections), 2) if connections else 0,
+        },
+        "errors": sorted(set(results.errors)),
+        "error_count": len(results.errors),
+        "timeouts": results.timeouts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent browser sessions")
+    parser.add_argument("--flows", type=int, default=2, help="family flows per session")
+    parser.add_argument("--think", type=float, default=1.0,
+                        help="mean seconds between clicks (each wait is 0.5-1.5x this)")
+    parser.add_argument("--ramp", type=float, default=5.0,
+                        help="seconds over which sessions join")
+    parser.add_argument("--step-timeout", type=float, default=120.0,
+                        help="seconds a click may take before it counts as timed out")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--dsn", help="Postgres URL to use instead of the SQLite stand-in")
+    parser.add_argument("--output", help="results file (default benchmarks/results/load_child_sessions-<commit>.json)")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    behaviour = behaviour_from_args(args)
+    output = Path(args.output or RESULTS_DIR / f"load_child_sessions-{git_commit()}.json").resolve()
+
+    with tempfile.TemporaryDirectory() as workdir, FakeOpenAIServer(**behaviour) as fake:
+        if args.dsn:
+            from bench_db_pool import write_secrets
+            write_secrets(workdir, args.dsn)
+        os.chdir(workdir)
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+        prepare_data_folder(LOAD_SETTINGS)
+
+        probe = ServerProbe(None, args.dsn)
+        if args.dsn:
+            # This process's own pool (from preparing the data folder) isn't the server's
+            probe.connections_before = probe._postgres_connections() + 1
+        server = start_server(workdir, args.port, fake.base_url)
+        probe.pid = server.pid
+        try:
+            url = f"ws://127.0.0.1:{args.port}/_stcore/stream"
+            report = asyncio.run(load_test(args, url, probe))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            probe.close()
+        report["server_tracebacks"] = server_tracebacks(workdir)
+        api_requests = fake.stats
+
+    import streamlit
+    results = {
+        "meta": {
+            "benchmark": "load_child_sessions",
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "database": "postgres" if args.dsn else "sqlite",
+            "sessions": args.sessions,
+            "flows": args.flows,
+            "think_s": args.think,
+            "ramp_s": args.ramp,
+            "fake_openai": behaviour,
+            "api_requests": api_requests,
+        },
+        **report,
+    }
+
+    print(f"{args.sessions} sessions x {args.flows} flows in {report['elapsed_s']:.1f} s: "
+          f"{report['throughput']['flows_per_min']:.1f} flows/min, "
+          f"{report['throughput']['clicks_per_s']:.2f} clicks/s")
+    for name, stats in report["steps_ms"].items():
+        if stats:
+            print(f"  {name:12} p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  "
+                  f"p99 {stats['p99']:8.1f} ms  ({stats['samples']} samples)")
+    memory = report["memory_mb"]
+    print(f"server memory: {memory['baseline']:.0f} MB idle, {memory['peak']:.0f} MB peak "
+          f"({memory['per_session']:.2f} MB/session), {memory['after_disconnect']:.0f} MB after")
+    print(f"db connections: max {report['db_connections']['max']}, "
+          f"mean {report['db_connections']['mean']}")
+    print(f"errors: {report['error_count']}, timeouts: {report['timeouts']}, "
+          f"server tracebacks: {report['server_tracebacks']}, api requests: {api_requests}")
+    for error in report["errors"][:10]:
+        print(f"  {error}")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nresults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Stress test: many sessions in several processes hammering the JSON data files
+
+Each worker process has its own ConfigStore (like separate server processes
+sharing one data folder) and runs a few threads (like sessions):
+  - usage threads add minutes to usage.json through the locked update path
+  - admin threads save settings.json in bursts (coalesced writes)
+  - a reader process parses the raw files continuously
+
+Afterwards every file must parse, no usage minute may be lost, and the
+admin saves should have turned into far fewer disk writes.
+
+    python benchmarks/stress_config_store.py --processes 4 --threads 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_store import ConfigStore, thaw
+
+def worker(data_dir, threads, updates, saves, results):
+    data_dir = Path(data_dir)
+    settings_file = data_dir / "settings.json"
+    usage_file = data_dir / "usage.json"
+    store = ConfigStore(overrides=lambda name: {})
+    store.load("settings", settings_file, {"counter": 0})
+
+    def add_minute(usage):
+        usage["today"] = usage.get("today", 0) + 1
+
+    def usage_session():
+        for _ in range(updates):
+            store.update("usage", usage_file, {}, add_minute)
+
+    def admin_session(n):
+        for i in range(saves):
+            updated = thaw(store.load("settings", settings_file, {"counter": 0}))
+            updated["counter"] = updated.get("counter", 0) + 1
+            updated[f"session_{n}"] = i
+            store.save("settings", updated)
+            time.sleep(0.002)
+
+    sessions = [threading.Thread(target=usage_session) for _ in range(threads)]
+    sessions += [threading.Thread(target=admin_session, args=(n,)) for n in range(threads)]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    store.flush()
+    results.put(store.stats)
+
+def reader(data_dir, stop, results):
+    parsed = errors = 0
+    while not stop.is_set():
+        for name in ("settings.json", "usage.json"):
+            try:
+                with open(Path(data_dir) / name) as f:
+                    json.load(f)
+                parsed += 1
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                errors += 1
+    results.put({"parsed": parsed, "errors": errors})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=50, help="usage updates per usage session")
+    parser.add_argument("--saves", type=int, default=100, help="settings saves per admin session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = multiprocessing.Queue()
+        reader_results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        watcher = multiprocessing.Process(target=reader, args=(data_dir, stop, reader_results))
+        watcher.start()
+
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=worker, args=(data_dir, args.threads, args.updates,
+                                                         args.saves, results))
+            for _ in range(args.processes)
+        ]
+        for w in workers:
+            w.start()
+        stats = [results.get() for _ in workers]
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        read_stats = reader_results.get()
+        watcher.join()
+
+        usage = json.loads((Path(data_dir) / "usage.json").read_text())
+        json.loads((Path(data_dir) / "settings.json").read_text())
+        expected = args.processes * args.threads * args.updates
+        saves = sum(s["saves"] for s in stats)
+        writes = sum(s["writes"] for s in stats) - expected
+
+        print(f"{args.processes} processes x {args.threads * 2} sessions in {elapsed:.2f}s")
+        print(f"usage minutes: {usage['today']} recorded / {expected} added")
+        print(f"settings: {saves} saves -> {writes} disk writes")
+        print(f"raw reads: {read_stats['parsed']} parsed, {read_stats['errors']} unreadable")
+
+        ok = usage["today"] == expected and read_stats["errors"] == 0
+        print("OK" if ok else "FAILED")
+        sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Stress test: a child asking for a story while the pool is refilling it
+
+Each round warms the story pool for one length/topic/mood, waits until the
+refill's request is streaming from the fake API, then streams the same story
+in the foreground the way the Storytime button does when the pool is empty.
+The foreground story must not also land in the pool: the next take() has to
+return a different story, and the fake API has to see two requests.
+
+    python benchmarks/stress_story_pool.py --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from fake_openai import FakeOpenAIServer
+
+TOPICS = ["space", "ocean", "forest", "friendship", "adventure", "cozy day"]
+
+def last(chunks):
+    text = None
+    for text in chunks:
+        pass
+    return text
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            sys.exit("Timed out waiting for the story pool")
+        time.sleep(0.01)
+
+def run_round(pool, scope, topic, server):
+    from gpt_utils import StoryOptions, stream_story
+    from rate_limits import set_usage_scope
+
+    options = StoryOptions("short", topic, "calm", "Bunny")
+    key = (scope.profile, options.length, topic, options.mood)
+
+    def refill():
+        set_usage_scope(replace(scope, pooled=True))
+        return last(stream_story(options))
+
+    requests_before = server.stats["stream"]
+    refills_before = pool.stats["generated"] + pool.stats["failed"]
+    pool.warm(key, refill, target_size=1, daily_budget=1000)
+    wait_for(lambda: server.stats["stream"] > requests_before)
+
+    set_usage_scope(scope)
+    shown = last(stream_story(options))
+    wait_for(lambda: pool.stats["generated"] + pool.stats["failed"] > refills_before)
+
+    pooled = pool.take(key)
+    requests = server.stats["stream"] - requests_before
+    return shown, pooled, requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=len(TOPICS))
+    args = parser.parse_args()
+
+    # Slow enough that the foreground request starts while the refill is streaming
+    behaviour = {"latency": 0.2, "token_rate": 400.0}
+    with tempfile.TemporaryDirectory() as workdir, FakeOpenAIServer(**behaviour) as server:
+        os.chdir(workdir)
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+
+        from rate_limits import UsageScope
+        from story_pool import StoryPool
+
+        pool = StoryPool()
+        # Room for every round's two requests under the rate limit
+        scope = UsageScope.for_profile("Benchmark Bunny", {"rate_limits": {"burst": 4 * args.rounds}})
+        failures = 0
+        for i in range(args.rounds):
+            topic = TOPICS[i % len(TOPICS)]
+            shown, pooled, requests = run_round(pool, scope, topic, server)
+            ok = pooled is not None and pooled != shown and requests == 2
+            failures += not ok
+            print(f"{topic:12} requests: {requests}  pooled story differs: {pooled != shown}  "
+                  f"{'ok' if ok else 'FAIL'}")
+
+    print(f"rounds: {args.rounds}  failures: {failures}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Client-side Calm Timer for Little Star Rabbit
+The countdown runs in the browser; Python only hears about start, pause,
+resume and finish, so a resting child costs a handful of reruns instead of
+one every second
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_calm_timer = components.declare_component(
+    "calm_timer", path=str(Path(__file__).parent / "components" / "calm_timer")
+)
+
+def calm_timer(total_seconds: int, elapsed: int = 0, paused: bool = False,
+               epoch: int = 0, key: str = "calm_timer") -> Optional[dict]:
+    """
+    Render the countdown and return the latest event it reported
+
+    The browser only resets its clock when epoch changes, so bump it when a
+    new timer starts; reruns caused by the timer's own events leave it alone.
+    """
+    return _calm_timer(total_seconds=int(total_seconds), elapsed=int(elapsed),
+                       paused=bool(paused), epoch=epoch, key=key, default=None)
+
+def new_timer_event(key: str = "calm_timer") -> Optional[dict]:
+    """
+    The timer's latest event if it hasn't been handled yet
+
+    Component values persist across reruns, so each event is handled once by
+    remembering its id. Ids carry a per-mount nonce from the browser, so a
+    remounted timer restarting its count can't repeat a handled id. Call this
+    before calm_timer() so the page can react (e.g. show the finished screen)
+    in the same rerun.
+    """
+    event = st.session_state.get(key)
+    if not event or event.get("id") == st.session_state.get(f"{key}_handled"):
+        return None
+    st.session_state[f"{key}_handled"] = event.get("id")
+    return event
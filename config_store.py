@@ -0,0 +1,292 @@
+"""
+Config store for Little Star Rabbit
+Loads the JSON data files once per process and hands every rerun a
+read-only snapshot, re-reading a file only when it changes on disk.
+Writes are atomic (temp file, fsync, rename), locked across processes,
+and coalesced so a burst of admin edits becomes one disk write
+"""
+
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from tracing import traced
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Seconds to wait for more edits before writing a saved file to disk
+WRITE_DELAY = 0.5
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive lock on a data file, shared by threads and processes (via a .lock sidecar)"""
+    path = Path(path)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(str(path.resolve()), threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        lock_path = path.with_name(f".{path.name}.lock")
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def atomic_write_json(path: Path, data: Any):
+    """Write JSON so readers only ever see the old file or the complete new one"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+class FrozenDict(dict):
+    """A dict that refuses changes (still a dict for json, widgets and isinstance)"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Config snapshots are read-only; thaw() a copy, change it and save it")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of parsed JSON (dicts become FrozenDict, lists become tuples)"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Plain, editable copy of a snapshot"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+def secrets_overrides(name: str) -> dict:
+    """Values from Streamlit secrets that take precedence over a data file"""
+    overrides = {}
+    try:
+        if name == "settings":
+            # API key and admin PIN (for Streamlit Cloud deployment)
+            if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
+                overrides['api_key'] = st.secrets['openai']['api_key']
+            if 'admin' in st.secrets and 'pin' in st.secrets['admin']:
+                overrides['admin_pin'] = st.secrets['admin']['pin']
+        elif name == "profile" and 'profile' in st.secrets:
+            for key in ('child_name', 'age', 'pronouns'):
+                if key in st.secrets['profile']:
+                    overrides[key] = st.secrets['profile'][key]
+            if 'interests' in st.secrets['profile']:
+                # Convert comma-separated string to list
+                interests_str = st.secrets['profile']['interests']
+                overrides['interests'] = [i.strip() for i in interests_str.split(',')]
+    except Exception:
+        # Secrets not available (local development) - use JSON files only
+        pass
+    return overrides
+
+class _Document:
+    def __init__(self, path: Path, default: Any):
+        self.path = path
+        self.default = default
+        self.signature = None  # (mtime_ns, size) of the file last loaded or written
+        self.raw = None        # file contents as parsed
+        self.overrides = {}    # secrets applied on top
+        self.snapshot = None
+        self.dirty = False     # saved in memory, not yet written to disk
+
+class ConfigStore:
+    """
+    Process-wide cache of the JSON data files
+
+    Each file is parsed once, overlaid with secrets once, and frozen. Later
+    loads only stat the file; a changed mtime or size (an edit by hand or by
+    another process) triggers a re-read. Saves replace the snapshot right away
+    and are written to disk by a timer write_delay seconds later, so several
+    saves in a row cost one write.
+    """
+
+    def __init__(self, overrides: Callable[[str], dict] = secrets_overrides,
+                 write_delay: float = WRITE_DELAY):
+        self.overrides = overrides
+        self.write_delay = write_delay
+        self.stats = {"loads": 0, "hits": 0, "saves": 0, "writes": 0, "failed": 0}
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @traced("config.load")
+    def load(self, name: str, path: Path, default: Any) -> Any:
+        """Read-only snapshot of a data file (default if the file doesn't exist)"""
+        with self._lock:
+            doc = self._documents.get(name)
+            if doc is None:
+                doc = self._documents[name] = _Document(Path(path), default)
+
+            signature = self._signature(doc.path)
+            if doc.snapshot is not None and (doc.dirty or signature == doc.signature):
+                self.stats["hits"] += 1
+                return doc.snapshot
+
+            raw = self._read(doc, signature)
+            self.stats["loads"] += 1
+            self._install(name, doc, raw, signature)
+            return doc.snapshot
+
+    def save(self, name: str, data: Any):
+        """Replace a loaded file's contents; written to disk shortly after"""
+        with self._lock:
+            doc = self._documents[name]
+            raw = self._without_overrides(doc, thaw(data))
+            self._install(name, doc, raw, doc.signature)
+            doc.dirty = True
+            self.stats["saves"] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.write_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def update(self, name: str, path: Path, default: Any, change: Callable[[Any], None]):
+        """
+        Locked read-modify-write, written through immediately
+
+        For files several processes add to (like usage.json): the file is
+        re-read under the lock, so concurrent updates never overwrite each other.
+        """
+        with self._lock:
+            doc = self._documents.get(name)
+            if doc is None:
+                doc = self._documents[name] = _Document(Path(path), default)
+
+        with file_lock(doc.path):
+            with self._lock:
+                signature = self._signature(doc.path)
+                if doc.dirty or (doc.raw is not None and signature == doc.signature):
+                    raw = copy.deepcopy(doc.raw)
+                else:
+                    raw = self._read(doc, signature)
+            change(raw)
+            atomic_write_json(doc.path, raw)
+            with self._lock:
+                doc.dirty = False
+                self.stats["writes"] += 1
+                self._install(name, doc, raw, self._signature(doc.path))
+        return doc.snapshot
+
+    def flush(self):
+        """Write every saved-but-unwritten file now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending = [doc for doc in self._documents.values() if doc.dirty]
+
+        for doc in pending:
+            with file_lock(doc.path):
+                with self._lock:
+                    if not doc.dirty:
+                        continue
+                    raw = doc.raw
+                    doc.dirty = False
+                try:
+                    atomic_write_json(doc.path, raw)
+                except OSError:
+                    with self._lock:
+                        doc.dirty = True
+                        self.stats["failed"] += 1
+                    continue
+                with self._lock:
+                    self.stats["writes"] += 1
+                    # A save that landed while we were writing keeps the doc dirty
+                    if doc.raw is raw:
+                        doc.signature = self._signature(doc.path)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Force a re-read on the next load (all files if name is None)"""
+        with self._lock:
+            for key, doc in self._documents.items():
+                if name is None or key == name:
+                    doc.snapshot = None
+
+    def _read(self, doc: _Document, signature) -> Any:
+        if signature is None:
+            return copy.deepcopy(doc.default)
+        try:
+            with open(doc.path, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            # Damaged file (e.g. truncated by an older, non-atomic save): keep
+            # serving what we had rather than failing every rerun
+            self.stats["failed"] += 1
+            return copy.deepcopy(doc.raw if doc.raw is not None else doc.default)
+
+    def _install(self, name: str, doc: _Document, raw: Any, signature):
+        doc.raw = raw
+        doc.signature = signature
+        doc.overrides = self.overrides(name) if isinstance(raw, dict) else {}
+        merged = {**raw, **doc.overrides} if doc.overrides else raw
+        doc.snapshot = freeze(merged)
+
+    @staticmethod
+    def _without_overrides(doc: _Document, data: Any) -> Any:
+        """Keep secrets out of the file: overridden values that weren't edited revert to the file's own"""
+        if not isinstance(data, dict):
+            return data
+        for key, value in doc.overrides.items():
+            if data.get(key) != value:
+                continue
+            if isinstance(doc.raw, dict) and key in doc.raw:
+                data[key] = doc.raw[key]
+            else:
+                data.pop(key, None)
+        return data
+
+    @staticmethod
+    def _signature(path: Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+@st.cache_resource(show_spinner=False)
+def get_config_store() -> ConfigStore:
+    """Config store shared by all sessions in this process"""
+    store = ConfigStore()
+    atexit.register(store.flush)
+    return store
@@ -1,163 +1,154 @@
 """
-Database utilities for Little Star Rabbit app using Neon PostgreSQL
+Database utilities for Little Star Rabbit app
+Neon PostgreSQL when a database URL is configured, otherwise a local SQLite file
 """
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import atexit
+import threading
 import streamlit as st
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import json
 
+import migrations
+from db_backends import POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS, open_backend
+from tracing import traced
+from write_queue import WriteBehindQueue
+
+# ============================================================================
+# CONNECTIONS
+# ============================================================================
+
+@st.cache_resource(show_spinner=False)
+def open_database(url=None, minconn=POOL_MIN_CONNECTIONS, maxconn=POOL_MAX_CONNECTIONS):
+    """Shared storage backend (and its connection pool), created once per process"""
+    backend = open_backend(url, minconn=minconn, maxconn=maxconn)
+    atexit.register(backend.closeall)
+    return backend
+
+def database_url():
+    """Database URL from Streamlit secrets, or None for the default SQLite file"""
+    try:
+        if 'database' in st.secrets and 'url' in st.secrets['database']:
+            return st.secrets['database']['url']
+    except Exception:
+        # No secrets file (local development)
+        pass
+    return None
+
+def get_backend():
+    """Backend for the database configured in Streamlit secrets (SQLite if none)"""
+    pool_min, pool_max = POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS
+    url = database_url()
+    if url:
+        db_secrets = st.secrets["database"]
+        pool_min = int(db_secrets.get("pool_min", POOL_MIN_CONNECTIONS))
+        pool_max = int(db_secrets.get("pool_max", POOL_MAX_CONNECTIONS))
+    return open_database(url, minconn=pool_min, maxconn=pool_max)
+
+@traced("db.checkout")
 def get_db_connection():
-    """Get database connection from Streamlit secrets"""
+    """Check out a pooled database connection"""
     try:
-        conn = psycopg2.connect(
-            st.secrets["database"]["url"],
-            cursor_factory=RealDictCursor
-        )
-        return conn
+        return get_backend().getconn()
     except Exception as e:
         st.error(f"Database connection error: {str(e)}")
         return None
 
-def init_database():
-    """Initialize database tables if they don't exist"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-
+def release_db_connection(conn):
+    """Return a connection to the pool (broken connections are dropped)"""
     try:
-        cur = conn.cursor()
-
-        # Profiles table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS profiles (
-                id SERIAL PRIMARY KEY,
-                child_name VARCHAR(100) NOT NULL,
-                age INTEGER,
-                pronouns VARCHAR(50),
-                interests TEXT[],
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        get_backend().putconn(conn)
+    except Exception:
+        conn.close()
 
-        # Journal entries table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS journal_entries (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                title VARCHAR(200),
-                entry_text TEXT NOT NULL,
-                mood VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+# ============================================================================
+# SCHEMA
+# ============================================================================
 
-        # Wins/achievements table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS wins (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                win_text TEXT NOT NULL,
-                win_type VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+_schema_lock = threading.Lock()
+_schema_ready = False
 
-        # Unlocked strengths table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS unlocked_strengths (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                strength_id VARCHAR(100) NOT NULL,
-                strength_name VARCHAR(200),
-                unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(profile_id, strength_id)
-            )
-        """)
-
-        # Story history table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS story_history (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                story_text TEXT NOT NULL,
-                story_length VARCHAR(20),
-                story_topic VARCHAR(100),
-                story_mood VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+@traced("db.init_database")
+def init_database():
+    """Apply pending schema migrations (only the first call per process hits the database)"""
+    global _schema_ready
+    if _schema_ready:
+        return True
 
-        # Settings table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS app_settings (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                setting_key VARCHAR(100) NOT NULL,
-                setting_value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(profile_id, setting_key)
-            )
-        """)
+    with _schema_lock:
+        if _schema_ready:
+            return True
 
-        # Usage tracking table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS usage_tracking (
-                id SERIAL PRIMARY KEY,
-                profile_id INTEGER REFERENCES profiles(id),
-                activity_type VARCHAR(100),
-                activity_count INTEGER DEFAULT 1,
-                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        conn = get_db_connection()
+        if not conn:
+            return False
 
-        # Migration: Add title column to journal_entries if it doesn't exist
         try:
-            # Check if column exists first
-            cur.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name='journal_entries' AND column_name='title'
-            """)
-            if cur.fetchone() is None:
-                # Column doesn't exist, add it
-                cur.execute("""
-                    ALTER TABLE journal_entries
-                    ADD COLUMN title VARCHAR(200)
-                """)
-                st.success("✅ Added title column to journal_entries table")
+            migrations.apply_migrations(conn, get_backend().dialect)
+            release_db_connection(conn)
+            _schema_ready = True
+            return True
         except Exception as e:
-            # Log but don't fail
-            st.warning(f"Migration note: {str(e)}")
-            pass
+            st.error(f"Database initialization error: {str(e)}")
+            if conn:
+                release_db_connection(conn)
+            return False
 
-        # Migration: Add unique constraint to usage_tracking if it doesn't exist
-        try:
-            cur.execute("""
-                ALTER TABLE usage_tracking
-                ADD CONSTRAINT usage_tracking_profile_activity_unique
-                UNIQUE (profile_id, activity_type)
-            """)
-        except Exception:
-            # Constraint might already exist, that's ok
-            pass
+# ============================================================================
+# PAGINATION
+# ============================================================================
 
-        conn.commit()
+def page_cursor(rows):
+    """Cursor for the page after these rows (None when there are no rows)"""
+    if not rows:
+        return None
+    last = rows[-1]
+    return (last['created_at'], last['id'])
+
+def _recent_rows(table, columns, profile_id, limit, before, error_label):
+    """
+    Newest-first rows for a profile, one page at a time
+
+    Keyset pagination on (created_at, id): each page continues from the last
+    row of the previous one, so deep pages cost the same as the first and
+    rows added meanwhile don't shift the pages. Served by the
+    (profile_id, created_at DESC, id DESC) indexes.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    try:
+        cur = conn.cursor()
+        if before is None:
+            cur.execute(f"""
+                SELECT {columns} FROM {table}
+                WHERE profile_id = %s
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (profile_id, limit))
+        else:
+            cur.execute(f"""
+                SELECT {columns} FROM {table}
+                WHERE profile_id = %s AND (created_at, id) < (%s, %s)
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (profile_id, before[0], before[1], limit))
+        rows = cur.fetchall()
         cur.close()
-        conn.close()
-        return True
+        release_db_connection(conn)
+        return rows
     except Exception as e:
-        st.error(f"Database initialization error: {str(e)}")
+        st.error(f"{error_label}: {str(e)}")
         if conn:
-            conn.close()
-        return False
+            release_db_connection(conn)
+        return []
 
 # ============================================================================
 # PROFILE FUNCTIONS
 # ============================================================================
 
+@traced("db.create_or_get_profile")
 def create_or_get_profile(child_name, age=None, pronouns=None, interests=None):
     """Create a new profile or get existing one by name"""
     conn = get_db_connection()
@@ -184,14 +175,15 @@ def create_or_get_profile(child_name, age=None, pronouns=None, interests=None):
             conn.commit()
 
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return profile_id
     except Exception as e:
         st.error(f"Profile error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return None
 
+@traced("db.update_profile")
 def update_profile(profile_id, child_name=None, age=None, pronouns=None, interests=None):
     """Update profile information"""
     conn = get_db_connection()
@@ -225,18 +217,122 @@ def update_profile(profile_id, child_name=None, age=None, pronouns=None, interes
             conn.commit()
 
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Profile update error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
+        return False
+
+@traced("db.list_profiles")
+def list_profiles():
+    """All profiles, oldest first"""
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, child_name, age, pronouns, interests FROM profiles
+            ORDER BY id
+        """)
+        profiles = cur.fetchall()
+        cur.close()
+        release_db_connection(conn)
+        return profiles
+    except Exception as e:
+        st.error(f"Profiles fetch error: {str(e)}")
+        if conn:
+            release_db_connection(conn)
+        return []
+
+@traced("db.get_profile")
+def get_profile(profile_id):
+    """A profile by id (None if it doesn't exist)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, child_name, age, pronouns, interests FROM profiles
+            WHERE id = %s
+        """, (profile_id,))
+        profile = cur.fetchone()
+        cur.close()
+        release_db_connection(conn)
+        return profile
+    except Exception as e:
+        st.error(f"Profile fetch error: {str(e)}")
+        if conn:
+            release_db_connection(conn)
+        return None
+
+# ============================================================================
+# PROFILE SETTINGS FUNCTIONS
+# ============================================================================
+
+@traced("db.get_profile_settings")
+def get_profile_settings(profile_id):
+    """A profile's own settings as {key: value} (None if they couldn't be read)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT setting_key, setting_value FROM app_settings
+            WHERE profile_id = %s
+        """, (profile_id,))
+        rows = cur.fetchall()
+        cur.close()
+        release_db_connection(conn)
+        return {row['setting_key']: json.loads(row['setting_value']) for row in rows}
+    except Exception as e:
+        st.error(f"Settings fetch error: {str(e)}")
+        if conn:
+            release_db_connection(conn)
+        return None
+
+@traced("db.save_profile_settings")
+def save_profile_settings(profile_id, values):
+    """Set some of a profile's settings (values are stored as JSON), in one upsert"""
+    if not values:
+        return True
+
+    conn = get_db_connection()
+    if not conn:
+        return False
+
+    try:
+        cur = conn.cursor()
+        get_backend().execute_values(cur, """
+            INSERT INTO app_settings (profile_id, setting_key, setting_value, updated_at)
+            VALUES %s
+            ON CONFLICT (profile_id, setting_key)
+            DO UPDATE SET
+                setting_value = EXCLUDED.setting_value,
+                updated_at = EXCLUDED.updated_at
+        """, [(profile_id, key, json.dumps(value), datetime.now()) for key, value in values.items()])
+        conn.commit()
+        cur.close()
+        release_db_connection(conn)
+        return True
+    except Exception as e:
+        st.error(f"Settings save error: {str(e)}")
+        if conn:
+            release_db_connection(conn)
         return False
 
 # ============================================================================
 # JOURNAL FUNCTIONS
 # ============================================================================
 
+@traced("db.save_journal_entry")
 def save_journal_entry(profile_id, entry_text, title=None, mood=None):
     """Save a journal entry"""
     conn = get_db_connection()
@@ -251,38 +347,48 @@ def save_journal_entry(profile_id, entry_text, title=None, mood=None):
         """, (profile_id, title, entry_text, mood))
         conn.commit()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Journal save error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return False
 
-def get_journal_entries(profile_id, limit=10):
-    """Get recent journal entries"""
+@traced("db.get_journal_entries")
+def get_journal_entries(profile_id, limit=10, before=None):
+    """Get recent journal entries (pass before=page_cursor(previous page) for older ones)"""
+    flush_pending_writes()
+    return _recent_rows("journal_entries", "*", profile_id, limit, before, "Journal fetch error")
+
+@traced("db.list_journal_entries")
+def list_journal_entries(profile_id, limit=20, before=None):
+    """Titles and dates of recent journal entries, without the entry text"""
+    flush_pending_writes()
+    return _recent_rows("journal_entries", "id, title, created_at", profile_id, limit, before,
+                        "Journal fetch error")
+
+@traced("db.get_journal_entry")
+def get_journal_entry(entry_id):
+    """Get one journal entry with its full text"""
     conn = get_db_connection()
     if not conn:
-        return []
+        return None
 
     try:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT * FROM journal_entries
-            WHERE profile_id = %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (profile_id, limit))
-        entries = cur.fetchall()
+        cur.execute("SELECT * FROM journal_entries WHERE id = %s", (entry_id,))
+        entry = cur.fetchone()
         cur.close()
-        conn.close()
-        return entries
+        release_db_connection(conn)
+        return entry
     except Exception as e:
         st.error(f"Journal fetch error: {str(e)}")
         if conn:
-            conn.close()
-        return []
+            release_db_connection(conn)
+        return None
 
+@traced("db.delete_journal_entry")
 def delete_journal_entry(entry_id):
     """Delete a journal entry by ID"""
     conn = get_db_connection()
@@ -297,18 +403,19 @@ def delete_journal_entry(entry_id):
         """, (entry_id,))
         conn.commit()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Journal delete error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return False
 
 # ============================================================================
 # WINS/ACHIEVEMENTS FUNCTIONS
 # ============================================================================
 
+@traced("db.save_win")
 def save_win(profile_id, win_text, win_type=None):
     """Save a win/achievement"""
     conn = get_db_connection()
@@ -323,42 +430,24 @@ def save_win(profile_id, win_text, win_type=None):
         """, (profile_id, win_text, win_type))
         conn.commit()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Win save error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return False
 
-def get_wins(profile_id, limit=50):
+@traced("db.get_wins")
+def get_wins(profile_id, limit=50, before=None):
     """Get recent wins"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT * FROM wins
-            WHERE profile_id = %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (profile_id, limit))
-        wins = cur.fetchall()
-        cur.close()
-        conn.close()
-        return wins
-    except Exception as e:
-        st.error(f"Wins fetch error: {str(e)}")
-        if conn:
-            conn.close()
-        return []
+    return _recent_rows("wins", "*", profile_id, limit, before, "Wins fetch error")
 
 # ============================================================================
 # STRENGTHS FUNCTIONS
 # ============================================================================
 
+@traced("db.unlock_strength")
 def unlock_strength(profile_id, strength_id, strength_name):
     """Unlock a strength for a profile"""
     conn = get_db_connection()
@@ -374,16 +463,18 @@ def unlock_strength(profile_id, strength_id, strength_name):
         """, (profile_id, strength_id, strength_name))
         conn.commit()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Strength unlock error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return False
 
+@traced("db.get_unlocked_strengths")
 def get_unlocked_strengths(profile_id):
     """Get all unlocked strengths for a profile"""
+    flush_pending_writes()
     conn = get_db_connection()
     if not conn:
         return []
@@ -397,18 +488,19 @@ def get_unlocked_strengths(profile_id):
         """, (profile_id,))
         strengths = cur.fetchall()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return strengths
     except Exception as e:
         st.error(f"Strengths fetch error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return []
 
 # ============================================================================
 # STORY HISTORY FUNCTIONS
 # ============================================================================
 
+@traced("db.save_story")
 def save_story(profile_id, story_text, length=None, topic=None, mood=None):
     """Save a generated story"""
     conn = get_db_connection()
@@ -423,64 +515,190 @@ def save_story(profile_id, story_text, length=None, topic=None, mood=None):
         """, (profile_id, story_text, length, topic, mood))
         conn.commit()
         cur.close()
-        conn.close()
+        release_db_connection(conn)
         return True
     except Exception as e:
         st.error(f"Story save error: {str(e)}")
         if conn:
-            conn.close()
+            release_db_connection(conn)
         return False
 
-def get_story_history(profile_id, limit=20):
+@traced("db.get_story_history")
+def get_story_history(profile_id, limit=20, before=None):
     """Get story history"""
+    flush_pending_writes()
+    return _recent_rows("story_history", "*", profile_id, limit, before,
+                        "Story history fetch error")
+
+# ============================================================================
+# USAGE TRACKING FUNCTIONS
+# ============================================================================
+
+def _upsert_activity(cur, execute_values, events):
+    """
+    Add (profile_id, activity_type, happened_at) events to the running totals
+    and the per-day buckets: one multi-row upsert per table, however many events
+    """
+    # One row per key so a single upsert never hits the same key twice
+    totals = {}
+    daily = {}
+    for profile_id, activity_type, happened_at in events:
+        count, latest = totals.get((profile_id, activity_type), (0, happened_at))
+        totals[(profile_id, activity_type)] = (count + 1, max(latest, happened_at))
+        day_key = (profile_id, happened_at.date(), activity_type)
+        daily[day_key] = daily.get(day_key, 0) + 1
+
+    execute_values(cur, """
+        INSERT INTO usage_tracking (profile_id, activity_type, activity_count, last_activity)
+        VALUES %s
+        ON CONFLICT (profile_id, activity_type)
+        DO UPDATE SET
+            activity_count = usage_tracking.activity_count + EXCLUDED.activity_count,
+            last_activity = GREATEST(usage_tracking.last_activity, EXCLUDED.last_activity)
+    """, [(profile_id, activity_type, count, latest)
+          for (profile_id, activity_type), (count, latest) in totals.items()])
+    execute_values(cur, """
+        INSERT INTO usage_daily (profile_id, activity_date, activity_type, activity_count)
+        VALUES %s
+        ON CONFLICT (profile_id, activity_date, activity_type)
+        DO UPDATE SET activity_count = usage_daily.activity_count + EXCLUDED.activity_count
+    """, [(profile_id, day, activity_type, count)
+          for (profile_id, day, activity_type), count in daily.items()])
+
+@traced("db.track_activities")
+def track_activities(profile_id, events):
+    """
+    Track several activities in one round trip
+
+    events are activity type names, or (activity_type, happened_at) pairs
+    for activities that happened earlier.
+    """
+    now = datetime.now()
+    rows = []
+    for event in events:
+        activity_type, happened_at = (event, now) if isinstance(event, str) else event
+        rows.append((profile_id, activity_type, happened_at))
+    if not rows:
+        return True
+
     conn = get_db_connection()
     if not conn:
-        return []
+        return False
 
     try:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT * FROM story_history
-            WHERE profile_id = %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (profile_id, limit))
-        stories = cur.fetchall()
+        _upsert_activity(cur, get_backend().execute_values, rows)
+        conn.commit()
         cur.close()
-        conn.close()
-        return stories
+        release_db_connection(conn)
+        return True
     except Exception as e:
-        st.error(f"Story history fetch error: {str(e)}")
+        # Silently fail for tracking to not disrupt user experience
         if conn:
-            conn.close()
-        return []
-
-# ============================================================================
-# USAGE TRACKING FUNCTIONS
-# ============================================================================
+            release_db_connection(conn)
+        return False
 
 def track_activity(profile_id, activity_type):
     """Track usage activity"""
+    return track_activities(profile_id, [activity_type])
+
+@traced("db.get_daily_activity")
+def get_daily_activity(profile_id, days=14):
+    """Per-day activity counts for the last few days, oldest first"""
+    flush_pending_writes()
     conn = get_db_connection()
     if not conn:
-        return False
+        return []
 
     try:
         cur = conn.cursor()
         cur.execute("""
-            INSERT INTO usage_tracking (profile_id, activity_type, activity_count, last_activity)
-            VALUES (%s, %s, 1, CURRENT_TIMESTAMP)
-            ON CONFLICT (profile_id, activity_type)
-            DO UPDATE SET
-                activity_count = usage_tracking.activity_count + 1,
-                last_activity = CURRENT_TIMESTAMP
-        """, (profile_id, activity_type))
-        conn.commit()
+            SELECT activity_date, activity_type, activity_count FROM usage_daily
+            WHERE profile_id = %s AND activity_date >= %s
+            ORDER BY activity_date, activity_type
+        """, (profile_id, date.today() - timedelta(days=days - 1)))
+        rows = cur.fetchall()
         cur.close()
-        conn.close()
-        return True
+        release_db_connection(conn)
+        return rows
     except Exception as e:
-        # Silently fail for tracking to not disrupt user experience
+        st.error(f"Usage fetch error: {str(e)}")
         if conn:
-            conn.close()
-        return False
+            release_db_connection(conn)
+        return []
+
+# ============================================================================
+# WRITE-BEHIND FUNCTIONS
+# ============================================================================
+
+@traced("db.write_batch")
+def _write_batch(kind, rows):
+    """Write a batch of queued rows in one statement (runs on the flusher thread)"""
+    backend = get_backend()
+    execute_values = backend.execute_values
+    conn = backend.getconn()
+    try:
+        cur = conn.cursor()
+        if kind == "story":
+            execute_values(cur, """
+                INSERT INTO story_history (profile_id, story_text, story_length, story_topic, story_mood)
+                VALUES %s
+            """, rows)
+        elif kind == "journal":
+            execute_values(cur, """
+                INSERT INTO journal_entries (profile_id, title, entry_text, mood)
+                VALUES %s
+            """, rows)
+        elif kind == "strength":
+            execute_values(cur, """
+                INSERT INTO unlocked_strengths (profile_id, strength_id, strength_name)
+                VALUES %s
+                ON CONFLICT (profile_id, strength_id) DO NOTHING
+            """, list(dict.fromkeys(rows)))
+        elif kind == "activity":
+            _upsert_activity(cur, execute_values, rows)
+        else:
+            raise ValueError(f"Unknown write kind: {kind}")
+        conn.commit()
+        cur.close()
+    finally:
+        backend.putconn(conn)
+
+@st.cache_resource(show_spinner=False)
+def get_write_queue():
+    """Shared write-behind queue, flushed when the process exits"""
+    # Activity counts can be lost; what a child was told is saved can't
+    write_queue = WriteBehindQueue(_write_batch, keep_kinds=("story", "journal", "strength"))
+    atexit.register(write_queue.close)
+    return write_queue
+
+def flush_pending_writes(timeout=2.0):
+    """Make queued writes visible before reading them back"""
+    return get_write_queue().flush(timeout)
+
+def queue_story(profile_id, story_text, length=None, topic=None, mood=None):
+    """Save a generated story in the background (written directly if the queue is full)"""
+    if get_write_queue().put("story", (profile_id, story_text, length, topic, mood)):
+        return True
+    return save_story(profile_id, story_text, length=length, topic=topic, mood=mood)
+
+def queue_journal_entry(profile_id, entry_text, title=None, mood=None):
+    """Save a journal entry in the background (written directly if the queue is full)"""
+    if get_write_queue().put("journal", (profile_id, title, entry_text, mood)):
+        return True
+    return save_journal_entry(profile_id, entry_text, title=title, mood=mood)
+
+def queue_strength(profile_id, strength_id, strength_name):
+    """Unlock a strength in the background (written directly if the queue is full)"""
+    if get_write_queue().put("strength", (profile_id, strength_id, strength_name)):
+        return True
+    return unlock_strength(profile_id, strength_id, strength_name)
+
+def queue_activity(profile_id, activity_type):
+    """
+    Track usage activity in the background; dropped if the queue is full
+
+    Events that arrive within one flush interval are aggregated and written
+    with a single upsert (see track_activities).
+    """
+    return get_write_queue().put("activity", (profile_id, activity_type, datetime.now()))
@@ -0,0 +1,330 @@
+"""
+Storage backends for Little Star Rabbit's database
+Neon PostgreSQL through a shared connection pool, or an embedded SQLite file
+for single-box deployments and offline testing. database.py writes its SQL
+once in psycopg2 style (%s placeholders, dict rows) and runs it on either
+"""
+
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import psycopg2
+    from psycopg2 import pool as pg_pool
+    from psycopg2.extras import RealDictCursor, execute_values
+except ImportError:  # SQLite-only deployments don't need psycopg2
+    psycopg2 = None
+
+DEFAULT_SQLITE_PATH = Path("data/little_star.db")
+
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 5
+POOL_CHECKOUT_TIMEOUT = 10  # seconds to wait for a free connection
+POOL_PING_AFTER_SECONDS = 30  # idle connections older than this get a SELECT 1
+
+class PoolTimeout(Exception):
+    """No database connection became free in time"""
+
+# ============================================================================
+# POSTGRESQL
+# ============================================================================
+
+if psycopg2 is not None:
+    class _CountingPool(pg_pool.ThreadedConnectionPool):
+        """ThreadedConnectionPool that counts how many real connections it opens"""
+
+        def __init__(self, *args, **kwargs):
+            self.connections_opened = 0
+            super().__init__(*args, **kwargs)
+
+        def _connect(self, key=None):
+            self.connections_opened += 1
+            return super()._connect(key)
+
+class ConnectionPool:
+    """
+    Process-wide pool of Neon connections
+
+    Checkouts block (up to POOL_CHECKOUT_TIMEOUT) when every connection is
+    busy, and connections are health-checked before being handed out so a
+    connection dropped by Neon's idle timeout is replaced instead of failing
+    the next query.
+    """
+
+    dialect = "postgres"
+    description = "Neon PostgreSQL"
+
+    def __init__(self, dsn, minconn=POOL_MIN_CONNECTIONS, maxconn=POOL_MAX_CONNECTIONS,
+                 ping_after=POOL_PING_AFTER_SECONDS, checkout_timeout=POOL_CHECKOUT_TIMEOUT):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is required for a PostgreSQL database")
+        self.maxconn = maxconn
+        self.ping_after = ping_after
+        self.checkout_timeout = checkout_timeout
+        self.connections_discarded = 0
+        self._pool = _CountingPool(minconn, maxconn, dsn, cursor_factory=RealDictCursor)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    @property
+    def connections_opened(self):
+        return self._pool.connections_opened
+
+    def getconn(self):
+        """Check out a healthy connection"""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolTimeout("Timed out waiting for a database connection")
+
+        try:
+            # Every pooled connection may be stale, plus one fresh attempt
+            for _ in range(self.maxconn + 1):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+            raise pg_pool.PoolError("Could not get a healthy database connection")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        """Return a connection, rolling back anything left open"""
+        try:
+            if conn.closed:
+                self._discard(conn)
+                return
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            with self._lock:
+                self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        if not self._pool.closed:
+            self._pool.closeall()
+
+    @staticmethod
+    def execute_values(cur, sql, rows):
+        """Insert many rows with one multi-row VALUES statement"""
+        execute_values(cur, sql, rows)
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+
+        with self._lock:
+            last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.ping_after:
+            return True
+
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _discard(self, conn):
+        self.connections_discarded += 1
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+        try:
+            self._pool.putconn(conn, close=True)
+        except pg_pool.PoolError:
+            pass
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+# Column types the SQLite schema uses for values psycopg2 would convert for us
+sqlite3.register_converter("TEXT_LIST", lambda value: json.loads(value.decode("utf-8")))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode("utf-8")))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode("utf-8")))
+
+@lru_cache(maxsize=256)
+def _to_qmark(sql):
+    """psycopg2's %s placeholders in SQLite's ? style"""
+    return sql.replace("%s", "?")
+
+def _adapt(value):
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value))
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+def _greatest(*values):
+    present = [v for v in values if v is not None]
+    return max(present) if present else None
+
+class _SQLiteCursor:
+    """Cursor that accepts psycopg2-style SQL and parameters"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_to_qmark(sql), [_adapt(p) for p in params])
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(_to_qmark(sql), ([_adapt(p) for p in row] for row in rows))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class _SQLiteConnection:
+    """The parts of a psycopg2 connection that database.py uses"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+class SQLiteBackend:
+    """
+    Embedded SQLite database file
+
+    WAL mode lets readers carry on while a write commits, and each connection
+    keeps a cache of prepared statements, so repeated queries skip parsing.
+    Connections are pooled like the Postgres ones; writers queue on SQLite's
+    busy timeout rather than failing.
+    """
+
+    dialect = "sqlite"
+    description = "SQLite on this server"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, maxconn=POOL_MAX_CONNECTIONS,
+                 checkout_timeout=POOL_CHECKOUT_TIMEOUT, busy_timeout=5.0, cached_statements=256):
+        self.path = Path(path)
+        self.checkout_timeout = checkout_timeout
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.connections_opened = 0
+        self.connections_discarded = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._all = []
+        self._lock = threading.Lock()
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolTimeout("Timed out waiting for a database connection")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            if conn._conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            self.connections_discarded += 1
+            conn.close()
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all.clear()
+
+    @staticmethod
+    def execute_values(cur, sql, rows):
+        """psycopg2's execute_values: one prepared statement run for every row"""
+        if not rows:
+            return
+        placeholders = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        cur.executemany(re.sub(r"VALUES\s+%s", f"VALUES {placeholders}", sql, count=1), rows)
+
+    def _connect(self):
+        raw = sqlite3.connect(
+            str(self.path),
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        raw.row_factory = _dict_row
+        raw.execute("PRAGMA journal_mode=WAL")
+        raw.execute("PRAGMA synchronous=NORMAL")
+        raw.execute("PRAGMA foreign_keys=ON")
+        raw.create_function("GREATEST", -1, _greatest, deterministic=True)
+        conn = _SQLiteConnection(raw)
+        with self._lock:
+            self.connections_opened += 1
+            self._all.append(conn)
+        return conn
+
+# ============================================================================
+# SELECTION
+# ============================================================================
+
+def open_backend(url=None, minconn=POOL_MIN_CONNECTIONS, maxconn=POOL_MAX_CONNECTIONS):
+    """
+    Backend for a database URL
+
+    postgresql://... uses Neon/Postgres; sqlite:///relative/path.db or
+    sqlite:////absolute/path.db uses a local file; no URL means the default
+    SQLite file in the data folder.
+    """
+    if not url:
+        return SQLiteBackend(DEFAULT_SQLITE_PATH, maxconn=maxconn)
+    if url.startswith("sqlite://"):
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else ""
+        return SQLiteBackend(path or DEFAULT_SQLITE_PATH, maxconn=maxconn)
+    return ConnectionPool(url, minconn=minconn, maxconn=maxconn)
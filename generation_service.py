@@ -0,0 +1,148 @@
+"""
+Asyncio generation service for Little Star Rabbit
+Runs independent generations concurrently on one background event loop
+(AsyncOpenAI), so a page waits for its slowest call rather than the sum of
+them. Work is tied to a browser session and the pages it is for; work that
+hasn't started is cancelled when the child navigates somewhere else
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Hashable, Iterable, Optional
+
+import streamlit as st
+
+from gpt_utils import ChatJob, get_async_openai_client
+from resilience import get_resilience
+
+MAX_CONCURRENT_REQUESTS = 4
+REQUEST_TIMEOUT = 20.0  # seconds per generation
+FORGET_AFTER = 600  # seconds before unclaimed results are dropped
+
+class _Task:
+    def __init__(self, job: ChatJob, scope: frozenset):
+        self.job = job
+        self.scope = scope
+        self.future: Optional[concurrent.futures.Future] = None
+        self.started = False  # the request is (or was) on its way to the API
+        self.created = time.monotonic()
+
+class GenerationService:
+    """
+    Background event loop plus a per-session table of in-flight generations
+
+    Every task has a scope: the pages whose visit keeps it alive. navigate()
+    cancels the tasks a session no longer needs that are still waiting for a
+    slot. A request that is already running is left to finish - it is
+    billed either way - so its result lands in the response cache and stays
+    in the table for the next visit to claim. Results wait in the table until
+    a page take()s them.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                 request_timeout: float = REQUEST_TIMEOUT):
+        self.request_timeout = request_timeout
+        self.stats = {"started": 0, "completed": 0, "failed": 0, "timed_out": 0, "cancelled": 0}
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="generation-loop",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, session_id: str, key: Hashable, job: ChatJob,
+               scope: Iterable[str] = ()) -> concurrent.futures.Future:
+        """Start a generation unless this session already has one under key"""
+        with self._lock:
+            self._forget_stale()
+            tasks = self._sessions.setdefault(session_id, {})
+            task = tasks.get(key)
+            if task is not None and not task.future.cancelled():
+                return task.future
+
+            client = get_async_openai_client()
+            task = tasks[key] = _Task(job, frozenset(scope))
+            task.future = asyncio.run_coroutine_threadsafe(self._run(task, client), self._loop)
+            self.stats["started"] += 1
+            return task.future
+
+    def take(self, session_id: str, key: Hashable, timeout: Optional[float] = None) -> Any:
+        """
+        Claim a submitted generation's result, waiting for it if it's still
+        running; None if nothing was submitted under key
+        """
+        with self._lock:
+            task = self._sessions.get(session_id, {}).pop(key, None)
+        if task is None:
+            return None
+        return self._result(task, self.request_timeout if timeout is None else timeout)
+
+    def gather(self, session_id: str, jobs: dict, scope: Iterable[str] = (),
+               timeout: Optional[float] = None) -> dict:
+        """Run several jobs at once and return {key: result} when the slowest finishes"""
+        for key, job in jobs.items():
+            self.submit(session_id, key, job, scope)
+        deadline = time.monotonic() + (self.request_timeout if timeout is None else timeout)
+        return {
+            key: self.take(session_id, key, timeout=max(0.0, deadline - time.monotonic()))
+            for key in jobs
+        }
+
+    def navigate(self, session_id: str, page: str):
+        """The session is now on page: cancel its queued tasks that aren't for it"""
+        with self._lock:
+            tasks = self._sessions.get(session_id, {})
+            for key in [k for k, task in tasks.items()
+                        if page not in task.scope and not task.started]:
+                if tasks.pop(key).future.cancel():
+                    self.stats["cancelled"] += 1
+
+    def cancel_session(self, session_id: str):
+        with self._lock:
+            for task in self._sessions.pop(session_id, {}).values():
+                if task.future.cancel():
+                    self.stats["cancelled"] += 1
+
+    async def _run(self, task: _Task, client):
+        async with self._semaphore:
+            task.started = True
+            return await asyncio.wait_for(task.job.arun(client), self.request_timeout)
+
+    def _result(self, task: _Task, timeout: float) -> Any:
+        try:
+            result = task.future.result(timeout=timeout)
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            task.future.cancel()
+            self._count("timed_out")
+            get_resilience().note_fallback(task.job.feature)
+            return task.job.fallback
+        except concurrent.futures.CancelledError:
+            self._count("cancelled")
+            return task.job.fallback
+        except Exception:
+            self._count("failed")
+            get_resilience().note_fallback(task.job.feature)
+            return task.job.fallback
+        self._count("completed")
+        return result
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _forget_stale(self):
+        now = time.monotonic()
+        for session_id in list(self._sessions):
+            tasks = self._sessions[session_id]
+            for key in [k for k, task in tasks.items() if now - task.created > FORGET_AFTER]:
+                tasks.pop(key).future.cancel()
+            if not tasks:
+                del self._sessions[session_id]
+
+@st.cache_resource(show_spinner=False)
+def get_generation_service() -> GenerationService:
+    """Generation service shared by all sessions in this process"""
+    return GenerationService()
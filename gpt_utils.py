@@ -3,10 +3,37 @@ GPT utility functions for Little Star Rabbit
 Centralizes all OpenAI API calls with trauma-aware, child-safe prompts
 """
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
 import streamlit as st
-from typing import Optional
-from dataclasses import dataclass
+import asyncio
+import importlib.util
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+from contextvars import ContextVar
+
+from offline_content import (
+    offline_affirmation, offline_facts, offline_feelings, offline_lesson, offline_story,
+    offline_wonder_answer, offline_wonder_prompt
+)
+from rate_limits import UsageScope, get_usage_governor, get_usage_scope
+from resilience import get_resilience
+from singleflight import get_single_flight
+from tracing import get_tracer, span
+from response_cache import ResponseCache, make_cache_key
+from word_filter import BannedContentError, BannedWordMatcher, get_matcher
+
+RESPONSE_CACHE_FILE = Path("data/response_cache.sqlite3")
+SETTINGS_FILE = Path("data/settings.json")
+
+# Custom banned words for the session being served (set by app.py on each rerun)
+_custom_word_filters: ContextVar[tuple] = ContextVar("custom_word_filters", default=())
+# Admin chose offline-only mode: no OpenAI client, everything comes from the offline pack
+_offline_only: ContextVar[bool] = ContextVar("offline_only", default=False)
 
 @dataclass
 class StoryOptions:
@@ -15,34 +42,347 @@ class StoryOptions:
     mood: str
     child_name: str
 
-def get_openai_client() -> Optional[OpenAI]:
-    """Get OpenAI client from settings or environment"""
+# Clients shared by every session, keyed on what they were built with
+_clients: dict = {}
+_async_clients: dict = {}
+_clients_lock = threading.Lock()
+_settings_key_cache = {"mtime": None, "api_key": None}
+
+# HTTP/2 needs the optional h2 package; without it httpx keeps HTTP/1.1 keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+def _secrets_api_key() -> Optional[str]:
     try:
-        # Try to get from Streamlit secrets first
-        if hasattr(st, 'secrets') and 'openai' in st.secrets:
-            api_key = st.secrets['openai']['api_key']
-            return OpenAI(api_key=api_key)
-        # Fall back to settings or environment
-        import json
-        from pathlib import Path
-        settings_file = Path("data/settings.json")
-        if settings_file.exists():
-            with open(settings_file) as f:
-                settings = json.load(f)
-                api_key = settings.get('api_key')
-                if api_key:
-                    return OpenAI(api_key=api_key)
-        # Last resort: environment variable
-        return OpenAI()
+        if 'openai' in st.secrets:
+            return st.secrets['openai'].get('api_key')
     except Exception:
+        # No secrets file (local development)
+        pass
+    return None
+
+def _settings_api_key() -> Optional[str]:
+    """API key from data/settings.json, re-read only when the file changes"""
+    try:
+        mtime = SETTINGS_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+    if _settings_key_cache["mtime"] != mtime:
+        try:
+            with open(SETTINGS_FILE) as f:
+                api_key = json.load(f).get('api_key')
+        except (OSError, ValueError):
+            api_key = None
+        _settings_key_cache.update(mtime=mtime, api_key=api_key)
+    return _settings_key_cache["api_key"]
+
+def resolve_api_key(api_key: Optional[str] = None) -> Optional[str]:
+    """API key from the argument, Streamlit secrets, settings file, then environment"""
+    return (api_key or _secrets_api_key() or _settings_api_key()
+            or os.environ.get("OPENAI_API_KEY"))
+
+def set_offline_only(offline_only: bool):
+    """Serve this session from the offline pack only (no API calls, no cost)"""
+    _offline_only.set(offline_only)
+
+def is_offline_only() -> bool:
+    return _offline_only.get()
+
+def get_openai_client(api_key: Optional[str] = None) -> Optional[OpenAI]:
+    """Shared OpenAI client; only rebuilt when the key or endpoint changes"""
+    if _offline_only.get():
+        return None
+    api_key = resolve_api_key(api_key)
+    if not api_key:
         return None
 
-def generate_story(options: StoryOptions) -> str:
-    """Generate a trauma-aware bedtime story"""
-    client = get_openai_client()
-    if not client:
-        return "I'm having trouble thinking of a story right now. Try again in a moment!"
+    client_key = (api_key, os.environ.get("OPENAI_BASE_URL"))
+    client = _clients.get(client_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(client_key)
+        if client is None:
+            try:
+                client = OpenAI(
+                    api_key=api_key,
+                    max_retries=0,  # resilience.py does the retrying
+                    http_client=DefaultHttpxClient(http2=HTTP2_AVAILABLE),
+                )
+            except Exception:
+                return None
+            # A changed key replaces the old client; requests already using it finish normally
+            _clients.clear()
+            _clients[client_key] = client
+        return client
+
+def get_async_openai_client(api_key: Optional[str] = None) -> Optional[AsyncOpenAI]:
+    """Shared AsyncOpenAI client for the generation service's event loop"""
+    if _offline_only.get():
+        return None
+    api_key = resolve_api_key(api_key)
+    if not api_key:
+        return None
 
+    client_key = (api_key, os.environ.get("OPENAI_BASE_URL"))
+    with _clients_lock:
+        client = _async_clients.get(client_key)
+        if client is None:
+            try:
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    max_retries=0,
+                    http_client=DefaultAsyncHttpxClient(http2=HTTP2_AVAILABLE),
+                )
+            except Exception:
+                return None
+            _async_clients.clear()
+            _async_clients[client_key] = client
+        return client
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> ResponseCache:
+    """Response cache shared by all sessions, backed by SQLite in the data folder"""
+    try:
+        RESPONSE_CACHE_FILE.parent.mkdir(exist_ok=True)
+        return ResponseCache(db_path=RESPONSE_CACHE_FILE)
+    except Exception:
+        # Read-only filesystem: keep the in-memory tier only
+        return ResponseCache()
+
+def set_custom_word_filters(words: Iterable[str]):
+    """Banned words every generator checks its output against"""
+    _custom_word_filters.set(tuple(words))
+
+def get_word_matcher() -> BannedWordMatcher:
+    """Compiled matcher for the current custom word filters"""
+    return get_matcher(_custom_word_filters.get())
+
+def _cache_key(feature, model, messages, temperature, max_tokens, safety, matcher):
+    safety = dict(safety or {})
+    safety["custom_word_filters"] = matcher.words
+    return make_cache_key(feature, model, messages, temperature, max_tokens, safety)
+
+def flight_key(kind: str, key: str, scope: Optional[UsageScope]) -> tuple:
+    """
+    Single-flight key for a request made on behalf of scope's profile
+
+    Only the leader's profile is admitted and charged, so requests are shared
+    within a profile and never across profiles (whose budgets differ). Pool
+    refills get flights of their own: a story a child was already shown must
+    not also be put in the pool.
+    """
+    if scope is None:
+        return (kind, key, None, False)
+    return (kind, key, scope.profile, scope.pooled)
+
+def _prompt_text(messages: list[dict]) -> str:
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+def complete_chat(feature: str, client: OpenAI, messages: list[dict], model: str,
+                  temperature: float, max_tokens: int, safety: Optional[dict] = None) -> str:
+    """
+    Chat completion through the response cache
+
+    Raises on API errors so callers keep their own friendly fallbacks, and
+    raises BannedContentError (without caching) if the text hits a custom
+    banned word. Identical requests already in flight are joined rather than
+    repeated, and new ones must pass the profile's rate limit and budget
+    (UsageLimitExceeded).
+    """
+    cache = get_response_cache()
+    matcher = get_word_matcher()
+    key = _cache_key(feature, model, messages, temperature, max_tokens, safety, matcher)
+    cached = cache.get(feature, key)
+    if cached is not None:
+        return cached
+
+    scope = get_usage_scope()
+
+    def request() -> str:
+        governor = get_usage_governor()
+        governor.admit(scope, feature)
+        with span("openai.chat"):
+            response = get_resilience().call("chat", lambda timeout: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout
+            ))
+        text = response.choices[0].message.content
+        governor.record_chat(scope, model, response.usage, _prompt_text(messages), text)
+        banned_word = matcher.find(text)
+        if banned_word:
+            raise BannedContentError(banned_word)
+        cache.put(feature, key, text)
+        return text
+
+    return get_single_flight().do(flight_key("chat", key, scope), request)
+
+async def acomplete_chat(feature: str, client: AsyncOpenAI, messages: list[dict], model: str,
+                         temperature: float, max_tokens: int, safety: Optional[dict] = None,
+                         matcher: Optional[BannedWordMatcher] = None,
+                         scope: Optional[UsageScope] = None) -> str:
+    """
+    complete_chat for the asyncio generation service
+
+    Runs off the script thread, so the session's word matcher and usage
+    scope have to be passed in rather than read from the context.
+    """
+    cache = get_response_cache()
+    matcher = matcher if matcher is not None else get_word_matcher()
+    key = _cache_key(feature, model, messages, temperature, max_tokens, safety, matcher)
+    cached = cache.get(feature, key)
+    if cached is not None:
+        return cached
+
+    async def request() -> str:
+        governor = get_usage_governor()
+        # Off the loop: the first check in a process reads the usage file
+        await asyncio.to_thread(governor.admit, scope, feature)
+        with span("openai.chat"):
+            response = await get_resilience().acall("chat", lambda timeout: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout
+            ))
+        text = response.choices[0].message.content
+        await asyncio.to_thread(governor.record_chat, scope, model, response.usage,
+                                _prompt_text(messages), text)
+        banned_word = matcher.find(text)
+        if banned_word:
+            raise BannedContentError(banned_word)
+        cache.put(feature, key, text)
+        return text
+
+    return await get_single_flight().ado(flight_key("chat", key, scope), request)
+
+@dataclass
+class ChatJob:
+    """
+    One generation: the request, how to turn the reply into a result, and what
+    to show instead if it fails (offline_fallback: when there is no API key)
+    """
+    feature: str
+    messages: list
+    model: str
+    temperature: float
+    max_tokens: int
+    parse: Callable[[str], Any]
+    fallback: Any
+    offline_fallback: Any = None
+    # Captured when the job is built, on the session's script thread
+    matcher: BannedWordMatcher = field(default_factory=lambda: get_word_matcher())
+    scope: Optional[UsageScope] = field(default_factory=lambda: get_usage_scope())
+
+    def offline(self) -> Any:
+        return self.fallback if self.offline_fallback is None else self.offline_fallback
+
+    def run(self, client: Optional[OpenAI]) -> Any:
+        if not client:
+            return self.offline()
+        try:
+            return self.parse(complete_chat(
+                self.feature, client, messages=self.messages, model=self.model,
+                temperature=self.temperature, max_tokens=self.max_tokens
+            ))
+        except Exception:
+            get_resilience().note_fallback(self.feature)
+            return self.fallback
+
+    async def arun(self, client: Optional[AsyncOpenAI]) -> Any:
+        """Async run; unlike run() errors propagate so the service can count them"""
+        if not client:
+            return self.offline()
+        return self.parse(await acomplete_chat(
+            self.feature, client, messages=self.messages, model=self.model,
+            temperature=self.temperature, max_tokens=self.max_tokens, matcher=self.matcher,
+            scope=self.scope
+        ))
+
+def stream_chat(feature: str, client: OpenAI, messages: list[dict], model: str,
+                temperature: float, max_tokens: int, safety: Optional[dict] = None) -> Iterator[str]:
+    """
+    Streaming version of complete_chat that yields text deltas as they arrive
+
+    A cache hit is yielded as a single chunk, and so is the text of an
+    identical request that is already streaming for someone else. Each delta
+    is scanned for banned words before it is yielded; a match stops the
+    request and raises BannedContentError, so the caller can retract what it
+    already showed. The full text is cached only once the stream completes
+    cleanly.
+    """
+    cache = get_response_cache()
+    matcher = get_word_matcher()
+    key = _cache_key(feature, model, messages, temperature, max_tokens, safety, matcher)
+    cached = cache.get(feature, key)
+    if cached is not None:
+        yield cached
+        return
+
+    scope = get_usage_scope()
+    flights = get_single_flight()
+    flight_id = flight_key("chat", key, scope)
+    flight, leader = flights.begin(flight_id)
+    if not leader:
+        yield flight.result()
+        return
+
+    governor = get_usage_governor()
+    parts = []
+    usage = None
+    started = time.perf_counter()
+    try:
+        governor.admit(scope, feature)
+        # Retried until the stream opens; a stream that breaks part-way is not replayed
+        with span("openai.stream_open"):
+            stream = get_resilience().call("chat", lambda timeout: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout
+            ))
+        scanner = matcher.scanner()
+        try:
+            for event in stream:
+                if event.usage is not None:
+                    usage = event.usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    banned_word = scanner.feed(delta)
+                    if banned_word:
+                        raise BannedContentError(banned_word)
+                    if not parts:
+                        get_tracer().record("openai.first_token", time.perf_counter() - started)
+                    parts.append(delta)
+                    yield delta
+        finally:
+            stream.close()
+            governor.record_chat(scope, model, usage, _prompt_text(messages), "".join(parts))
+
+        banned_word = scanner.finish()
+        if banned_word:
+            raise BannedContentError(banned_word)
+    except BaseException as e:
+        # A caller that stops reading early leaves followers an ordinary error
+        flights.finish(flight_id, flight,
+                       error=e if isinstance(e, Exception) else ConnectionAbortedError("Stream abandoned"))
+        raise
+
+    text = "".join(parts)
+    cache.put(feature, key, text)
+    flights.finish(flight_id, flight, text)
+
+def _story_prompt(options: StoryOptions) -> tuple[str, int]:
+    """Prompt and word limit for a bedtime story"""
     word_limits = {"short": 300, "medium": 500, "long": 700}
     word_limit = word_limits.get(options.length, 400)
 
@@ -62,24 +402,72 @@ RULES:
 - Make the main character curious and capable
 
 Write the story now:"""
+    return prompt, word_limit
+
+def generate_story(options: StoryOptions) -> str:
+    """Generate a trauma-aware bedtime story"""
+    client = get_openai_client()
+    fallback = (offline_story(options.topic, options.mood, options.child_name)
+                or "I'm having trouble thinking of a story right now. Try again in a moment!")
+    if not client:
+        return fallback
+
+    prompt, word_limit = _story_prompt(options)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = complete_chat(
+            "story", client,
             messages=[{"role": "user", "content": prompt}],
+            model="gpt-4o-mini",
             max_tokens=word_limit + 100,
             temperature=0.8
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"I'm having trouble making up a story right now. Maybe try again in a moment?"
+        return content.strip()
+    except Exception:
+        get_resilience().note_fallback("story")
+        return fallback
 
-def generate_star_facts(topic: str) -> list[str]:
-    """Generate 3-5 kid-friendly facts about a topic"""
+def stream_story(options: StoryOptions) -> Iterator[str]:
+    """Generate a bedtime story, yielding the text so far as it streams in"""
     client = get_openai_client()
+    fallback = (offline_story(options.topic, options.mood, options.child_name)
+                or "I'm having trouble thinking of a story right now. Try again in a moment!")
     if not client:
-        return ["I'm having trouble thinking of facts right now!"]
+        yield fallback
+        return
+
+    prompt, word_limit = _story_prompt(options)
 
+    story = ""
+    try:
+        for chunk in stream_chat(
+            "story", client,
+            messages=[{"role": "user", "content": prompt}],
+            model="gpt-4o-mini",
+            max_tokens=word_limit + 100,
+            temperature=0.8
+        ):
+            story += chunk
+            yield story.lstrip()
+    except Exception:
+        get_resilience().note_fallback("story")
+        yield fallback
+
+def _parse_facts(content: str) -> list[str]:
+    facts_text = content.strip()
+    # Parse into list
+    facts = []
+    for line in facts_text.split('\n'):
+        line = line.strip()
+        # Remove numbering
+        if line and (line[0].isdigit() or line.startswith('-') or line.startswith('•')):
+            fact = line.lstrip('0123456789.-•) ').strip()
+            if fact:
+                facts.append(fact)
+    return facts if facts else [facts_text]
+
+def star_facts_job(topic: str) -> ChatJob:
+    """Generation job for generate_star_facts (also run by the generation service)"""
     prompt = f"""Generate exactly 4 fascinating, positive facts about {topic} for a 7-year-old.
 
 RULES:
@@ -92,36 +480,30 @@ RULES:
 
 Format as a simple numbered list (1. 2. 3. 4.)"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=400,
-            temperature=0.7
-        )
-        facts_text = response.choices[0].message.content.strip()
-        # Parse into list
-        facts = []
-        for line in facts_text.split('\n'):
-            line = line.strip()
-            # Remove numbering
-            if line and (line[0].isdigit() or line.startswith('-') or line.startswith('•')):
-                fact = line.lstrip('0123456789.-•) ').strip()
-                if fact:
-                    facts.append(fact)
-        return facts if facts else [facts_text]
-    except Exception:
-        return ["I'm having trouble thinking of facts right now!"]
+    return ChatJob(
+        "facts",
+        messages=[{"role": "user", "content": prompt}],
+        model="gpt-4o-mini",
+        max_tokens=400,
+        temperature=0.7,
+        parse=_parse_facts,
+        fallback=offline_facts(topic) or ["I'm having trouble thinking of facts right now!"]
+    )
+
+def generate_star_facts(topic: str) -> list[str]:
+    """Generate 3-5 kid-friendly facts about a topic"""
+    return star_facts_job(topic).run(get_openai_client())
 
 def generate_feelings_response(feeling: str, character_name: str) -> dict:
     """Generate validating response for a feeling with character"""
     client = get_openai_client()
+    fallback = offline_feelings(feeling, character_name) or {
+        "validation": f"It sounds like {character_name} is with you today. Your feelings make sense.",
+        "suggestion": "Would you like to try a bunny breath together?",
+        "reminder": "Feelings come and go, like clouds in the sky."
+    }
     if not client:
-        return {
-            "validation": "Your feelings make sense, whatever they are.",
-            "suggestion": "Maybe try taking a deep breath?",
-            "reminder": "You're doing okay."
-        }
+        return fallback
 
     prompt = f"""A 7-year-old girl has selected the feeling: {feeling}
 The emotion character is named: {character_name}
@@ -147,13 +529,14 @@ SUGGESTION: [text]
 REMINDER: [text]"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = complete_chat(
+            "feelings", client,
             messages=[{"role": "user", "content": prompt}],
+            model="gpt-4o-mini",
             max_tokens=300,
             temperature=0.7
         )
-        content = response.choices[0].message.content.strip()
+        content = content.strip()
 
         # Parse the response
         result = {"validation": "", "suggestion": "", "reminder": ""}
@@ -168,17 +551,15 @@ REMINDER: [text]"""
 
         return result
     except Exception:
-        return {
-            "validation": f"It sounds like {character_name} is with you today. Your feelings make sense.",
-            "suggestion": "Would you like to try a bunny breath together?",
-            "reminder": "Feelings come and go, like clouds in the sky."
-        }
+        get_resilience().note_fallback("feelings")
+        return fallback
 
 def generate_little_lesson(topic: str, child_name: str) -> str:
     """Generate psycho-education content for kids"""
     client = get_openai_client()
+    fallback = offline_lesson(topic) or "I'm having trouble explaining this right now!"
     if not client:
-        return "I'm having trouble explaining this right now. Try again soon!"
+        return fallback
 
     prompt = f"""Write a very short lesson about {topic} for a 7-year-old named {child_name}.
 
@@ -194,22 +575,20 @@ RULES:
 Write the lesson now:"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = complete_chat(
+            "lesson", client,
             messages=[{"role": "user", "content": prompt}],
+            model="gpt-4o-mini",
             max_tokens=400,
             temperature=0.7
         )
-        return response.choices[0].message.content.strip()
+        return content.strip()
     except Exception:
-        return "I'm having trouble explaining this right now!"
-
-def generate_daily_affirmation(child_name: str) -> str:
-    """Generate a gentle daily affirmation"""
-    client = get_openai_client()
-    if not client:
-        return f"{child_name}, I'm really glad you're here today."
+        get_resilience().note_fallback("lesson")
+        return fallback
 
+def daily_affirmation_job(child_name: str) -> ChatJob:
+    """Generation job for generate_daily_affirmation (also run by the generation service)"""
     prompt = f"""Write one short, gentle message for a 7-year-old girl named {child_name}.
 
 RULES:
@@ -222,22 +601,27 @@ RULES:
 
 Write the message now:"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100,
-            temperature=0.9
-        )
-        return response.choices[0].message.content.strip().strip('"')
-    except Exception:
-        return f"{child_name}, I'm really glad you're here today."
+    return ChatJob(
+        "affirmation",
+        messages=[{"role": "user", "content": prompt}],
+        model="gpt-4o-mini",
+        max_tokens=100,
+        temperature=0.9,
+        parse=lambda content: content.strip().strip('"'),
+        fallback=offline_affirmation(child_name) or f"{child_name}, I'm really glad you're here today."
+    )
+
+def generate_daily_affirmation(child_name: str) -> str:
+    """Generate a gentle daily affirmation"""
+    return daily_affirmation_job(child_name).run(get_openai_client())
 
 def answer_wonder_question(question: str, child_name: str) -> str:
     """Answer a wonder question safely"""
     client = get_openai_client()
+    fallback = (offline_wonder_answer(question)
+                or "That's such a good question! Keep wondering about the world.")
     if not client:
-        return "That's such a good question! I'm having trouble thinking right now, but keep wondering!"
+        return fallback
 
     prompt = f"""A 7-year-old named {child_name} asked: "{question}"
 
@@ -254,22 +638,20 @@ RULES:
 Answer now:"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = complete_chat(
+            "wonder_answer", client,
             messages=[{"role": "user", "content": prompt}],
+            model="gpt-4o-mini",
             max_tokens=200,
             temperature=0.7
         )
-        return response.choices[0].message.content.strip()
+        return content.strip()
     except Exception:
-        return "That's such a good question! Keep wondering about the world."
-
-def generate_wonder_question_prompt() -> str:
-    """Generate a fun wonder question suggestion"""
-    client = get_openai_client()
-    if not client:
-        return "What color do you think the wind would be if we could see it?"
+        get_resilience().note_fallback("wonder_answer")
+        return fallback
 
+def wonder_prompt_job() -> ChatJob:
+    """Generation job for generate_wonder_question_prompt (also run by the generation service)"""
     prompt = """Generate ONE fun, imaginative question for a 7-year-old.
 
 RULES:
@@ -286,16 +668,19 @@ Examples:
 
 Generate one question now:"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100,
-            temperature=0.9
-        )
-        return response.choices[0].message.content.strip().strip('"?') + '?'
-    except Exception:
-        return "If animals could talk, what do you think a bunny would say?"
+    return ChatJob(
+        "wonder_prompt",
+        messages=[{"role": "user", "content": prompt}],
+        model="gpt-4o-mini",
+        max_tokens=100,
+        temperature=0.9,
+        parse=lambda content: content.strip().strip('"?') + '?',
+        fallback=offline_wonder_prompt() or "If animals could talk, what do you think a bunny would say?"
+    )
+
+def generate_wonder_question_prompt() -> str:
+    """Generate a fun wonder question suggestion"""
+    return wonder_prompt_job().run(get_openai_client())
 
 def generate_routine_content(routine_type: str, child_name: str) -> dict:
     """Generate content for morning/afterschool/bedtime routines"""
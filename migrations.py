@@ -0,0 +1,277 @@
+"""
+Schema migrations for Little Star Rabbit's database
+Each migration runs once, in order, and is recorded in the schema_version table
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+# Arbitrary key for pg_advisory_xact_lock so only one process migrates at a time
+MIGRATION_LOCK_ID = 7_211_985
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: tuple
+    # SQLite spelling of the same change (None: the Postgres statements work as-is)
+    sqlite_statements: Optional[tuple] = None
+
+    def statements_for(self, dialect: str) -> tuple:
+        if dialect == "sqlite" and self.sqlite_statements is not None:
+            return self.sqlite_statements
+        return self.statements
+
+MIGRATIONS = [
+    Migration(1, "Create core tables", (
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id SERIAL PRIMARY KEY,
+            child_name VARCHAR(100) NOT NULL,
+            age INTEGER,
+            pronouns VARCHAR(50),
+            interests TEXT[],
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            title VARCHAR(200),
+            entry_text TEXT NOT NULL,
+            mood VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS wins (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            win_text TEXT NOT NULL,
+            win_type VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS unlocked_strengths (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            strength_id VARCHAR(100) NOT NULL,
+            strength_name VARCHAR(200),
+            unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(profile_id, strength_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS story_history (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            story_text TEXT NOT NULL,
+            story_length VARCHAR(20),
+            story_topic VARCHAR(100),
+            story_mood VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS app_settings (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            setting_key VARCHAR(100) NOT NULL,
+            setting_value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(profile_id, setting_key)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS usage_tracking (
+            id SERIAL PRIMARY KEY,
+            profile_id INTEGER REFERENCES profiles(id),
+            activity_type VARCHAR(100),
+            activity_count INTEGER DEFAULT 1,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ), sqlite_statements=(
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_name TEXT NOT NULL,
+            age INTEGER,
+            pronouns TEXT,
+            interests TEXT_LIST,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            title TEXT,
+            entry_text TEXT NOT NULL,
+            mood TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS wins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            win_text TEXT NOT NULL,
+            win_type TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS unlocked_strengths (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            strength_id TEXT NOT NULL,
+            strength_name TEXT,
+            unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(profile_id, strength_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS story_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            story_text TEXT NOT NULL,
+            story_length TEXT,
+            story_topic TEXT,
+            story_mood TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS app_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            setting_key TEXT NOT NULL,
+            setting_value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(profile_id, setting_key)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS usage_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            activity_type TEXT,
+            activity_count INTEGER DEFAULT 1,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    )),
+    # Databases created before journal titles existed (SQLite ones never did)
+    Migration(2, "Add title column to journal_entries", (
+        "ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS title VARCHAR(200)",
+    ), sqlite_statements=()),
+    # track_activity's ON CONFLICT needs this; merge any duplicate rows first
+    Migration(3, "Unique activity per profile in usage_tracking", (
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'usage_tracking_profile_activity_unique'
+            ) THEN
+                UPDATE usage_tracking keep
+                SET activity_count = dupes.total,
+                    last_activity = dupes.latest
+                FROM (
+                    SELECT MIN(id) AS id,
+                           SUM(activity_count) AS total,
+                           MAX(last_activity) AS latest
+                    FROM usage_tracking
+                    GROUP BY profile_id, activity_type
+                    HAVING COUNT(*) > 1
+                ) dupes
+                WHERE keep.id = dupes.id;
+
+                DELETE FROM usage_tracking extra
+                USING usage_tracking keep
+                WHERE extra.profile_id = keep.profile_id
+                  AND extra.activity_type = keep.activity_type
+                  AND extra.id > keep.id;
+
+                ALTER TABLE usage_tracking
+                ADD CONSTRAINT usage_tracking_profile_activity_unique
+                UNIQUE (profile_id, activity_type);
+            END IF;
+        END $$
+        """,
+    ), sqlite_statements=(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS usage_tracking_profile_activity_unique
+        ON usage_tracking (profile_id, activity_type)
+        """,
+    )),
+    # History pages read newest-first per profile (and page with created_at, id)
+    Migration(4, "Index history tables by profile and recency", (
+        """
+        CREATE INDEX IF NOT EXISTS journal_entries_profile_recent
+        ON journal_entries (profile_id, created_at DESC, id DESC)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS story_history_profile_recent
+        ON story_history (profile_id, created_at DESC, id DESC)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS wins_profile_recent
+        ON wins (profile_id, created_at DESC, id DESC)
+        """,
+    )),
+    # Per-day activity counts for the admin's usage trends
+    Migration(5, "Add usage_daily buckets", (
+        """
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            profile_id INTEGER REFERENCES profiles(id),
+            activity_date DATE NOT NULL,
+            activity_type VARCHAR(100) NOT NULL,
+            activity_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (profile_id, activity_date, activity_type)
+        )
+        """,
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def apply_migrations(conn, dialect: str = "postgres") -> list[int]:
+    """Apply pending migrations in one transaction and return their versions"""
+    cur = conn.cursor()
+
+    # Serialize migrations across processes sharing the database
+    if dialect == "sqlite":
+        cur.execute("BEGIN IMMEDIATE")
+    else:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_version")
+    applied_versions = {row["version"] for row in cur.fetchall()}
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied_versions:
+            continue
+        for statement in migration.statements_for(dialect):
+            cur.execute(statement)
+        cur.execute(
+            "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+            (migration.version, migration.description)
+        )
+        applied.append(migration.version)
+
+    conn.commit()
+    cur.close()
+    return applied
@@ -0,0 +1,107 @@
+"""
+Offline content pack for Little Star Rabbit
+Curated stories, facts, feelings responses, wonder prompts and answers, and
+affirmations that every generator can show instantly when there is no API
+key, the API is down, or an admin has chosen offline-only mode
+"""
+
+import json
+import random
+import re
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+OFFLINE_PACK_FILE = Path(__file__).parent / "content" / "offline_pack.json"
+
+_WORD = re.compile(r"[a-z]+")
+
+class OfflinePack:
+    """
+    The pack's content with lookup indexes built once
+
+    stories: (topic, mood) -> texts, plus topic -> texts for unknown moods
+    wonder_keywords: word -> answer index
+    """
+
+    def __init__(self, data: dict):
+        self.version = data.get("version", 1)
+        self.facts = data.get("facts", {})
+        self.feelings = data.get("feelings", {})
+        self.wonder_prompts = data.get("wonder_prompts", [])
+        self.wonder_answers = [entry["answer"] for entry in data.get("wonder_answers", [])]
+        self.wonder_answer_default = data.get("wonder_answer_default", [])
+        self.affirmations = data.get("affirmations", [])
+        self.lessons = data.get("lessons", {})
+
+        self.stories = {}
+        self.stories_by_topic = {}
+        for topic, entries in data.get("stories", {}).items():
+            for entry in entries:
+                self.stories_by_topic.setdefault(topic, []).append(entry["text"])
+                for mood in entry.get("moods", []):
+                    self.stories.setdefault((topic, mood), []).append(entry["text"])
+
+        self.wonder_keywords = {}
+        for index, entry in enumerate(data.get("wonder_answers", [])):
+            for keyword in entry.get("keywords", []):
+                self.wonder_keywords[keyword] = index
+
+@lru_cache(maxsize=1)
+def get_offline_pack(path: Path = OFFLINE_PACK_FILE) -> OfflinePack:
+    """The pack, read and indexed on first use only"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return OfflinePack(json.load(f))
+    except (OSError, ValueError):
+        # Missing or damaged pack: the generators' own one-line fallbacks still work
+        return OfflinePack({})
+
+def offline_story(topic: str, mood: str, child_name: str) -> Optional[str]:
+    """A curated story for the topic (matching the mood when one does)"""
+    pack = get_offline_pack()
+    stories = (pack.stories.get((topic, mood)) or pack.stories_by_topic.get(topic)
+               or [text for texts in pack.stories_by_topic.values() for text in texts])
+    if not stories:
+        return None
+    return random.choice(stories).replace("{name}", child_name)
+
+def offline_facts(topic: str, count: int = 4) -> Optional[list[str]]:
+    """count facts about one of the pack's topics, in a different order each time"""
+    facts = get_offline_pack().facts.get(topic.lower().strip())
+    if not facts:
+        return None
+    return random.sample(facts, min(count, len(facts)))
+
+def offline_feelings(feeling: str, character_name: str) -> Optional[dict]:
+    """Validation, suggestion and reminder for an emotion character"""
+    response = get_offline_pack().feelings.get(feeling)
+    if not response:
+        return None
+    return {part: text.replace("{character}", character_name)
+            for part, text in response.items()}
+
+def offline_wonder_prompt() -> Optional[str]:
+    prompts = get_offline_pack().wonder_prompts
+    return random.choice(prompts) if prompts else None
+
+def offline_wonder_answer(question: str) -> Optional[str]:
+    """An answer whose keywords appear in the question, or a gentle general reply"""
+    pack = get_offline_pack()
+    for word in _WORD.findall(question.lower()):
+        index = pack.wonder_keywords.get(word)
+        if index is not None:
+            return pack.wonder_answers[index]
+    return random.choice(pack.wonder_answer_default) if pack.wonder_answer_default else None
+
+def offline_affirmation(child_name: str) -> Optional[str]:
+    """Today's affirmation (the same one all day)"""
+    affirmations = get_offline_pack().affirmations
+    if not affirmations:
+        return None
+    return affirmations[date.today().toordinal() % len(affirmations)].replace("{name}", child_name)
+
+def offline_lesson(topic: str) -> Optional[str]:
+    lessons = get_offline_pack().lessons
+    return lessons.get(topic) or lessons.get("default")
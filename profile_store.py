@@ -0,0 +1,170 @@
+"""
+Profile store for Little Star Rabbit
+The children sharing a deployment, each with their own settings (the
+app_settings table), cached in memory per profile so a rerun doesn't touch
+the database. Saves write through to the database and replace the cached
+copy; a short TTL picks up edits made by other processes
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import streamlit as st
+
+import database as db
+from config_store import FrozenDict, freeze
+
+PROFILE_CACHE_TTL = 60.0  # seconds before a cached profile is re-read
+PROFILE_CACHE_SIZE = 256  # profiles kept in memory
+
+class _Entry:
+    def __init__(self, profile, overrides):
+        self.profile = profile      # frozen profiles row
+        self.overrides = overrides  # frozen {setting_key: value} from app_settings
+        self.loaded_at = time.monotonic()
+        self.defaults = None        # shared settings snapshot the merged view was built on
+        self.merged = None
+
+class ProfileStore:
+    """
+    Process-wide cache of profiles and their settings
+
+    A profile's row and settings are read together on first use (two
+    queries) and then served from memory until the TTL runs out. The merged
+    settings view is rebuilt only when the shared settings snapshot changes.
+    Updates go to the database first; only a successful write replaces the
+    cached copy, so the cache never shows a value the database doesn't have.
+    """
+
+    def __init__(self, ttl: float = PROFILE_CACHE_TTL, max_profiles: int = PROFILE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_profiles = max_profiles
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "failed": 0}
+        self._entries = OrderedDict()
+        self._profiles = None  # (loaded_at, frozen list of rows)
+        self._lock = threading.Lock()
+
+    def list_profiles(self) -> tuple:
+        """Every profile, oldest first"""
+        with self._lock:
+            if self._profiles is not None and not self._expired(self._profiles[0]):
+                self.stats["hits"] += 1
+                return self._profiles[1]
+            self.stats["misses"] += 1
+
+        profiles = freeze([dict(row) for row in db.list_profiles()])
+        with self._lock:
+            self._profiles = (time.monotonic(), profiles)
+        return profiles
+
+    def find_or_create(self, child_name: str, age=None, pronouns=None, interests=None) -> Optional[int]:
+        """Id of the profile with this name, created if there isn't one"""
+        for row in self.list_profiles():
+            if row["child_name"] == child_name:
+                return row["id"]
+        profile_id = db.create_or_get_profile(child_name, age=age, pronouns=pronouns,
+                                              interests=list(interests or []))
+        self.invalidate_list()
+        return profile_id
+
+    def profile(self, profile_id: int) -> Optional[FrozenDict]:
+        """A profile's row (None if it doesn't exist or couldn't be read)"""
+        entry = self._entry(profile_id)
+        return entry.profile if entry else None
+
+    def settings(self, profile_id: int, defaults: FrozenDict) -> FrozenDict:
+        """The shared settings with this profile's own values on top"""
+        entry = self._entry(profile_id)
+        if entry is None:
+            return defaults
+        with self._lock:
+            if entry.defaults is not defaults:
+                entry.merged = freeze({**defaults, **entry.overrides}) if entry.overrides else defaults
+                entry.defaults = defaults
+            return entry.merged
+
+    def overrides(self, profile_id: int) -> FrozenDict:
+        """Only the settings this profile has changed"""
+        entry = self._entry(profile_id)
+        return entry.overrides if entry else FrozenDict()
+
+    def save_settings(self, profile_id: int, values: dict) -> bool:
+        """Write some of a profile's settings through to the database"""
+        if not db.save_profile_settings(profile_id, values):
+            with self._lock:
+                self.stats["failed"] += 1
+            return False
+        with self._lock:
+            self.stats["writes"] += 1
+            entry = self._entries.get(profile_id)
+            if entry is not None:
+                entry.overrides = freeze({**entry.overrides, **values})
+                entry.defaults = entry.merged = None
+        return True
+
+    def update_profile(self, profile_id: int, child_name=None, age=None, pronouns=None,
+                       interests=None) -> bool:
+        """Write a profile's details through to the database"""
+        if interests is not None:
+            interests = list(interests)
+        if not db.update_profile(profile_id, child_name=child_name, age=age,
+                                 pronouns=pronouns, interests=interests):
+            with self._lock:
+                self.stats["failed"] += 1
+            return False
+        changes = {key: value for key, value in (("child_name", child_name), ("age", age),
+                                                ("pronouns", pronouns), ("interests", interests))
+                   if value is not None}
+        with self._lock:
+            self.stats["writes"] += 1
+            entry = self._entries.get(profile_id)
+            if entry is not None and entry.profile is not None:
+                entry.profile = freeze({**entry.profile, **changes})
+            self._profiles = None
+        return True
+
+    def invalidate(self, profile_id: Optional[int] = None):
+        """Re-read a profile (every profile if None) on its next use"""
+        with self._lock:
+            if profile_id is None:
+                self._entries.clear()
+                self._profiles = None
+            else:
+                self._entries.pop(profile_id, None)
+
+    def invalidate_list(self):
+        with self._lock:
+            self._profiles = None
+
+    def _entry(self, profile_id: int) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry is not None and not self._expired(entry.loaded_at):
+                self._entries.move_to_end(profile_id)
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+
+        row = db.get_profile(profile_id)
+        overrides = db.get_profile_settings(profile_id) if row else None
+        if row is None or overrides is None:
+            # Missing profile or a database error: don't cache, try again next time
+            return None
+
+        entry = _Entry(freeze(dict(row)), freeze(overrides))
+        with self._lock:
+            self._entries[profile_id] = entry
+            self._entries.move_to_end(profile_id)
+            while len(self._entries) > self.max_profiles:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at > self.ttl
+
+@st.cache_resource(show_spinner=False)
+def get_profile_store() -> ProfileStore:
+    """Profile store shared by all sessions in this process"""
+    return ProfileStore()
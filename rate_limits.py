@@ -0,0 +1,304 @@
+"""
+API rate limits and daily spend budget for Little Star Rabbit
+A token bucket per profile and endpoint stops button-mashing from turning
+into a stream of OpenAI calls, and a daily token/cost budget per profile,
+counted from the API's usage figures, caps what a day can cost. Refused
+calls raise UsageLimitExceeded and the generators fall back to cached or
+backup content
+"""
+
+import atexit
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+from config_store import get_config_store, thaw
+from tracing import get_tracer
+
+API_USAGE_FILE = Path("data/api_usage.json")
+USAGE_WRITE_DELAY = 2.0  # seconds of usage gathered into one write
+USAGE_REFRESH_INTERVAL = 30.0  # seconds before re-reading other processes' spend
+
+# USD per million tokens (input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+}
+# USD per million characters of read-aloud text
+SPEECH_PRICES = {
+    "tts-1": 15.00,
+    "tts-1-hd": 30.00,
+}
+
+DEFAULT_RATE_LIMITS = {
+    "requests_per_minute": 6,  # per profile and endpoint, after the burst
+    "burst": 10,
+    "daily_tokens": 100_000,
+    "daily_cost_usd": 0.50,
+}
+
+class UsageLimitExceeded(Exception):
+    """A profile hit its rate limit or daily budget; the call was not made"""
+
+@dataclass(frozen=True)
+class UsageLimits:
+    requests_per_minute: float
+    burst: int
+    daily_tokens: int
+    daily_cost_usd: float
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "UsageLimits":
+        limits = {**DEFAULT_RATE_LIMITS, **settings.get("rate_limits", {})}
+        return cls(
+            requests_per_minute=float(limits["requests_per_minute"]),
+            burst=int(limits["burst"]),
+            daily_tokens=int(limits["daily_tokens"]),
+            daily_cost_usd=float(limits["daily_cost_usd"]),
+        )
+
+@dataclass(frozen=True)
+class UsageScope:
+    """Whose calls these are, and under which limits"""
+    profile: str
+    limits: UsageLimits
+    pooled: bool = False  # made ahead of time for the story pool, not for a waiting child
+
+    @classmethod
+    def for_profile(cls, profile, settings: dict) -> "UsageScope":
+        return cls(str(profile), UsageLimits.from_settings(settings))
+
+# Profile being served (set by app.py on each rerun; captured by background jobs)
+_usage_scope: ContextVar[Optional[UsageScope]] = ContextVar("usage_scope", default=None)
+
+def set_usage_scope(scope: Optional[UsageScope]):
+    _usage_scope.set(scope)
+
+def get_usage_scope() -> Optional[UsageScope]:
+    return _usage_scope.get()
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters each) when the API doesn't report usage"""
+    return max(1, len(text) // 4)
+
+def chat_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4o"])
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+def speech_cost(model: str, characters: int) -> float:
+    return characters * SPEECH_PRICES.get(model, SPEECH_PRICES["tts-1-hd"]) / 1_000_000
+
+class TokenBucket:
+    """capacity requests at once, refilled at rate per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class UsageGovernor:
+    """
+    Rate limits and daily spend for every profile in the process
+
+    Buckets and daily totals are in memory, so admitting or recording a
+    call never waits on the disk. Changes are gathered for write_delay
+    seconds and then added to data/api_usage.json in one locked
+    read-modify-write (via the config store), which keeps other server
+    processes' spend; the merged file becomes the new in-memory view, and is
+    re-read in the background every refresh_interval seconds otherwise.
+    """
+
+    def __init__(self, path: Path = API_USAGE_FILE, write_delay: float = USAGE_WRITE_DELAY,
+                 refresh_interval: float = USAGE_REFRESH_INTERVAL):
+        self.path = path
+        self.write_delay = write_delay
+        self.refresh_interval = refresh_interval
+        self.stats = {"writes": 0, "failed": 0}
+        self._buckets = {}
+        self._usage = None    # profile -> day, as last read from the file
+        self._pending = {}    # profile -> changes to that day not yet written
+        self._writing = {}    # changes being written right now
+        self._read_at = 0.0
+        self._version = 0     # bumped whenever a newer view is installed
+        self._refreshing = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def admit(self, scope: Optional[UsageScope], endpoint: str):
+        """Raise UsageLimitExceeded if this call shouldn't be made; no scope means no limits"""
+        if scope is None:
+            return
+        limits = scope.limits
+
+        spent = self.today(scope.profile)
+        if spent["tokens"] >= limits.daily_tokens or spent["cost"] >= limits.daily_cost_usd:
+            self._refused(scope.profile)
+            raise UsageLimitExceeded(f"Daily AI budget used up for {scope.profile}")
+
+        with self._lock:
+            bucket = self._buckets.get((scope.profile, endpoint))
+            if bucket is None or bucket.capacity != limits.burst:
+                bucket = self._buckets[(scope.profile, endpoint)] = TokenBucket(
+                    limits.burst, limits.requests_per_minute / 60)
+            bucket.rate = limits.requests_per_minute / 60
+            allowed = bucket.take()
+        if not allowed:
+            self._refused(scope.profile)
+            raise UsageLimitExceeded(f"Too many {endpoint} requests for {scope.profile}")
+
+    def record(self, scope: Optional[UsageScope], tokens: int, cost: float):
+        """Add a completed call's usage to the profile's day"""
+        if scope is None:
+            return
+
+        def add(day):
+            day["requests"] += 1
+            day["tokens"] += tokens
+            day["cost"] = round(day["cost"] + cost, 6)
+
+        self._change(scope.profile, add)
+
+    def record_chat(self, scope: Optional[UsageScope], model: str, usage, prompt: str = "",
+                    completion: str = ""):
+        """record() from a chat response's usage (estimated if the response had none)"""
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(completion)
+        get_tracer().count("openai_prompt_tokens", prompt_tokens)
+        get_tracer().count("openai_completion_tokens", completion_tokens)
+        self.record(scope, prompt_tokens + completion_tokens,
+                    chat_cost(model, prompt_tokens, completion_tokens))
+
+    def today(self, profile: str) -> dict:
+        """Today's requests, tokens, cost and refused calls for a profile"""
+        with self._lock:
+            loaded = self._usage is not None
+            stale = loaded and not self._refreshing and \
+                time.monotonic() - self._read_at > self.refresh_interval
+            if stale:
+                self._refreshing = True
+        if not loaded:
+            # First use in this process: nothing to go on but the file
+            self._refresh()
+        elif stale:
+            threading.Thread(target=self._refresh, name="usage-refresh", daemon=True).start()
+
+        today = date.today().isoformat()
+        totals = {"requests": 0, "tokens": 0, "cost": 0.0, "refused": 0}
+        with self._lock:
+            for days in (self._usage or {}, self._writing, self._pending):
+                day = days.get(str(profile))
+                if day and day.get("date") == today:
+                    for key in totals:
+                        totals[key] += day.get(key, 0)
+        totals["cost"] = round(totals["cost"], 6)
+        return totals
+
+    def flush(self):
+        """Add the gathered changes to the usage file now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending or self._writing:
+                return
+            self._writing, self._pending = self._pending, {}
+            changes = self._writing
+
+        def add(usage):
+            for profile, change in changes.items():
+                day = self._day(usage, profile)
+                if day["date"] != change["date"]:
+                    continue  # Gathered before midnight: yesterday's totals are done with
+                for key in ("requests", "tokens", "refused"):
+                    day[key] += change[key]
+                day["cost"] = round(day["cost"] + change["cost"], 6)
+
+        try:
+            snapshot = self._store().update("api_usage", self.path, {}, add)
+        except OSError:
+            # Read-only data folder: keep the changes in memory (limits still
+            # apply) and try again with the next ones
+            with self._lock:
+                for profile, change in changes.items():
+                    self._merge(self._pending, profile, change)
+                self._writing = {}
+                self.stats["failed"] += 1
+            return
+        with self._lock:
+            self._usage = thaw(snapshot)
+            self._version += 1
+            self._read_at = time.monotonic()
+            self._writing = {}
+            self.stats["writes"] += 1
+
+    def _refused(self, profile: str):
+        def count(day):
+            day["refused"] += 1
+
+        self._change(profile, count)
+
+    def _change(self, profile: str, change):
+        with self._lock:
+            change(self._day(self._pending, profile))
+            if self._timer is None:
+                self._timer = threading.Timer(self.write_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _refresh(self):
+        with self._lock:
+            version = self._version
+        try:
+            usage = thaw(self._store().load("api_usage", self.path, {}))
+        except OSError:
+            usage = {}
+        with self._lock:
+            # A flush that finished meanwhile already installed a newer view
+            if self._version == version:
+                self._usage = usage
+                self._version += 1
+            self._read_at = time.monotonic()
+            self._refreshing = False
+
+    def _merge(self, days: dict, profile: str, change: dict):
+        day = self._day(days, profile)
+        if day["date"] == change["date"]:
+            for key in ("requests", "tokens", "refused"):
+                day[key] += change[key]
+            day["cost"] = round(day["cost"] + change["cost"], 6)
+
+    @staticmethod
+    def _day(usage: dict, profile: str) -> dict:
+        today = date.today().isoformat()
+        day = usage.get(str(profile))
+        if not day or day.get("date") != today:
+            day = usage[str(profile)] = {"date": today, "requests": 0, "tokens": 0,
+                                         "cost": 0.0, "refused": 0}
+        return day
+
+    @staticmethod
+    def _store():
+        return get_config_store()
+
+_governor = UsageGovernor()
+atexit.register(_governor.flush)
+
+def get_usage_governor() -> UsageGovernor:
+    return _governor
@@ -0,0 +1,219 @@
+"""
+Resilience layer for Little Star Rabbit's OpenAI calls
+Retries transient failures (429s, 5xx, dropped connections) with jittered
+exponential backoff inside a per-endpoint time budget, and trips a circuit
+breaker during an outage so clicks fail fast to fallback content instead of
+each one waiting out the HTTP timeout
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    timeout: float        # seconds per attempt
+    budget: float         # seconds for the whole call, retries and backoff included
+    max_attempts: int = 3
+
+ENDPOINTS = {
+    "chat": EndpointPolicy(timeout=20.0, budget=45.0),
+    "speech": EndpointPolicy(timeout=30.0, budget=60.0),
+}
+
+BACKOFF_BASE = 0.5  # seconds before the first retry (before jitter)
+BACKOFF_CAP = 8.0
+BREAKER_FAILURE_THRESHOLD = 5  # transient failures in a row that open the breaker
+BREAKER_RESET_AFTER = 30.0  # seconds open before one trial call is let through
+
+class CircuitOpenError(Exception):
+    """The API has been failing; the call was not attempted"""
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI error is worth another attempt"""
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, openai.APIStatusError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return False  # a billing problem, not a busy server
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff before retry number attempt (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """
+    Closed, open, half-open breaker for one endpoint
+
+    Opens after failure_threshold transient failures in a row. While open
+    every call is refused; after reset_after seconds a single trial call goes
+    through, and its outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_after: float = BREAKER_RESET_AFTER):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_after:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Count a transient failure; True if this opened the breaker"""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or (
+                    self.state == "closed" and self._failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def release(self):
+        """A trial call ended without telling us anything about the API"""
+        with self._lock:
+            self._trial_running = False
+
+class Resilience:
+    """
+    Retry and breaker policy shared by every OpenAI call in the process
+
+    call()/acall() take a function of the per-attempt timeout that makes one
+    request, so the SDK's own retries stay off (clients use max_retries=0).
+    """
+
+    def __init__(self, endpoints: dict = ENDPOINTS):
+        self.endpoints = endpoints
+        self.breakers = {name: CircuitBreaker() for name in endpoints}
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "breaker_trips": 0,
+                      "short_circuits": 0, "fallbacks": 0}
+        self.fallbacks_by_feature = {}
+        self._lock = threading.Lock()
+
+    def call(self, endpoint: str, request: Callable[[float], T]) -> T:
+        """Make a request with retries; raises the last error or CircuitOpenError"""
+        policy, breaker, deadline = self._begin(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = request(self._attempt_timeout(policy, deadline))
+            except Exception as e:
+                delay = self._after_failure(e, attempt, policy, breaker, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    async def acall(self, endpoint: str, request: Callable[[float], Awaitable[T]]) -> T:
+        """call() for coroutines (the generation service's event loop)"""
+        policy, breaker, deadline = self._begin(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await request(self._attempt_timeout(policy, deadline))
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                delay = self._after_failure(e, attempt, policy, breaker, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    def note_fallback(self, feature: str):
+        """A generator showed its canned content instead of a generated one"""
+        with self._lock:
+            self.stats["fallbacks"] += 1
+            self.fallbacks_by_feature[feature] = self.fallbacks_by_feature.get(feature, 0) + 1
+
+    def breaker_states(self) -> dict:
+        return {name: breaker.state for name, breaker in self.breakers.items()}
+
+    def _begin(self, endpoint: str):
+        policy = self.endpoints[endpoint]
+        breaker = self.breakers[endpoint]
+        self._count("calls")
+        if not breaker.allow():
+            self._count("short_circuits")
+            raise CircuitOpenError(f"OpenAI {endpoint} calls are paused after repeated failures")
+        return policy, breaker, time.monotonic() + policy.budget
+
+    @staticmethod
+    def _attempt_timeout(policy: EndpointPolicy, deadline: float) -> float:
+        return max(1.0, min(policy.timeout, deadline - time.monotonic()))
+
+    def _after_failure(self, error: Exception, attempt: int, policy: EndpointPolicy,
+                       breaker: CircuitBreaker, deadline: float) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up"""
+        if not is_retryable(error):
+            # The API answered (bad request, auth, ...): says nothing about an outage
+            breaker.release()
+            self._count("failures")
+            return None
+
+        delay = backoff_delay(attempt)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if (attempt >= policy.max_attempts or breaker.state != "closed"
+                or time.monotonic() + delay >= deadline):
+            self._count("failures")
+            if breaker.record_failure():
+                self._count("breaker_trips")
+            return None
+        self._count("retries")
+        return delay
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+# Process-wide: every session and background thread shares one view of the API's health
+_resilience = Resilience()
+
+def get_resilience() -> Resilience:
+    return _resilience
@@ -0,0 +1,219 @@
+"""
+Response cache for generated content
+In-memory LRU with an optional SQLite tier, keyed on everything that shapes a completion
+"""
+
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+# Per-feature policy:
+#   ttl      - seconds a cached response stays fresh
+#   variants - distinct responses to collect per key before serving from cache
+#   refresh  - chance of generating a new variant anyway (replacing the oldest)
+CACHE_POLICIES = {
+    "story": {"ttl": 6 * 3600, "variants": 4, "refresh": 0.25},
+    "facts": {"ttl": 7 * 86400, "variants": 2, "refresh": 0.0},
+    "lesson": {"ttl": 7 * 86400, "variants": 1, "refresh": 0.0},
+    "feelings": {"ttl": 86400, "variants": 3, "refresh": 0.1},
+    "wonder_answer": {"ttl": 86400, "variants": 1, "refresh": 0.0},
+    "wonder_prompt": {"ttl": 86400, "variants": 8, "refresh": 0.2},
+    "affirmation": {"ttl": 86400, "variants": 5, "refresh": 0.2},
+}
+DEFAULT_POLICY = {"ttl": 3600, "variants": 1, "refresh": 0.0}
+
+MAX_DISK_ENTRIES = 5000  # rows kept in the SQLite tier
+SWEEP_EVERY = 100  # puts between sweeps of expired and excess rows
+
+def make_cache_key(feature: str, model: str, messages: list[dict], temperature: float,
+                   max_tokens: int, safety: Optional[dict] = None) -> str:
+    """Stable hash of a request; whitespace in prompts doesn't change the key"""
+    normalized = {
+        "feature": feature,
+        "model": model,
+        "messages": [
+            {"role": m["role"], "content": " ".join(m["content"].split())}
+            for m in messages
+        ],
+        "temperature": round(float(temperature), 2),
+        "max_tokens": int(max_tokens),
+        "safety": safety or {},
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Thread-safe response cache shared by every session in the process
+
+    Each key holds a small list of (text, created_at) variants so repeated
+    requests for the same story settings don't return the same text every time.
+    """
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[Path] = None,
+                 policies: Optional[dict] = None, max_disk_entries: int = MAX_DISK_ENTRIES,
+                 sweep_every: int = SWEEP_EVERY):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.sweep_every = sweep_every
+        self.policies = policies or CACHE_POLICIES
+        self._puts_since_sweep = 0
+        self._entries = OrderedDict()
+        self._last_served = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path is not None:
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    feature TEXT NOT NULL,
+                    variants TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("""
+                CREATE INDEX IF NOT EXISTS response_cache_updated
+                ON response_cache (updated_at)
+            """)
+            self._db.commit()
+            self._sweep()
+
+    def policy(self, feature: str) -> dict:
+        return self.policies.get(feature, DEFAULT_POLICY)
+
+    def get(self, feature: str, key: str) -> Optional[str]:
+        """Cached text for this key, or None if a fresh generation is wanted"""
+        policy = self.policy(feature)
+        with self._lock:
+            variants = self._load(key)
+            now = time.time()
+            fresh = [v for v in variants if now - v[1] < policy["ttl"]]
+            if len(fresh) != len(variants):
+                # Memory only: expired rows on disk go at the next put or sweep
+                self._forget_expired(key, fresh)
+
+            if len(fresh) < policy["variants"] or random.random() < policy["refresh"]:
+                self._count(feature, "misses")
+                return None
+
+            # Avoid serving the same variant twice in a row
+            last = self._last_served.get(key)
+            choices = [v for v in fresh if v[0] != last] or fresh
+            text = random.choice(choices)[0]
+            self._last_served[key] = text
+            self._count(feature, "hits")
+            return text
+
+    def put(self, feature: str, key: str, text: str):
+        """Add a newly generated response, dropping the oldest beyond the variant limit"""
+        policy = self.policy(feature)
+        with self._lock:
+            now = time.time()
+            variants = [v for v in self._load(key)
+                        if v[0] != text and now - v[1] < policy["ttl"]]
+            variants.append((text, now))
+            self._store(key, feature, variants[-policy["variants"]:])
+            self._last_served[key] = text
+
+            self._puts_since_sweep += 1
+            if self._puts_since_sweep >= self.sweep_every:
+                self._sweep()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_served.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hits, misses and hit rate per feature"""
+        with self._lock:
+            report = {}
+            for feature, counts in self._stats.items():
+                total = counts["hits"] + counts["misses"]
+                report[feature] = {
+                    **counts,
+                    "hit_rate": counts["hits"] / total if total else 0.0,
+                }
+            return report
+
+    def _count(self, feature: str, outcome: str):
+        counts = self._stats.setdefault(feature, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def _load(self, key: str) -> list:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return list(self._entries[key])
+
+        if self._db is None:
+            return []
+        row = self._db.execute(
+            "SELECT variants FROM response_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return []
+        variants = [tuple(v) for v in json.loads(row[0])]
+        self._remember(key, variants)
+        return list(variants)
+
+    def _forget_expired(self, key: str, fresh: list):
+        if fresh:
+            self._remember(key, fresh)
+        else:
+            self._entries.pop(key, None)
+            self._last_served.pop(key, None)
+
+    def _store(self, key: str, feature: str, variants: list):
+        self._remember(key, variants)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (cache_key, feature, variants, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, feature, json.dumps(variants), time.time())
+            )
+            self._db.commit()
+
+    def _sweep(self):
+        """
+        Delete expired rows and the oldest beyond max_disk_entries
+
+        A row's updated_at is its newest variant, so once that is past the
+        feature's ttl every variant in the row has expired.
+        """
+        self._puts_since_sweep = 0
+        if self._db is None:
+            return
+        now = time.time()
+        for feature, policy in self.policies.items():
+            self._db.execute("DELETE FROM response_cache WHERE feature = ? AND updated_at < ?",
+                             (feature, now - policy["ttl"]))
+        placeholders = ", ".join("?" * len(self.policies))
+        self._db.execute(
+            f"DELETE FROM response_cache WHERE feature NOT IN ({placeholders}) AND updated_at < ?",
+            (*self.policies, now - DEFAULT_POLICY["ttl"]))
+        self._db.execute("""
+            DELETE FROM response_cache WHERE cache_key IN (
+                SELECT cache_key FROM response_cache
+                ORDER BY updated_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
+        self._db.commit()
+
+    def _remember(self, key: str, variants: list):
+        self._entries[key] = variants
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._last_served.pop(evicted, None)
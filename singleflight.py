@@ -0,0 +1,80 @@
+"""
+Single-flight request deduplication for Little Star Rabbit
+When identical OpenAI requests overlap (a double tap, two tabs on one
+profile, the story pool refilling what a child just asked for), only the
+first goes to the API; the others wait for it and share its result
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    In-flight calls keyed by request
+
+    The shared handle is a concurrent.futures.Future, so threads (script
+    runs, the TTS pool) and the generation service's event loop can all wait
+    on the same call. Errors are shared too: a follower raises what the
+    leader raised. Nothing is kept once a call finishes; repeat requests are
+    the response cache's job.
+    """
+
+    def __init__(self):
+        self.stats = {"led": 0, "shared": 0}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: Hashable) -> tuple[Future, bool]:
+        """The call for key and whether we lead it (make the request) or follow"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.stats["led"] += 1
+            return future, True
+
+    def finish(self, key: Hashable, future: Future, result=None, error: BaseException = None):
+        """Leader only: publish the outcome to every follower"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, call: Callable[[], T]) -> T:
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result()
+        try:
+            result = call()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    async def ado(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future, leader = self.begin(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await call()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+# Process-wide so requests from every session are deduplicated together
+_flights = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    return _flights
@@ -0,0 +1,123 @@
+"""
+Pre-generated story pool for Little Star Rabbit
+Keeps a few ready stories per profile and length/topic/mood so pressing
+"Tell me a story!" can be served instantly, refilling in the background
+"""
+
+import hashlib
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Optional
+
+import streamlit as st
+
+def settings_fingerprint(settings: dict, profile: dict) -> str:
+    """Hash of everything that should make pooled stories stale when it changes"""
+    relevant = {
+        "banned_topics": settings.get("banned_topics"),
+        "reading_level": settings.get("reading_level"),
+        "custom_word_filters": sorted(settings.get("custom_word_filters", [])),
+        "model": settings.get("model"),
+        "temperature": settings.get("temperature"),
+        "max_tokens": settings.get("max_tokens"),
+        "child_name": profile.get("child_name"),
+        "age": profile.get("age"),
+        "interests": list(profile.get("interests", [])),
+    }
+    payload = json.dumps(relevant, sort_keys=True, default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class StoryPool:
+    """
+    Thread-safe pool of ready stories keyed by (profile, length, topic, mood)
+
+    Refills run on a small background executor and stop once the profile's
+    daily pre-generation budget is spent. Pools are dropped whenever a
+    profile's settings fingerprint changes.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.stats = {"served": 0, "empty": 0, "generated": 0, "failed": 0, "invalidated": 0}
+        self._stories = {}
+        self._fingerprints = {}
+        self._in_flight = set()
+        self._budget_day = date.today()
+        self._budget_used = {}  # profile_key -> stories pre-generated today
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="story-pool")
+
+    def sync(self, profile_key, fingerprint: str):
+        """Drop a profile's pooled stories if its settings changed"""
+        with self._lock:
+            if self._fingerprints.get(profile_key) == fingerprint:
+                return
+            self._fingerprints[profile_key] = fingerprint
+            stale = [key for key in self._stories if key[0] == profile_key]
+            for key in stale:
+                self.stats["invalidated"] += len(self._stories.pop(key))
+
+    def take(self, key: tuple) -> Optional[str]:
+        """Pop a ready story, or None if this combination's pool is empty"""
+        with self._lock:
+            stories = self._stories.get(key)
+            if stories:
+                self.stats["served"] += 1
+                return stories.popleft()
+            self.stats["empty"] += 1
+            return None
+
+    def warm(self, key: tuple, generate: Callable[[], Optional[str]], target_size: int = 2,
+             daily_budget: int = 30):
+        """Schedule one background generation if the pool is below target and budget allows"""
+        with self._lock:
+            if self._budget_day != date.today():
+                self._budget_day = date.today()
+                self._budget_used.clear()
+
+            ready = len(self._stories.get(key, ()))
+            used = self._budget_used.get(key[0], 0)
+            if key in self._in_flight or ready >= target_size or used >= daily_budget:
+                return
+            self._in_flight.add(key)
+            self._budget_used[key[0]] = used + 1
+            fingerprint = self._fingerprints.get(key[0])
+
+        self._executor.submit(self._refill, key, generate, fingerprint, target_size, daily_budget)
+
+    def _refill(self, key, generate, fingerprint, target_size, daily_budget):
+        try:
+            story = generate()
+        except Exception:
+            story = None
+
+        with self._lock:
+            self._in_flight.discard(key)
+            if not story:
+                self.stats["failed"] += 1
+                return
+            # Settings changed while we were generating: this story is stale
+            if self._fingerprints.get(key[0]) != fingerprint:
+                self.stats["invalidated"] += 1
+                return
+            self._stories.setdefault(key, deque()).append(story)
+            self.stats["generated"] += 1
+
+        # Keep going until the pool is full (each step re-checks the budget)
+        self.warm(key, generate, target_size, daily_budget)
+
+    def budget_used_today(self, profile_key=None) -> int:
+        """Stories pre-generated today for one profile (all profiles if None)"""
+        with self._lock:
+            if self._budget_day != date.today():
+                return 0
+            if profile_key is None:
+                return sum(self._budget_used.values())
+            return self._budget_used.get(profile_key, 0)
+
+@st.cache_resource(show_spinner=False)
+def get_story_pool() -> StoryPool:
+    """Story pool shared by all sessions in this process"""
+    return StoryPool()
@@ -0,0 +1,234 @@
+"""
+Lightweight tracing for Little Star Rabbit
+Timing spans around the hot paths of a rerun (CSS, database, config loads,
+OpenAI, TTS), a ring buffer of recent reruns, and p50/p95 summaries for the
+admin Performance tab, optionally exported in Prometheus text format
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+METRICS_EXPORT_FILE = Path("data/metrics.prom")
+METRICS_EXPORT_INTERVAL = 10.0  # seconds between Prometheus file writes
+TRACE_BUFFER_SIZE = 50  # recent reruns kept
+SPAN_SAMPLES = 500  # recent durations kept per span name for percentiles
+
+@dataclass
+class Span:
+    name: str
+    start: float  # seconds after the trace began
+    duration: float
+    depth: int
+    error: bool = False
+
+@dataclass
+class Trace:
+    """One rerun: when it started, how long it took, and the spans inside it"""
+    name: str
+    started_at: float  # wall clock
+    spans: list = field(default_factory=list)
+    duration: Optional[float] = None
+    _began: float = field(default_factory=time.perf_counter)
+    _depth: int = 0
+
+# Rerun being traced on this script thread (set by begin_trace)
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Tracer:
+    """
+    Span timings for the whole process
+
+    Every span's duration goes into a per-name sample window used for
+    percentiles. Spans inside a traced rerun (on the script thread) are also
+    kept on that rerun's Trace; spans on background threads (story pool, TTS
+    workers, the generation loop) only feed the windows.
+    """
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE, samples: int = SPAN_SAMPLES):
+        self.traces = deque(maxlen=buffer_size)
+        self.counters = {}
+        self._samples_size = samples
+        self._samples = {}
+        self._totals = {}  # name -> [count, seconds, errors] since start
+        self._lock = threading.Lock()
+        self._exported_at = 0.0
+
+    def begin_trace(self, name: str) -> Trace:
+        trace = Trace(name, time.time())
+        _current_trace.set(trace)
+        return trace
+
+    def end_trace(self, trace: Trace):
+        trace.duration = time.perf_counter() - trace._began
+        if _current_trace.get() is trace:
+            _current_trace.set(None)
+        self._record(trace.name, trace.duration, False)
+        with self._lock:
+            self.traces.append(trace)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        trace = _current_trace.get()
+        began = time.perf_counter()
+        depth = 0
+        if trace is not None:
+            depth = trace._depth
+            trace._depth += 1
+        error = False
+        try:
+            yield
+        except Exception:
+            # Not BaseException: st.rerun()/st.stop() and closed generators aren't failures
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - began
+            if trace is not None:
+                trace._depth -= 1
+                trace.spans.append(Span(name, began - trace._began, duration, depth, error))
+            self._record(name, duration, error)
+
+    def traced(self, name: str):
+        """Decorator: run the function inside span(name)"""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name: str, seconds: float):
+        """Add a duration measured outside a span (e.g. across a generator's yields)"""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(Span(name, time.perf_counter() - seconds - trace._began,
+                                    seconds, trace._depth))
+        self._record(name, seconds, False)
+
+    def count(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> dict:
+        """count, errors, p50, p95, max and total seconds per span name"""
+        with self._lock:
+            windows = {name: sorted(samples) for name, samples in self._samples.items()}
+            totals = {name: list(total) for name, total in self._totals.items()}
+        return {
+            name: {
+                "count": totals[name][0],
+                "errors": totals[name][2],
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "max": values[-1] if values else 0.0,
+                "total": totals[name][1],
+            }
+            for name, values in windows.items()
+        }
+
+    def recent_traces(self, limit: int = 10) -> list[Trace]:
+        """Newest first"""
+        with self._lock:
+            return list(self.traces)[-limit:][::-1]
+
+    def prometheus_text(self, gauges: Optional[dict] = None) -> str:
+        """
+        Span summaries, counters and any extra gauges in Prometheus text format
+
+        gauges maps a metric name to a value, or to {label value: value} for a
+        metric with one "name" label.
+        """
+        lines = [
+            "# HELP little_star_span_seconds Time spent in traced code paths",
+            "# TYPE little_star_span_seconds summary",
+        ]
+        for name, stats in sorted(self.summary().items()):
+            label = _label(name)
+            lines.append(f'little_star_span_seconds{{span="{label}",quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'little_star_span_seconds{{span="{label}",quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f'little_star_span_seconds_sum{{span="{label}"}} {stats["total"]:.6f}')
+            lines.append(f'little_star_span_seconds_count{{span="{label}"}} {stats["count"]}')
+
+        with self._lock:
+            counters = dict(self.counters)
+        for name, value in sorted(counters.items()):
+            metric = f"little_star_{_metric(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        for name, value in sorted((gauges or {}).items()):
+            metric = f"little_star_{_metric(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            if isinstance(value, dict):
+                for label, item in sorted(value.items()):
+                    lines.append(f'{metric}{{name="{_label(label)}"}} {item}')
+            else:
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: Path = METRICS_EXPORT_FILE, gauges: Optional[dict] = None,
+                          min_interval: float = METRICS_EXPORT_INTERVAL) -> bool:
+        """Write prometheus_text() to path (atomically), at most once per min_interval"""
+        now = time.monotonic()
+        with self._lock:
+            if self._exported_at and now - self._exported_at < min_interval:
+                return False
+            self._exported_at = now
+        path = Path(path)
+        temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp.write_text(self.prometheus_text(gauges))
+            os.replace(temp, path)
+            return True
+        except OSError:
+            return False
+
+    def _record(self, name: str, duration: float, error: bool):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._samples_size)
+                self._totals[name] = [0, 0.0, 0]
+            samples.append(duration)
+            total = self._totals[name]
+            total[0] += 1
+            total[1] += duration
+            total[2] += error
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def _metric(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name.lower())
+
+# Process-wide so every session's reruns and every background thread report together
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str):
+    """Shortcut for get_tracer().span(name)"""
+    return _tracer.span(name)
+
+def traced(name: str):
+    """Shortcut for get_tracer().traced(name)"""
+    return _tracer.traced(name)
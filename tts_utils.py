@@ -4,34 +4,261 @@ Provides reusable audio playback components
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
+from streamlit import runtime
+from concurrent.futures import Future, ThreadPoolExecutor
 from openai import OpenAI
 from pathlib import Path
-import tempfile
+from typing import Optional
 import base64
+import re
+import textwrap
+import time
+
+from audio_cache import AudioCache, audio_cache_key
+from rate_limits import (
+    UsageLimitExceeded, UsageScope, get_usage_governor, get_usage_scope, speech_cost
+)
+from resilience import get_resilience
+from singleflight import get_single_flight
+from tracing import get_tracer, span
+
+TTS_MODEL = "tts-1"
+TTS_VOICE = "nova"  # Warm, friendly female voice
+TTS_SPEED = 0.9  # Slightly slower for young children
+
+# Read-aloud text is synthesized in sentence-sized chunks, in parallel. The
+# first chunk is kept short so it comes back quickly and starts playing while
+# the rest are still being made; the others stay well under the API's
+# 4096-character input limit.
+TTS_FIRST_CHUNK_CHARS = 200
+TTS_CHUNK_CHARS = 1000
+TTS_WORKERS = 8
+TTS_CHUNK_TIMEOUT = 60  # seconds to wait for one chunk
+
+SPEECH_RESTING_MESSAGE = "🐇 Little Star Rabbit's voice needs a little rest. Let's read it together instead!"
+
+_SENTENCE_BREAK = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["”’)]))\s+')
+
+_read_aloud_player = components.declare_component(
+    "read_aloud_player", path=str(Path(__file__).parent / "components" / "read_aloud_player")
+)
+
+@st.cache_resource(show_spinner=False)
+def get_audio_cache() -> AudioCache:
+    """On-disk audio cache shared by all sessions"""
+    return AudioCache()
+
+@st.cache_resource(show_spinner=False)
+def get_tts_executor() -> ThreadPoolExecutor:
+    """Worker threads that synthesize read-aloud chunks for all sessions"""
+    return ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
 
 def get_tts_client():
-    """Get OpenAI client for TTS"""
+    """Shared OpenAI client (the same one the story generators use)"""
     from gpt_utils import get_openai_client
     return get_openai_client()
 
-def text_to_speech(text: str) -> bytes:
-    """Convert text to speech audio bytes"""
-    client = get_tts_client()
+def _synthesize(client: Optional[OpenAI], audio_cache: AudioCache, text: str, voice: str,
+                model: str, speed: float, scope: Optional[UsageScope] = None) -> Optional[bytes]:
+    """
+    Audio for text from the cache or the API (safe to call off the script thread)
+
+    Identical clips already being synthesized are joined, not requested twice.
+    """
+    key = audio_cache_key(text, voice, model, speed)
+    cached = audio_cache.get(key)
+    if cached is not None:
+        return cached
     if not client:
         return None
 
-    try:
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="nova",  # Warm, friendly female voice
-            input=text,
-            speed=0.9  # Slightly slower for young children
-        )
+    def request() -> bytes:
+        with span("openai.speech"):
+            response = get_resilience().call("speech", lambda timeout: client.audio.speech.create(
+                model=model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                timeout=timeout
+            ))
+        get_tracer().count("tts_characters", len(text))
+        get_usage_governor().record(scope, 0, speech_cost(model, len(text)))
+        audio_cache.put(key, response.content)
         return response.content
-    except Exception as e:
+
+    from gpt_utils import flight_key
+    return get_single_flight().do(flight_key("speech", key, scope), request)
+
+def _admit_speech(audio_cache: AudioCache, texts: list[str], voice: str, model: str,
+                  speed: float, scope: Optional[UsageScope]):
+    """One rate-limit and budget check per read-aloud, unless it is all cached already"""
+    if all(audio_cache.path_for(audio_cache_key(text, voice, model, speed)).exists()
+           for text in texts):
+        return
+    get_usage_governor().admit(scope, "speech")
+
+def text_to_speech(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL,
+                   speed: float = TTS_SPEED) -> bytes:
+    """Convert text to speech audio bytes, reusing cached audio when possible"""
+    audio_cache = get_audio_cache()
+    scope = get_usage_scope()
+    try:
+        _admit_speech(audio_cache, [text], voice, model, speed, scope)
+        return _synthesize(get_tts_client(), audio_cache, text, voice, model, speed, scope)
+    except UsageLimitExceeded:
+        st.info(SPEECH_RESTING_MESSAGE)
+        return None
+    except Exception:
         st.error("Couldn't create audio right now")
         return None
 
+def split_for_speech(text: str, first_chars: int = TTS_FIRST_CHUNK_CHARS,
+                     chunk_chars: int = TTS_CHUNK_CHARS) -> list[str]:
+    """
+    Split text into chunks at sentence boundaries
+
+    The first chunk holds as many sentences as fit in first_chars (at least
+    one), later ones up to chunk_chars. Only a sentence longer than
+    chunk_chars is broken between words.
+    """
+    sentences = []
+    for sentence in _SENTENCE_BREAK.split(text.strip()):
+        sentence = " ".join(sentence.split())
+        if sentence:
+            sentences.extend(textwrap.wrap(sentence, chunk_chars, break_long_words=False))
+
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        limit = first_chars if not chunks else chunk_chars
+        if current and len(current) + 1 + len(sentence) > limit:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def speech_chunks(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL,
+                  speed: float = TTS_SPEED) -> list[Future]:
+    """
+    Start synthesizing every chunk of text at once; futures in reading order
+
+    Raises UsageLimitExceeded if the profile can't make the request right now.
+    """
+    client = get_tts_client()
+    audio_cache = get_audio_cache()
+    executor = get_tts_executor()
+    scope = get_usage_scope()
+    chunks = split_for_speech(text)
+    _admit_speech(audio_cache, chunks, voice, model, speed, scope)
+    return [
+        executor.submit(_synthesize, client, audio_cache, chunk, voice, model, speed, scope)
+        for chunk in chunks
+    ]
+
+def _chunk_audio(chunk: Future, timeout: Optional[float] = None) -> Optional[bytes]:
+    try:
+        return chunk.result(timeout=timeout)
+    except Exception:
+        return None
+
+def audio_url(audio_bytes: Optional[bytes], coordinates: str) -> Optional[str]:
+    """
+    URL the browser can fetch audio from
+
+    Clips are registered with Streamlit's media file manager and served from
+    its /media endpoint (range requests, browser caching), so reruns only
+    send the short URL instead of the whole clip. Registrations last for the
+    session's current and next script run, so call this on every rerun that
+    still shows the clip. coordinates names the clip's place on the page.
+    The URL goes into a component iframe, which doesn't resolve it against
+    server.baseUrlPath, so the configured prefix is added here. Falls back to
+    an inline data URI without a Streamlit runtime.
+    """
+    if not audio_bytes:
+        return None
+    if runtime.exists():
+        try:
+            url = runtime.get_instance().media_file_mgr.add(audio_bytes, "audio/mpeg", coordinates)
+            return _base_url_path() + url if url.startswith("/") else url
+        except Exception:
+            pass
+    return f"data:audio/mp3;base64,{base64.b64encode(audio_bytes).decode()}"
+
+def _base_url_path() -> str:
+    """server.baseUrlPath as a "/prefix" (empty when served from the root)"""
+    path = (st.get_option("server.baseUrlPath") or "").strip("/")
+    return f"/{path}" if path else ""
+
+# ============================================================================
+# READ-ALOUD PLAYBACK
+# ============================================================================
+
+def _new_player_event(player_key: str, epoch: int) -> Optional[dict]:
+    """The player's latest event for this playback, if it hasn't been handled yet"""
+    event = st.session_state.get(player_key)
+    if not event or event.get("epoch") != epoch:
+        return None
+    if event.get("id") == st.session_state.get(f"{player_key}_handled"):
+        return None
+    st.session_state[f"{player_key}_handled"] = event.get("id")
+    return event
+
+def start_read_aloud(text: str, unique_key: str) -> bool:
+    """
+    Start reading text aloud; waits for the first chunk only
+
+    The player (render_read_aloud_player) starts on that chunk and collects
+    the rest as they finish.
+    """
+    try:
+        chunks = speech_chunks(text)
+    except UsageLimitExceeded:
+        st.info(SPEECH_RESTING_MESSAGE)
+        return False
+    with span("tts.first_chunk"):
+        first = _chunk_audio(chunks[0], TTS_CHUNK_TIMEOUT) if chunks else None
+    if not first:
+        st.error("Couldn't create audio right now")
+        return False
+    st.session_state[f"read_aloud_{unique_key}"] = {"chunks": chunks, "epoch": time.time_ns()}
+    return True
+
+def render_read_aloud_player(unique_key: str) -> bool:
+    """
+    Keep playing whatever start_read_aloud began for unique_key
+
+    The browser plays the clips it has in order and, while more are due,
+    asks for them (one rerun, which waits for the next chunk). It reports
+    when it has played everything, and the player goes away. Returns True
+    while audio is playing.
+    """
+    state_key = f"read_aloud_{unique_key}"
+    playback = st.session_state.get(state_key)
+    if not playback:
+        return False
+
+    player_key = f"tts_player_{unique_key}"
+    event = _new_player_event(player_key, playback["epoch"])
+    if event and event.get("event") == "done":
+        del st.session_state[state_key]
+        return False
+    if event and event.get("event") == "more" and event.get("have", 0) < len(playback["chunks"]):
+        _chunk_audio(playback["chunks"][event["have"]], TTS_CHUNK_TIMEOUT)
+
+    clips = []
+    for index, chunk in enumerate(playback["chunks"]):
+        if not chunk.done():
+            break
+        clips.append(audio_url(_chunk_audio(chunk), f"read_aloud.{unique_key}.{index}"))
+
+    _read_aloud_player(clips=clips, total=len(playback["chunks"]), epoch=playback["epoch"],
+                       key=player_key, default=None)
+    return True
+
 def render_read_aloud(text: str, label: str = "Read this aloud", unique_key: str = None):
     """
     Render text with a play/pause button for TTS
@@ -64,28 +291,13 @@ def render_read_aloud(text: str, label: str = "Read this aloud", unique_key: str
     with col2:
         if st.button(f"🔊 {label}", key=f"tts_{unique_key}", use_container_width=True):
             with st.spinner("Creating audio..."):
-                audio_bytes = text_to_speech(text)
-                if audio_bytes:
-                    # Create audio player
-                    audio_base64 = base64.b64encode(audio_bytes).decode()
-                    audio_html = f"""
-                        <audio autoplay>
-                            <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                        </audio>
-                    """
-                    st.markdown(audio_html, unsafe_allow_html=True)
-                    st.success("🎵 Playing!")
+                start_read_aloud(text, unique_key)
+        if render_read_aloud_player(unique_key):
+            st.success("🎵 Playing!")
 
 def render_read_aloud_simple(text: str, unique_key: str):
     """Simpler version that just shows a button"""
     if st.button(f"🔊 Read this aloud", key=f"tts_{unique_key}", use_container_width=True):
         with st.spinner("Creating audio..."):
-            audio_bytes = text_to_speech(text)
-            if audio_bytes:
-                audio_base64 = base64.b64encode(audio_bytes).decode()
-                audio_html = f"""
-                    <audio autoplay>
-                        <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                    </audio>
-                """
-                st.markdown(audio_html, unsafe_allow_html=True)
+            start_read_aloud(text, unique_key)
+    render_read_aloud_player(unique_key)
@@ -0,0 +1,147 @@
+"""
+Banned-word matching for generated content
+An Aho-Corasick automaton over case-folded filter terms that matches whole
+words, and can scan streamed text chunk by chunk
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# Endings that still count as the banned word ("monster" also blocks "monsters")
+ALLOWED_SUFFIXES = ("", "s", "es", "'", "’", "'s", "’s", "s'", "s’")
+_MAX_SUFFIX = max(len(suffix) for suffix in ALLOWED_SUFFIXES)
+
+class BannedContentError(Exception):
+    """Generated text contained a custom banned word"""
+
+    def __init__(self, word: str):
+        super().__init__(f"Generated text contained a banned word: {word}")
+        self.word = word
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+class BannedWordMatcher:
+    """Compiled matcher for a set of banned words (build once per filter list)"""
+
+    def __init__(self, words: Iterable[str]):
+        words = list(words)
+        self.words = tuple(sorted({w.strip().casefold() for w in words if w.strip()}))
+        self._display = {}
+        for word in words:
+            self._display.setdefault(word.strip().casefold(), word.strip())
+
+        # Trie transitions, failure links, and the terms ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for term in self.words:
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state] = self._out[state] + (term,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and ch not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        self.max_term_length = max((len(term) for term in self.words), default=0)
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def find(self, text: str) -> Optional[str]:
+        """First banned word in text, or None"""
+        if not self.words:
+            return None
+        scanner = self.scanner()
+        return scanner.feed(text) or scanner.finish()
+
+    def scanner(self) -> "StreamScanner":
+        return StreamScanner(self)
+
+    def _step(self, state: int, ch: str) -> int:
+        goto = self._goto
+        while state and ch not in goto[state]:
+            state = self._fail[state]
+        return goto[state].get(ch, 0)
+
+class StreamScanner:
+    """
+    Incremental scan over streamed text
+
+    A match can only be confirmed once the character after it is known, so a
+    word at the very end of a chunk is held until the next chunk (or finish()).
+    """
+
+    def __init__(self, matcher: BannedWordMatcher):
+        self.matcher = matcher
+        self._state = 0
+        self._recent = deque(maxlen=matcher.max_term_length + 1)
+        self._pending = []  # [term, suffix so far]
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Scan the next chunk; returns a banned word as soon as one is confirmed"""
+        if not self.matcher:
+            return None
+
+        for ch in chunk.casefold():
+            if self._pending:
+                found = self._advance_pending(ch)
+                if found:
+                    return found
+
+            self._recent.append(ch)
+            self._state = self.matcher._step(self._state, ch)
+            for term in self.matcher._out[self._state]:
+                if self._starts_at_boundary(len(term)):
+                    self._pending.append([term, ""])
+        return None
+
+    def finish(self) -> Optional[str]:
+        """End of text: any pending match with an allowed ending counts"""
+        for term, suffix in self._pending:
+            if suffix in ALLOWED_SUFFIXES:
+                return self.matcher._display.get(term, term)
+        self._pending = []
+        return None
+
+    def _starts_at_boundary(self, length: int) -> bool:
+        if len(self._recent) <= length:
+            return True
+        return not _is_word_char(self._recent[-length - 1])
+
+    def _advance_pending(self, ch: str) -> Optional[str]:
+        still_pending = []
+        for term, suffix in self._pending:
+            if _is_word_char(ch) or ch in "'’":
+                if len(suffix) < _MAX_SUFFIX:
+                    still_pending.append([term, suffix + ch])
+            elif suffix in ALLOWED_SUFFIXES:
+                return self.matcher._display.get(term, term)
+        self._pending = still_pending
+        return None
+
+@lru_cache(maxsize=32)
+def _compiled(words: tuple) -> BannedWordMatcher:
+    return BannedWordMatcher(words)
+
+def get_matcher(words: Iterable[str]) -> BannedWordMatcher:
+    """Matcher for a filter list, compiled only when the list changes"""
+    return _compiled(tuple(words))
@@ -0,0 +1,191 @@
+"""
+Write-behind queue for Little Star Rabbit
+Pages enqueue database writes and return immediately; a background thread
+writes them in batches so a slow database never freezes the child's screen
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class _FlushMarker:
+    """Queued behind pending writes; set once everything before it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue with a single flusher thread
+
+    flush_batch(kind, rows) writes a list of rows of one kind and raises on
+    failure. Failed batches are retried with backoff; rows that arrive while
+    the queue is full are dropped (and counted) rather than blocking the page.
+
+    Rows of keep_kinds (things a child was told were saved) are never given
+    up on quietly: a batch that still fails is written one row at a time,
+    and rows that fail even then are held and retried every retry_interval
+    seconds until the database takes them. Other kinds are counted as failed.
+    """
+
+    def __init__(self, flush_batch: Callable[[str, list], None], max_pending: int = 1000,
+                 flush_interval: float = 0.5, max_batch: int = 200, max_attempts: int = 3,
+                 keep_kinds: Iterable[str] = (), retry_interval: float = 5.0):
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.max_held = max_pending
+        self.keep_kinds = frozenset(keep_kinds)
+        self.retry_interval = retry_interval
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "retried": 0,
+            "dropped": 0,
+            "failed": 0,
+            "held": 0,  # rows waiting for the database to come back
+        }
+        self.last_error: Optional[str] = None
+        self._held = defaultdict(list)  # kind -> rows (flusher thread only)
+        self._held_retry_at = 0.0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, kind: str, row: tuple) -> bool:
+        """Queue one row without waiting; False if the queue is full or closed"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((kind, row))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been written (or given up on)"""
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write what is pending and stop the flusher thread"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._thread.join(timeout)
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _run(self):
+        while not (self._closed and self._queue.empty()):
+            if self._held and time.monotonic() >= self._held_retry_at:
+                self._retry_held()
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Gather whatever else is already waiting, up to one batch
+            items = [first]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batches = defaultdict(list)
+            markers = []
+            for item in items:
+                if isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    kind, row = item
+                    batches[kind].append(row)
+
+            for kind, rows in batches.items():
+                self._write_with_retry(kind, rows)
+
+            for marker in markers:
+                marker.done.set()
+
+        # Shutting down: one last try for anything held
+        if self._held:
+            self._retry_held()
+            for kind, rows in self._held.items():
+                logger.error("Lost %d %s rows at shutdown: %s", len(rows), kind, self.last_error)
+
+    def _write_with_retry(self, kind: str, rows: list):
+        for attempt in range(self.max_attempts):
+            try:
+                self.flush_batch(kind, rows)
+                self._count("written", len(rows))
+                self._count("batches")
+                return
+            except Exception as e:
+                self._note_error(kind, e)
+                if attempt + 1 < self.max_attempts:
+                    self._count("retried", len(rows))
+                    time.sleep(0.2 * 2 ** attempt)
+
+        if kind not in self.keep_kinds:
+            logger.warning("Gave up on %d %s rows: %s", len(rows), kind, self.last_error)
+            self._count("failed", len(rows))
+            return
+
+        # One row at a time, so a single bad row can't take the rest with it
+        for row in rows:
+            try:
+                self.flush_batch(kind, [row])
+                self._count("written")
+            except Exception as e:
+                self._note_error(kind, e)
+                self._hold(kind, row)
+
+    def _hold(self, kind: str, row: tuple):
+        if sum(len(rows) for rows in self._held.values()) >= self.max_held:
+            logger.error("Dropped a %s row, too many already held: %s", kind, self.last_error)
+            self._count("failed")
+            return
+        if not self._held:
+            self._held_retry_at = time.monotonic() + self.retry_interval
+        self._held[kind].append(row)
+        self._count("held")
+
+    def _retry_held(self):
+        for kind in list(self._held):
+            still_held = []
+            for row in self._held.pop(kind):
+                try:
+                    self.flush_batch(kind, [row])
+                except Exception as e:
+                    self._note_error(kind, e)
+                    still_held.append(row)
+                    continue
+                self._count("written")
+                self._count("held", -1)
+            if still_held:
+                self._held[kind] = still_held
+        self._held_retry_at = time.monotonic() + self.retry_interval
+
+    def _note_error(self, kind: str, error: Exception):
+        self.last_error = f"{kind}: {error}"